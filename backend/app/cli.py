@@ -0,0 +1,167 @@
+# backend/app/cli.py
+"""
+Maintenance commands.
+
+    cd backend && python -m app.cli migrate
+    cd backend && python -m app.cli rebuild-stats [--user-id UUID]
+    cd backend && python -m app.cli rebuild-mistakes [--user-id UUID]
+    cd backend && python -m app.cli prune-llm-calls [--days 30]
+    cd backend && python -m app.cli train-cache-dict practice_question [--samples 2000] [--out-dir cache_dicts]
+    cd backend && python -m app.cli cache-worker
+"""
+import argparse
+import os
+import uuid
+
+from .db import SessionLocal, init_db
+
+
+def migrate(args):
+    """Create missing tables, columns and indexes (run before starting the app)."""
+    import time
+
+    started = time.perf_counter()
+    init_db()
+    print(f"Database schema is up to date ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def rebuild_stats(args):
+    from .services import practice_stats_service
+
+    init_db()
+    db = SessionLocal()
+    try:
+        user_id = uuid.UUID(args.user_id) if args.user_id else None
+        count = practice_stats_service.rebuild_user_stats(db, user_id=user_id)
+        print(f"Rebuilt practice stats for {count} user(s)")
+    finally:
+        db.close()
+
+
+def rebuild_mistakes(args):
+    from .services import mistake_review_service
+
+    init_db()
+    db = SessionLocal()
+    try:
+        user_id = uuid.UUID(args.user_id) if args.user_id else None
+        count = mistake_review_service.rebuild_review_queue(db, user_id=user_id)
+        print(f"Rebuilt mistake review queues for {count} user(s)")
+    finally:
+        db.close()
+
+
+def prune_llm_calls(args):
+    from .services import llm_ledger_service
+
+    init_db()
+    db = SessionLocal()
+    try:
+        deleted = llm_ledger_service.prune_llm_calls(db, days=args.days)
+        print(f"Deleted {deleted} LLM call ledger row(s) older than {args.days} days")
+    finally:
+        db.close()
+
+
+def _practice_question_samples(limit: int) -> list:
+    from sqlalchemy.orm import joinedload
+    from . import models
+    from .services import practice_service
+
+    db = SessionLocal()
+    try:
+        questions = db.query(models.Question).options(joinedload(models.Question.sentence))\
+            .order_by(models.Question.id.desc()).limit(limit).all()
+        return [practice_service._question_payload(question) for question in questions]
+    finally:
+        db.close()
+
+
+def _word_explanation_samples(limit: int) -> list:
+    from .services import vocab_service
+
+    samples = []
+    for key in vocab_service._word_cache.scan_iter(match=f"{vocab_service.WORD_CACHE_PREFIX}*", count=1000):
+        payload = vocab_service.word_codec.decode(vocab_service._word_cache.get(key))
+        if payload:
+            samples.append(payload)
+        if len(samples) >= limit:
+            break
+    return samples
+
+
+def train_cache_dict(args):
+    from .core import cache_codec
+
+    init_db()
+    sources = {"practice_question": _practice_question_samples, "word_explanation": _word_explanation_samples}
+    samples = sources[args.namespace](args.samples)
+    if len(samples) < 20:
+        print(f"Only {len(samples)} {args.namespace} sample(s) available; need at least 20 to train a dictionary")
+        return
+    try:
+        path = cache_codec.train_dictionary(args.namespace, samples, size=args.size, directory=args.out_dir)
+    except Exception as e:
+        print(f"Could not train a {args.namespace} dictionary from {len(samples)} samples: {e}")
+        return
+    print(f"Trained {args.namespace} dictionary from {len(samples)} samples -> {path}")
+    print("Set CACHE_ZSTD_DICT_DIR to its directory on every app process and restart them to use it")
+
+
+def cache_worker(args):
+    """Campaign for the practice-cache lease in the foreground, for deployments whose web workers
+    run with CACHE_BACKGROUND_MODE=off."""
+    import signal
+    import threading
+    from .services import practice_service
+
+    init_db()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    practice_service._start_background_cache_work(force=True)
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        practice_service._stop_background_cache_work()
+        print("Cache worker stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="AI English backend maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Create missing tables, columns and indexes")
+    migrate_parser.set_defaults(func=migrate)
+
+    rebuild = subparsers.add_parser("rebuild-stats", help="Recompute per-user practice stats rollups from user_answers")
+    rebuild.add_argument("--user-id", help="Only rebuild this user (default: all users)")
+    rebuild.set_defaults(func=rebuild_stats)
+
+    rebuild_mistakes_parser = subparsers.add_parser("rebuild-mistakes", help="Recompute per-user mistake aggregates (mistakes list, review queue) from user_answers")
+    rebuild_mistakes_parser.add_argument("--user-id", help="Only rebuild this user (default: all users)")
+    rebuild_mistakes_parser.set_defaults(func=rebuild_mistakes)
+
+    prune = subparsers.add_parser("prune-llm-calls", help="Delete old rows from the LLM call ledger")
+    prune.add_argument("--days", type=int, default=30, help="Keep this many days of calls (default: 30)")
+    prune.set_defaults(func=prune_llm_calls)
+
+    train = subparsers.add_parser("train-cache-dict", help="Train a zstd dictionary for a Redis cache namespace")
+    train.add_argument("namespace", choices=["practice_question", "word_explanation"])
+    train.add_argument("--samples", type=int, default=2000, help="Maximum number of payloads to train on")
+    train.add_argument("--size", type=int, default=16 * 1024, help="Dictionary size in bytes (default: 16 KiB)")
+    train.add_argument("--out-dir", default=os.getenv("CACHE_ZSTD_DICT_DIR", "cache_dicts"),
+                       help="Directory for <namespace>.zdict (default: $CACHE_ZSTD_DICT_DIR or cache_dicts)")
+    train.set_defaults(func=train_cache_dict)
+
+    worker = subparsers.add_parser("cache-worker", help="Run the practice cache monitor/sweeper (leader-elected)")
+    worker.set_defaults(func=cache_worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# backend/app/core/cache_codec.py
+"""
+Value codecs for JSON payloads cached in Redis (practice questions, word explanations).
+
+CACHE_CODEC selects how new values are written:
+
+    json   the JSON bytes as they are
+    zstd   (default) zstandard-compressed JSON. If CACHE_ZSTD_DICT_DIR contains
+           <namespace>.zdict (see `python -m app.cli train-cache-dict`), frames are
+           compressed with that dictionary, which is what makes ~1 KB payloads
+           shrink several-fold
+
+Reads are transparent: `decode` recognises a zstd frame by its magic number and
+returns anything else unchanged, so entries written before a codec change stay
+readable. A frame compressed with a dictionary this process does not have decodes
+to None and callers treat it as a miss.
+
+Values stay JSON underneath (rather than e.g. msgpack) because a practice-cache hit
+is sent to the client as JSON bytes without being parsed (core.serialization).
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import zstandard
+
+CACHE_CODEC = os.getenv("CACHE_CODEC", "zstd").lower()
+CACHE_ZSTD_LEVEL = int(os.getenv("CACHE_ZSTD_LEVEL", 3))
+CACHE_ZSTD_DICT_DIR = os.getenv("CACHE_ZSTD_DICT_DIR")
+DEFAULT_DICT_SIZE = 16 * 1024
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _dictionary_path(namespace: str, directory: Optional[str] = None) -> Optional[Path]:
+    directory = directory or CACHE_ZSTD_DICT_DIR
+    return Path(directory) / f"{namespace}.zdict" if directory else None
+
+
+class CacheCodec:
+    """Encoder/decoder for one cache namespace; safe to share between threads."""
+
+    def __init__(self, namespace: str, codec: str = CACHE_CODEC, level: int = CACHE_ZSTD_LEVEL):
+        self.namespace = namespace
+        self.codec = codec if codec in ("json", "zstd") else "zstd"
+        self.level = level
+        self.dictionary: Optional[zstandard.ZstdCompressionDict] = None
+        path = _dictionary_path(namespace)
+        if path and path.exists():
+            self.dictionary = zstandard.ZstdCompressionDict(path.read_bytes())
+            print(f"[CacheCodec] Loaded {namespace} dictionary {path} (id {self.dictionary.dict_id()})")
+        self._local = threading.local()  # zstd (de)compressor objects are not thread safe
+
+    @property
+    def dict_id(self) -> int:
+        return self.dictionary.dict_id() if self.dictionary else 0
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> Optional[zstandard.ZstdDecompressor]:
+        if dict_id and dict_id != self.dict_id:
+            return None
+        attr = "dict_decompressor" if dict_id else "plain_decompressor"
+        decompressor = getattr(self._local, attr, None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary if dict_id else None)
+            setattr(self._local, attr, decompressor)
+        return decompressor
+
+    def encode(self, payload: bytes) -> bytes:
+        """JSON bytes -> stored value."""
+        if self.codec == "json":
+            return payload
+        return self._compressor().compress(payload)
+
+    def decode(self, value) -> Optional[bytes]:
+        """Stored value -> JSON bytes, or None when it cannot be decoded here."""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return value.encode("utf-8")
+        if not value.startswith(_ZSTD_MAGIC):
+            return value
+        try:
+            decompressor = self._decompressor(zstandard.get_frame_parameters(value).dict_id)
+            if decompressor is None:
+                print(f"[CacheCodec] {self.namespace}: value compressed with an unknown dictionary, ignoring it")
+                return None
+            return decompressor.decompress(value)
+        except zstandard.ZstdError as e:
+            print(f"[CacheCodec] {self.namespace}: could not decompress cached value: {e}")
+            return None
+
+
+_codecs: Dict[str, CacheCodec] = {}
+_codecs_lock = threading.Lock()
+
+
+def codec_for(namespace: str) -> CacheCodec:
+    with _codecs_lock:
+        if namespace not in _codecs:
+            _codecs[namespace] = CacheCodec(namespace)
+        return _codecs[namespace]
+
+
+def value_format(value: bytes) -> str:
+    """'json', 'zstd' or 'zstd+dict' for a stored value."""
+    if not value.startswith(_ZSTD_MAGIC):
+        return "json"
+    try:
+        return "zstd+dict" if zstandard.get_frame_parameters(value).dict_id else "zstd"
+    except zstandard.ZstdError:
+        return "zstd"
+
+
+def train_dictionary(namespace: str, samples: List[bytes], size: int = DEFAULT_DICT_SIZE,
+                     directory: Optional[str] = None) -> Path:
+    """Train a zstd dictionary on sample payloads and write it to <directory>/<namespace>.zdict.
+
+    Processes pick it up on their next start; values already cached without it stay readable.
+    """
+    path = _dictionary_path(namespace, directory)
+    if path is None:
+        raise ValueError("No dictionary directory: pass one or set CACHE_ZSTD_DICT_DIR")
+    dictionary = zstandard.train_dictionary(size, samples, level=CACHE_ZSTD_LEVEL)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(dictionary.as_bytes())
+    return path
+
+
+def memory_report(client, namespaces: Dict[str, Callable[[str], bool]], sample: int = 200,
+                  max_keys: int = 100_000) -> dict:
+    """Key counts and stored vs. decoded sizes per namespace, from a SCAN of a binary Redis client.
+
+    `namespaces` maps a namespace to a predicate on the key. Sizes come from up to `sample`
+    keys per namespace (MEMORY USAGE where the server supports it) and are extrapolated.
+    """
+    keys: Dict[str, List[bytes]] = {name: [] for name in namespaces}
+    counts = dict.fromkeys(namespaces, 0)
+    scanned = 0
+    for key in client.scan_iter(count=1000):
+        scanned += 1
+        name = key.decode("utf-8", "replace") if isinstance(key, bytes) else key
+        for namespace, matches in namespaces.items():
+            if matches(name):
+                counts[namespace] += 1
+                if len(keys[namespace]) < sample:
+                    keys[namespace].append(key)
+                break
+        if scanned >= max_keys:
+            break
+
+    report = {}
+    for namespace, sampled_keys in keys.items():
+        codec = codec_for(namespace)
+        stored, decoded, redis_bytes, formats = [], [], [], {}
+        values = client.mget(sampled_keys) if sampled_keys else []
+        for key, value in zip(sampled_keys, values):
+            if value is None:
+                continue
+            payload = codec.decode(value)
+            stored.append(len(value))
+            decoded.append(len(payload) if payload is not None else 0)
+            formats[value_format(value)] = formats.get(value_format(value), 0) + 1
+            usage = _memory_usage(client, key)
+            if usage is not None:
+                redis_bytes.append(usage)
+        count = counts[namespace]
+        avg_stored = sum(stored) / len(stored) if stored else 0
+        avg_decoded = sum(decoded) / len(decoded) if decoded else 0
+        report[namespace] = {
+            "keys": count,
+            "sampled": len(stored),
+            "formats": formats,
+            "avg_stored_bytes": round(avg_stored, 1),
+            "avg_json_bytes": round(avg_decoded, 1),
+            "compression_ratio": round(avg_decoded / avg_stored, 2) if avg_stored else None,
+            "avg_redis_memory_bytes": round(sum(redis_bytes) / len(redis_bytes), 1) if redis_bytes else None,
+            "est_stored_bytes": int(avg_stored * count),
+            "est_json_bytes": int(avg_decoded * count),
+            "codec": codec.codec,
+            "dictionary_id": codec.dict_id or None,
+        }
+    return {"scanned_keys": scanned, "truncated": scanned >= max_keys, "namespaces": report}
+
+
+def _memory_usage(client, key) -> Optional[int]:
+    try:
+        return client.memory_usage(key)
+    except Exception:
+        return None  # not supported by this server
+
@@ -0,0 +1,41 @@
+# backend/app/core/db_types.py
+"""
+Column types shared by the models.
+
+SQLite has no datetime type: SQLAlchemy stores DateTime as text, and keyset
+pagination compares that text directly against an index. Every stored value has
+to use one format ("YYYY-MM-DD HH:MM:SS.ffffff", UTC) or the same instant sorts
+two ways. `UTCDateTime` converts aware values to UTC before they are written, and
+`now()` is compiled on SQLite so that SQL-side defaults carry microseconds too
+(CURRENT_TIMESTAMP has none). `db.normalize_sqlite_datetimes` rewrites rows
+written before this.
+"""
+from datetime import timezone
+
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
+from sqlalchemy.types import TypeDecorator
+
+# Same layout as SQLAlchemy's SQLite DATETIME storage format; %f is "SS.SSS"
+SQLITE_NOW = "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+# Length of "YYYY-MM-DD HH:MM:SS", i.e. a CURRENT_TIMESTAMP value without microseconds
+SQLITE_SECONDS_LENGTH = 19
+
+
+class UTCDateTime(TypeDecorator):
+    """DateTime that stores aware values as UTC, so SQLite text values compare in time order."""
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+            if dialect.name == "sqlite":
+                value = value.replace(tzinfo=None)
+        return value
+
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return SQLITE_NOW
@@ -0,0 +1,131 @@
+# backend/app/core/leader.py
+"""
+Lease-based leader election on Redis, for background work that must run in exactly
+one process across all uvicorn/gunicorn workers and hosts.
+
+Each candidate tries `SET leader:<name> <token> NX PX <lease>`; the holder renews the
+lease every lease/3 seconds with a compare-and-pexpire script and the others retry
+on the same cadence. If the leader dies, its lease lapses and another candidate
+takes over within about LEADER_LEASE_SECONDS. A leader that cannot renew (Redis
+unreachable, lease stolen after a long pause) steps down before doing more work.
+
+    LEADER_LEASE_SECONDS   lease length (default 10)
+"""
+import os
+import socket
+import threading
+import uuid
+from typing import Callable, Optional
+
+import redis
+
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", 10))
+LEADER_KEY_PREFIX = "leader:"
+
+# KEYS[1] lease key, ARGV[1] our token, ARGV[2] lease in ms
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def acquire_lock(client: redis.Redis, key: str, seconds: float) -> Optional[str]:
+    """Short-lived mutex: a token if `key` was free, else None. Release with `release_lock`."""
+    token = uuid.uuid4().hex
+    return token if client.set(key, token, nx=True, px=int(seconds * 1000)) else None
+
+
+def release_lock(client: redis.Redis, key: str, token: str):
+    """Delete `key` only if it still holds our token (it may have expired and been re-taken)."""
+    client.eval(_RELEASE_SCRIPT, 1, key, token)
+
+
+class LeaderElection:
+    """Campaign for `name` in a daemon thread; call on_elected / on_lost on transitions."""
+
+    def __init__(self, client: redis.Redis, name: str, on_elected: Callable[[], None], on_lost: Callable[[], None],
+                 lease_seconds: float = LEADER_LEASE_SECONDS):
+        self.client = client
+        self.name = name
+        self.key = f"{LEADER_KEY_PREFIX}{name}"
+        self.token = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_ms = int(lease_seconds * 1000)
+        self.interval = lease_seconds / 3
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"leader-{self.name}", daemon=True)
+        self._thread.start()
+        print(f"[Leader] {self.token} campaigning for '{self.name}' (lease {self.lease_ms / 1000:g}s)")
+
+    def stop(self):
+        """Stop campaigning and hand the lease back so another process takes over immediately."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        if self.is_leader:
+            self._step_down()
+        try:
+            self.client.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except redis.RedisError as e:
+            print(f"[Leader] Could not release '{self.name}': {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.is_leader:
+                    if not self.client.eval(_RENEW_SCRIPT, 1, self.key, self.token, self.lease_ms):
+                        print(f"[Leader] {self.token} lost the '{self.name}' lease")
+                        self._step_down()
+                elif self.client.set(self.key, self.token, nx=True, px=self.lease_ms):
+                    self.is_leader = True
+                    print(f"[Leader] {self.token} is now leader for '{self.name}'")
+                    self._call(self.on_elected)
+            except redis.RedisError as e:
+                print(f"[Leader] Redis error while campaigning for '{self.name}': {e}")
+                if self.is_leader:
+                    self._step_down()  # cannot prove we still hold the lease
+            self._stop.wait(self.interval)
+
+    def _step_down(self):
+        self.is_leader = False
+        self._call(self.on_lost)
+
+    def _call(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[Leader] '{self.name}' callback {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def status(self) -> dict:
+        try:
+            holder = self.client.get(self.key)
+            ttl_ms = self.client.pttl(self.key)
+        except redis.RedisError:
+            holder, ttl_ms = None, None
+        if isinstance(holder, bytes):
+            holder = holder.decode()
+        return {
+            "name": self.name,
+            "this_process": self.token,
+            "is_leader": self.is_leader,
+            "current_leader": holder,
+            "lease_remaining_ms": ttl_ms if ttl_ms is not None and ttl_ms >= 0 else None,
+            "lease_seconds": self.lease_ms / 1000,
+        }
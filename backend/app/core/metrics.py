@@ -0,0 +1,177 @@
+# backend/app/core/metrics.py
+"""
+Prometheus metrics, served at /metrics.
+
+Single process: the default registry is exposed as is. With several uvicorn/gunicorn
+workers, point PROMETHEUS_MULTIPROC_DIR at an empty directory (wiped on deploy) before
+the workers start; every worker then writes its samples to mmap'd files there and
+/metrics aggregates them, whichever worker serves the scrape. Gauges use "livesum" so
+a dead worker's connections or in-flight work drop out once it is marked dead.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from opentelemetry import trace
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+_POOL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+
+# HTTP
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+                         buckets=_LATENCY_BUCKETS)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being handled", multiprocess_mode="livesum")
+
+# Practice question cache
+PRACTICE_CACHE_REQUESTS = Counter(
+    "practice_cache_requests_total",
+    "Practice question requests by outcome: hit (served from cache), fallback (generated synchronously), failed",
+    ["topic", "difficulty", "result"])
+PRACTICE_CACHE_REPLENISH = Counter("practice_cache_replenish_total", "Background cache refills", ["topic", "difficulty", "outcome"])
+PRACTICE_CACHE_EVICTIONS = Counter("practice_cache_evicted_users_total", "User pools reclaimed by the sweeper",
+                                   ["reason"])  # inactive / budget
+PRACTICE_CACHE_POOLED_USERS = Gauge("practice_cache_pooled_users", "Users whose question pool is kept warm",
+                                    multiprocess_mode="mostrecent")
+PRACTICE_CACHE_LEADER = Gauge("practice_cache_leader", "1 in the process running the keyspace monitor and sweeper",
+                              multiprocess_mode="livesum")  # summed over workers this should be exactly 1
+PRACTICE_GENERATION_IN_PROGRESS = Gauge("practice_generation_queue_depth", "Cache refills queued or running",
+                                        multiprocess_mode="livesum")
+
+# Write-behind answer ingestion
+ANSWER_INGEST_DEAD_LETTERED = Counter("answer_ingest_dead_lettered_total",
+                                      "Answer stream entries moved to the dead-letter stream", ["reason"])  # decode / write
+
+# LLM
+LLM_REQUESTS = Counter("llm_requests_total", "LLM calls by outcome (success, error, parse_error)", ["call_site", "model", "outcome"])
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM call latency", ["call_site", "model"], buckets=_LLM_BUCKETS)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ["call_site", "model", "type"])
+
+# DB connection pool
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out_connections", "Connections currently checked out", ["pool"],
+                            multiprocess_mode="livesum")
+DB_POOL_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["pool"],
+                         buckets=_POOL_BUCKETS)
+DB_POOL_HOLD = Histogram("db_pool_hold_seconds", "Time a connection was held before checkin", ["pool", "holder"],
+                         buckets=_POOL_BUCKETS)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that hit pool_timeout", ["pool"])
+
+
+def render_latest():
+    """Body and content type for the /metrics response."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the multiprocess aggregate (call on shutdown)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Request count and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            # Unmatched paths share one label to keep the series bounded
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            method = scope.get("method", "HTTP")
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status["code"])).inc()
+
+
+class LLMCall:
+    """Collects what one LLM call returned; see `llm_call`."""
+
+    def __init__(self, call_site: str, model: str):
+        self.call_site = call_site
+        self.model = model
+        self.outcome = "success"
+        self.prompt_variant: Optional[str] = None  # ledger only, e.g. "history" when the prompt carries past questions
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def set_usage(self, message):
+        """Read token usage from a chat model's AIMessage."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage:
+            self.prompt_tokens = usage.get("input_tokens")
+            self.completion_tokens = usage.get("output_tokens")
+            return
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        self.prompt_tokens = token_usage.get("prompt_tokens")
+        self.completion_tokens = token_usage.get("completion_tokens")
+
+    def parse_failed(self):
+        self.outcome = "parse_error"
+
+
+@contextmanager
+def llm_call(call_site: str, model: str):
+    """Time an LLM call and record its outcome and token usage, in Prometheus and the LLM call ledger.
+
+    Exceptions inside the block count as outcome "error" and propagate; call
+    `parse_failed()` on the yielded LLMCall when the response could not be parsed.
+    """
+    from ..services import llm_ledger_service
+    from .tracing import tracer
+
+    call = LLMCall(call_site, model)
+    error = None
+    started = time.perf_counter()
+    span = tracer.start_span(f"llm {call_site}", attributes={"llm.call_site": call_site, "llm.model": model})
+    try:
+        with trace.use_span(span, end_on_exit=False, record_exception=False):
+            yield call
+    except Exception as e:
+        error = e
+        if call.outcome == "success":
+            call.outcome = "error"
+        span.record_exception(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        span.set_attribute("llm.outcome", call.outcome)
+        if call.prompt_variant:
+            span.set_attribute("llm.prompt_variant", call.prompt_variant)
+        if call.prompt_tokens is not None:
+            span.set_attribute("llm.usage.prompt_tokens", call.prompt_tokens)
+        if call.completion_tokens is not None:
+            span.set_attribute("llm.usage.completion_tokens", call.completion_tokens)
+        span.end()
+        llm_ledger_service.record(call, elapsed * 1000, error)
+        LLM_LATENCY.labels(call_site, model).observe(elapsed)
+        LLM_REQUESTS.labels(call_site, model, call.outcome).inc()
+        if call.prompt_tokens:
+            LLM_TOKENS.labels(call_site, model, "prompt").inc(call.prompt_tokens)
+        if call.completion_tokens:
+            LLM_TOKENS.labels(call_site, model, "completion").inc(call.completion_tokens)
@@ -0,0 +1,53 @@
+# backend/app/core/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are opaque, URL-safe strings that encode the sort key of the last row
+of a page together with its primary key, e.g. ``(answered_at, id)``. The next
+page is fetched with a ``(sort_col, id) < (value, id)`` range predicate, which
+an index on ``(user_id, sort_col, id)`` can serve directly no matter how deep
+the page is. On SQLite this relies on timestamps being stored in one text
+format, see core/db_types.py.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+from sqlalchemy import literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Union[datetime, str], row_id: Union[int, str]) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, int(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by `encode_cursor`. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def apply_keyset(query, sort_col, id_col, cursor: Optional[str], descending: bool = True):
+    """Order `query` by ``(sort_col, id_col)`` and, if a cursor is given, start after it."""
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        # Bind through the column's type so the bound is written in the same (canonical)
+        # format as the stored values and compares against the raw, indexed column
+        bound = tuple_(literal(sort_value, type_=sort_col.type), row_id)
+        if descending:
+            query = query.filter(tuple_(sort_col, id_col) < bound)
+        else:
+            query = query.filter(tuple_(sort_col, id_col) > bound)
+    if descending:
+        return query.order_by(sort_col.desc(), id_col.desc())
+    return query.order_by(sort_col.asc(), id_col.asc())
@@ -0,0 +1,232 @@
+# backend/app/core/pool_metrics.py
+"""
+Connection-pool instrumentation.
+
+For every engine created through db._create_engine this records:
+
+- checkout wait: time spent inside the pool getting a connection (queue wait plus
+  connect for new connections), and how many checkouts hit ``pool_timeout``;
+- hold duration: time from checkout to checkin, broken down by holder;
+- the connections currently checked out, with their holder and age.
+
+The holder is the FastAPI route template for requests (set by PoolHolderMiddleware)
+or a label set with ``holder("...")`` in background threads; other threads are
+reported by thread name.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from . import metrics as prom
+
+# Upper bounds in milliseconds; the last bucket is everything above
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_current_holder: contextvars.ContextVar = contextvars.ContextVar("pool_holder", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 2),
+            "avg_ms": round(self.sum_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self._quantile(0.5),
+            "p95_ms": self._quantile(0.95),
+            "p99_ms": self._quantile(0.99),
+            "buckets": {
+                (f"le_{bound}" if i < len(BUCKETS_MS) else "inf"): n
+                for i, (bound, n) in enumerate(zip(BUCKETS_MS + (None,), self.counts))
+            },
+        }
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.checkout_wait = Histogram()
+        self.timeouts = 0
+        self.timeouts_by_holder: Dict[str, int] = {}
+        self.hold_by_holder: Dict[str, Histogram] = {}
+        self.active: Dict[int, tuple] = {}  # id(connection record) -> (holder, checkout perf_counter)
+
+    def record_wait(self, ms: float):
+        prom.DB_POOL_WAIT.labels(self.name).observe(ms / 1000)
+        with self.lock:
+            self.checkout_wait.observe(ms)
+
+    def record_timeout(self, holder_label: str):
+        prom.DB_POOL_TIMEOUTS.labels(self.name).inc()
+        with self.lock:
+            self.timeouts += 1
+            self.timeouts_by_holder[holder_label] = self.timeouts_by_holder.get(holder_label, 0) + 1
+
+    def on_checkout(self, record_id: int, holder_label: str):
+        prom.DB_POOL_CHECKED_OUT.labels(self.name).inc()
+        with self.lock:
+            self.active[record_id] = (holder_label, time.perf_counter())
+
+    def on_checkin(self, record_id: int):
+        with self.lock:
+            entry = self.active.pop(record_id, None)
+            if entry is None:
+                return
+            holder_label, started = entry
+            held_ms = (time.perf_counter() - started) * 1000
+            hist = self.hold_by_holder.get(holder_label)
+            if hist is None:
+                hist = self.hold_by_holder[holder_label] = Histogram()
+            hist.observe(held_ms)
+        prom.DB_POOL_CHECKED_OUT.labels(self.name).dec()
+        # Thread names are unbounded (Thread-123); only named holders become label values
+        prom.DB_POOL_HOLD.labels(self.name, "other" if holder_label.startswith("thread:") else holder_label) \
+            .observe(held_ms / 1000)
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.checkout_wait = Histogram()
+            self.timeouts = 0
+            self.timeouts_by_holder = {}
+            self.hold_by_holder = {}
+
+    def snapshot(self) -> dict:
+        now = time.perf_counter()
+        with self.lock:
+            active = sorted(
+                ({"holder": h, "held_ms": round((now - started) * 1000, 2)} for h, started in self.active.values()),
+                key=lambda item: item["held_ms"], reverse=True
+            )
+            hold = {h: hist.to_dict() for h, hist in self.hold_by_holder.items()}
+            return {
+                "pool": self.name,
+                "since": self.started_at,
+                "checkout_wait": self.checkout_wait.to_dict(),
+                "timeouts": self.timeouts,
+                "timeouts_by_holder": dict(self.timeouts_by_holder),
+                "hold_duration_by_holder": dict(sorted(hold.items(), key=lambda kv: kv[1]["sum_ms"], reverse=True)),
+                "active_holders": active,
+            }
+
+
+_registry: Dict[str, PoolMetrics] = {}
+
+
+def current_holder() -> str:
+    label = _current_holder.get()
+    if label is None:
+        return f"thread:{threading.current_thread().name}"
+    if isinstance(label, dict):  # ASGI scope of the request in flight
+        route = label.get("route")
+        path = getattr(route, "path", None) or "<unmatched>"
+        return f"{label.get('method', 'HTTP')} {path}"
+    return label
+
+
+@contextmanager
+def holder(label: str):
+    """Attribute connections checked out inside this block to `label`."""
+    token = _current_holder.set(label)
+    try:
+        yield
+    finally:
+        _current_holder.reset(token)
+
+
+class PoolHolderMiddleware:
+    """Attributes connections checked out while handling a request to its route template.
+
+    The scope is stored rather than the path: the route is only resolved after the
+    middleware runs, and connections are checked out later, inside the endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _current_holder.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_holder.reset(token)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.record_timeout(current_holder())
+            raise
+        if self.metrics:
+            self.metrics.record_wait((time.perf_counter() - started) * 1000)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument(engine, name: str) -> PoolMetrics:
+    """Register checkout/checkin listeners on `engine` and return its metrics."""
+    metrics = _registry.setdefault(name, PoolMetrics(name))
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.on_checkout(id(connection_record), current_holder())
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.on_checkin(id(connection_record))
+
+    return metrics
+
+
+def all_metrics() -> List[PoolMetrics]:
+    return list(_registry.values())
@@ -0,0 +1,141 @@
+# backend/app/core/redis_client.py
+"""
+Shared Redis access.
+
+One explicitly sized connection pool per (sync/async, decode_responses) flavour,
+created on first use, so importing a service never touches Redis and a Redis
+outage surfaces as a RedisError on the call that needs it instead of at startup.
+
+    REDIS_URL                    redis://host:port/db (default: REDIS_HOST/REDIS_PORT/REDIS_DB)
+    REDIS_MAX_CONNECTIONS        per pool (default 50); a full pool makes callers wait
+    REDIS_POOL_TIMEOUT           seconds to wait for a free pooled connection (default 5)
+    REDIS_SOCKET_TIMEOUT         per-command timeout in seconds (default 5)
+    REDIS_CONNECT_TIMEOUT        seconds (default 2)
+    REDIS_HEALTH_CHECK_INTERVAL  PING idle connections older than this before reuse (default 30)
+
+Async clients (redis.asyncio) are bound to the event loop that created them; they
+are meant for request handlers. Background threads use the sync clients. Pub/sub
+gets its own unpooled connection without a socket timeout (`pubsub_client`).
+
+The `*_many` helpers send one pipeline for a batch of keys instead of a round trip
+per key.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+import redis.asyncio
+
+from . import tracing
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+REDIS_URL = os.getenv("REDIS_URL") or f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+_lock = threading.Lock()
+_sync_clients: Dict[bool, redis.Redis] = {}
+_async_clients: Dict[Tuple[int, bool], redis.asyncio.Redis] = {}
+
+
+def _pool_kwargs(decode_responses: bool) -> dict:
+    return {
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        "retry_on_timeout": False,
+        "decode_responses": decode_responses,
+    }
+
+
+def get_sync(decode_responses: bool = True) -> redis.Redis:
+    """Process-wide sync client (thread safe) on the shared pool."""
+    client = _sync_clients.get(decode_responses)
+    if client is None:
+        with _lock:
+            client = _sync_clients.get(decode_responses)
+            if client is None:
+                pool = redis.BlockingConnectionPool.from_url(REDIS_URL, **_pool_kwargs(decode_responses))
+                client = tracing.instrument_redis(redis.Redis(connection_pool=pool, decode_responses=decode_responses))
+                _sync_clients[decode_responses] = client
+    return client
+
+
+def get_async(decode_responses: bool = True) -> redis.asyncio.Redis:
+    """Async client on a shared pool for the running event loop."""
+    key = (id(asyncio.get_running_loop()), decode_responses)
+    client = _async_clients.get(key)
+    if client is None:
+        pool = redis.asyncio.BlockingConnectionPool.from_url(REDIS_URL, **_pool_kwargs(decode_responses))
+        client = tracing.instrument_redis(redis.asyncio.Redis(connection_pool=pool, decode_responses=decode_responses))
+        _async_clients[key] = client
+    return client
+
+
+def pubsub_client() -> redis.Redis:
+    """Dedicated connection for pub/sub listeners, which block indefinitely between messages."""
+    pool = redis.ConnectionPool.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                                         health_check_interval=REDIS_HEALTH_CHECK_INTERVAL)
+    return redis.Redis(connection_pool=pool, decode_responses=True)
+
+
+def exists_many(client: redis.Redis, keys: Iterable[str]) -> List[bool]:
+    """EXISTS for each key in one round trip."""
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.exists(key)
+    return [bool(found) for found in pipe.execute()]
+
+
+async def aexists_many(client: redis.asyncio.Redis, keys: Iterable[str]) -> List[bool]:
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.exists(key)
+    return [bool(found) for found in await pipe.execute()]
+
+
+def ping() -> Optional[float]:
+    """Round-trip time of a PING in milliseconds, or None if Redis is unreachable."""
+    started = time.perf_counter()
+    try:
+        get_sync().ping()
+    except redis.RedisError as e:
+        print(f"[Redis] PING failed: {e}")
+        return None
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def pool_status() -> dict:
+    """Created / idle / in-use connections of the sync pools."""
+    status = {}
+    for decode_responses, client in list(_sync_clients.items()):
+        pool = client.connection_pool
+        created = len(getattr(pool, "_connections", []))
+        idle_queue = getattr(getattr(pool, "pool", None), "queue", [])
+        idle = sum(1 for connection in idle_queue if connection is not None)
+        status["text" if decode_responses else "bytes"] = {
+            "max_connections": getattr(pool, "max_connections", None),
+            "created": created,
+            "idle": idle,
+            "in_use": created - idle,
+        }
+    return status
+
+
+def close_all():
+    """Disconnect the sync pools (call on shutdown)."""
+    for client in list(_sync_clients.values()):
+        try:
+            client.connection_pool.disconnect()
+        except Exception as e:
+            print(f"[Redis] Error closing connection pool: {e}")
@@ -0,0 +1,26 @@
+# backend/app/core/serialization.py
+"""
+JSON helpers for hot response paths.
+
+Practice questions are validated once, through QuestionRead, when the payload is
+built (cache write or synchronous generation). After that the payload travels as
+JSON bytes: a cache hit is sent back as stored in a RawJSONResponse, so FastAPI
+neither re-validates it against response_model nor re-encodes it. Payloads built
+in-process are encoded with orjson rather than the stdlib encoder.
+"""
+import orjson
+from fastapi import Response
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON (orjson)."""
+    return orjson.dumps(obj)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+class RawJSONResponse(Response):
+    """Response whose content is already-serialized JSON (bytes or str); sent as is."""
+    media_type = "application/json"
@@ -0,0 +1,175 @@
+# backend/app/core/sql_profiler.py
+"""
+Per-request SQL profiling.
+
+SqlProfilerMiddleware opens a profile for each HTTP request; cursor-execute hooks
+registered on every Engine count and time the statements run while it is open
+(including in the threadpool that runs sync endpoints, since the profile travels
+in a contextvar). Each response gets a ``Server-Timing: db;dur=..;desc="N queries"``
+header, and the numbers are aggregated per route for /monitor/sql/profile.
+
+A request that runs the same statement shape SQL_REPEAT_WARNING_THRESHOLD or more
+times (a query per row, lazy loads in a loop) is logged as a possible N+1.
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_PROFILING_ENABLED = os.getenv("SQL_PROFILING", "true").lower() in ("1", "true", "yes")
+SQL_REPEAT_WARNING_THRESHOLD = int(os.getenv("SQL_REPEAT_WARNING_THRESHOLD", 5))
+MAX_WARNINGS_PER_ROUTE = 20
+
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("sql_profile", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with literals and expanded IN-lists collapsed, so one query per row looks alike."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERALS.sub("?", shape)
+    return _PARAM_LIST.sub("(?)", shape)
+
+
+class RequestProfile:
+    __slots__ = ("queries", "db_ms", "shapes")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, ms: float):
+        self.queries += 1
+        self.db_ms += ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= SQL_REPEAT_WARNING_THRESHOLD]
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.max_db_ms = 0.0
+        self.n_plus_one_requests = 0
+        self.repeated_shapes = Counter()  # shape -> number of requests in which it repeated
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0,
+            "max_queries": self.max_queries,
+            "db_ms": round(self.db_ms, 2),
+            "avg_db_ms": round(self.db_ms / self.requests, 2) if self.requests else 0,
+            "max_db_ms": round(self.max_db_ms, 2),
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "repeated_statements": [
+                {"statement": shape, "requests": n}
+                for shape, n in self.repeated_shapes.most_common(MAX_WARNINGS_PER_ROUTE)
+            ],
+        }
+
+
+_route_stats: Dict[str, RouteStats] = {}
+_stats_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("sql_profiler_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    starts = conn.info.get("sql_profiler_start")
+    if profile is None or not starts:
+        return
+    profile.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("sql_profiler_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def _route_label(scope) -> str:
+    # Unmatched paths (404s, scanners) share one label so the table stays bounded
+    route = scope.get("route")
+    return f"{scope.get('method', 'HTTP')} {getattr(route, 'path', None) or '<unmatched>'}"
+
+
+def _finish(scope, profile: RequestProfile):
+    label = _route_label(scope)
+    repeated = profile.repeated_shapes()
+    with _stats_lock:
+        stats = _route_stats.get(label)
+        if stats is None:
+            stats = _route_stats[label] = RouteStats()
+        stats.requests += 1
+        stats.queries += profile.queries
+        stats.max_queries = max(stats.max_queries, profile.queries)
+        stats.db_ms += profile.db_ms
+        stats.max_db_ms = max(stats.max_db_ms, profile.db_ms)
+        if repeated:
+            stats.n_plus_one_requests += 1
+            for shape, _ in repeated:
+                stats.repeated_shapes[shape] += 1
+    for shape, n in repeated:
+        print(f"[SQLProfiler] Possible N+1 on {label}: {n}x {shape[:200]}")
+
+
+def server_timing(profile: RequestProfile) -> str:
+    return f'db;dur={profile.db_ms:.2f};desc="{profile.queries} queries"'
+
+
+class SqlProfilerMiddleware:
+    """Counts and times SQL statements per request; adds a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_PROFILING_ENABLED:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(profile).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            _finish(scope, profile)
+
+
+def route_report(reset: bool = False) -> dict:
+    with _stats_lock:
+        report = {label: stats.to_dict() for label, stats in _route_stats.items()}
+        if reset:
+            _route_stats.clear()
+    return dict(sorted(report.items(), key=lambda kv: kv[1]["db_ms"], reverse=True))
@@ -0,0 +1,157 @@
+# backend/app/core/text_search.py
+"""
+Index-backed substring search over short text columns.
+
+PostgreSQL: a pg_trgm GIN index per column makes ``ILIKE '%term%'`` index-driven.
+SQLite: an external-content FTS5 table with the trigram tokenizer (SQLite >= 3.34)
+mirrors the indexed columns through triggers; terms of 3+ characters are matched
+through it, shorter terms fall back to a plain LIKE scan.
+
+`similar` uses the same indexes for typo-tolerant candidates: rows sharing trigrams
+with the term (pg_trgm's ``%`` operator ranked by similarity(), or an FTS5 OR-query
+over the term's trigrams ranked by bm25). It over-selects on purpose; callers take
+the best-scored candidates and rank them themselves.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, literal, literal_column, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+# FTS table name -> (content table, indexed columns). The content table's primary key must be `id`.
+TEXT_INDEXES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "questions_fts": ("questions", ("knowledge_point",)),
+    "sentences_fts": ("sentences", ("grammar_point",)),
+    "user_vocab_fts": ("user_vocab", ("word", "definition")),
+}
+
+TRIGRAM_MIN_LENGTH = 3
+
+_fts_available: Dict[str, bool] = {}
+
+
+def ensure_text_indexes(engine) -> None:
+    """Create the search indexes declared in TEXT_INDEXES if they are missing."""
+    if engine.dialect.name == "postgresql":
+        _ensure_pg_trgm_indexes(engine)
+    elif engine.dialect.name == "sqlite":
+        _ensure_sqlite_fts_tables(engine)
+
+
+def _ensure_pg_trgm_indexes(engine) -> None:
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as e:
+            print(f"[TextSearch] pg_trgm extension unavailable, substring filters will scan: {e}")
+            return
+        for table, columns in TEXT_INDEXES.values():
+            for col in columns:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_{col}_trgm ON {table} USING gin ({col} gin_trgm_ops)"
+                ))
+
+
+def _ensure_sqlite_fts_tables(engine) -> None:
+    for fts, (table, columns) in TEXT_INDEXES.items():
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{c}" for c in columns)
+        old_cols = ", ".join(f"old.{c}" for c in columns)
+        try:
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+                ).first()
+                if exists:
+                    continue
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='trigram')"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                    f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+                ))
+                # Index the rows that existed before the FTS table did
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                print(f"[TextSearch] Created FTS5 trigram index {fts} on {table}({cols})")
+        except DBAPIError as e:
+            print(f"[TextSearch] FTS5 trigram index {fts} unavailable, substring filters will scan: {e}")
+    _fts_available.clear()
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _sqlite_fts_for(db: Session, table: str, column: str):
+    for fts, (content_table, columns) in TEXT_INDEXES.items():
+        if content_table == table and column in columns:
+            if fts not in _fts_available:
+                _fts_available[fts] = db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+                ).first() is not None
+            return fts if _fts_available[fts] else None
+    return None
+
+
+def contains(db: Session, column, term: str):
+    """Case-insensitive ``column LIKE '%term%'`` filter that uses the column's text index when it can."""
+    pattern = f"%{_escape_like(term)}%"
+    if db.get_bind().dialect.name == "sqlite" and len(term) >= TRIGRAM_MIN_LENGTH:
+        table = column.property.columns[0].table
+        fts = _sqlite_fts_for(db, table.name, column.key)
+        if fts:
+            param = f"{fts}_{column.key}_term"
+            # FTS5 only serves LIKE from the trigram index without an ESCAPE clause
+            escape = " ESCAPE '\\'" if pattern != f"%{term}%" else ""
+            matches = text(f"SELECT rowid FROM {fts} WHERE {column.key} LIKE :{param}{escape}") \
+                .bindparams(**{param: pattern}) \
+                .columns(literal_column("rowid"))
+            return table.c.id.in_(matches)
+    return column.ilike(pattern, escape="\\")
+
+
+def contains_any(db: Session, columns, term: str):
+    """OR of `contains` over several columns."""
+    return or_(*(contains(db, col, term) for col in columns))
+
+
+def trigrams(term: str) -> List[str]:
+    """Distinct lower-cased 3-character substrings of `term`."""
+    term = term.lower()
+    return sorted({term[i:i + 3] for i in range(len(term) - 2)})
+
+
+def similar(db: Session, column, term: str):
+    """
+    Typo-tolerant candidates: a subquery of (id, score) for rows whose `column` shares trigrams
+    with `term`, higher score = closer. Join it on the table's id and order by score.
+    """
+    table = column.property.columns[0].table
+    grams = trigrams(term)
+    dialect = db.get_bind().dialect.name
+    if grams and dialect == "postgresql":
+        # pg_trgm: `%` is served by the gin_trgm_ops index, similarity() ranks
+        return select(table.c.id.label("id"), func.similarity(column, term).label("score")) \
+            .where(column.op("%")(term)).subquery()
+    if grams and dialect == "sqlite":
+        fts = _sqlite_fts_for(db, table.name, column.key)
+        if fts:
+            # bm25 over an OR of the term's trigrams: rows sharing more (and rarer) trigrams rank higher
+            param = f"{fts}_{column.key}_similar"
+            query = f"{column.key} : (" + " OR ".join('"' + g.replace('"', '""') + '"' for g in grams) + ")"
+            return text(f"SELECT rowid AS id, -rank AS score FROM {fts} WHERE {fts} MATCH :{param}") \
+                .bindparams(**{param: query}) \
+                .columns(literal_column("id"), literal_column("score")) \
+                .subquery()
+    condition = or_(*(column.ilike(f"%{_escape_like(g)}%", escape="\\") for g in grams)) if grams else contains(db, column, term)
+    return select(table.c.id.label("id"), literal(0).label("score")).where(condition).subquery()
@@ -0,0 +1,198 @@
+# backend/app/core/tracing.py
+"""
+Request tracing with the OpenTelemetry API.
+
+TRACING_EXPORTER selects where finished spans go; nothing needs a collector:
+
+    none     (default) no provider is installed, every span is a no-op
+    console  one JSON span per line on stdout
+    file     one JSON span per line appended to TRACING_FILE (default traces.jsonl)
+
+Spans cover the HTTP request (TracingMiddleware, which also honours an incoming
+``traceparent`` header), service functions decorated with ``traced``, every SQL
+statement and Redis command issued while a span is recording, and LLM calls
+(core.metrics.llm_call). Background cache refills start their own trace linked to
+the span of the request that scheduled them (``current_link`` / ``background_span``).
+"""
+import functools
+import inspect
+import os
+from contextlib import contextmanager
+from typing import Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import Link, SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+MAX_STATEMENT_LENGTH = 500
+
+tracer = trace.get_tracer("aienglish.backend")
+_provider = None
+
+
+def setup_tracing():
+    """Install the SDK provider and exporter selected by TRACING_EXPORTER (once per process)."""
+    global _provider
+    if _provider is not None or TRACING_EXPORTER not in ("console", "file"):
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    out = open(TRACING_FILE, "a", encoding="utf-8") if TRACING_EXPORTER == "file" else None
+    exporter = ConsoleSpanExporter(
+        service_name="aienglish-backend",
+        formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        **({"out": out} if out else {}),
+    )
+    _provider = TracerProvider(resource=Resource.create({"service.name": "aienglish-backend"}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    print(f"[Tracing] Exporting spans to {TRACING_FILE if out else 'stdout'}")
+
+
+def shutdown_tracing():
+    """Flush buffered spans."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def _recording() -> bool:
+    return trace.get_current_span().is_recording()
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function inside a span (named module.function by default)."""
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_event(name: str, **attributes):
+    """Add an event (e.g. a retry or sleep) to the current span."""
+    trace.get_current_span().add_event(name, attributes)
+
+
+def current_link() -> Optional[Link]:
+    """Link to the current span, for work that continues outside this request."""
+    span_context = trace.get_current_span().get_span_context()
+    return Link(span_context) if span_context.is_valid else None
+
+
+@contextmanager
+def background_span(name: str, link: Optional[Link] = None, **attributes):
+    """Root span for background work, linked to the request span that scheduled it."""
+    token = otel_context.attach(otel_context.Context())  # do not inherit whatever the thread had
+    try:
+        with tracer.start_as_current_span(name, links=[link] if link else None, attributes=attributes) as span:
+            yield span
+    finally:
+        otel_context.detach(token)
+
+
+class TracingMiddleware:
+    """Server span per HTTP request, named after the matched route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or TRACING_EXPORTER not in ("console", "file") or _recording():
+            # Not tracing, or the server already opened a request span (newer Starlette/FastAPI do)
+            return await self.app(scope, receive, send)
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        parent = propagate.extract(carrier)
+        method = scope.get("method", "HTTP")
+        with tracer.start_as_current_span(f"{method} {scope.get('path', '')}", context=parent, kind=SpanKind.SERVER,
+                                          attributes={"http.method": method, "http.target": scope.get("path", "")}) as span:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{method} {route}")
+                    span.set_attribute("http.route", route)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    if not _recording():
+        return
+    span = tracer.start_span("db.query", kind=SpanKind.CLIENT, attributes={
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        "db.executemany": bool(executemany),
+    })
+    conn.info.setdefault("tracing_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("tracing_spans")
+    if spans:
+        span = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_sql_span(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("tracing_spans") if conn is not None else None
+    if spans:
+        span = spans.pop()
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+
+def _redis_span(args):
+    command = str(args[0]).upper()
+    return tracer.start_as_current_span(f"redis {command}", kind=SpanKind.CLIENT, attributes={
+        "db.system": "redis",
+        "db.operation": command,
+        "db.redis.key": str(args[1])[:200] if len(args) > 1 else "",
+    })
+
+
+def instrument_redis(client):
+    """Wrap a redis-py client's execute_command (sync or redis.asyncio) so each command gets a span while tracing."""
+    execute_command = client.execute_command
+
+    if inspect.iscoroutinefunction(execute_command):
+        @functools.wraps(execute_command)
+        async def traced_execute_command(*args, **options):
+            if not _recording() or not args:
+                return await execute_command(*args, **options)
+            with _redis_span(args):
+                return await execute_command(*args, **options)
+    else:
+        @functools.wraps(execute_command)
+        def traced_execute_command(*args, **options):
+            if not _recording() or not args:
+                return execute_command(*args, **options)
+            with _redis_span(args):
+                return execute_command(*args, **options)
+
+    client.execute_command = traced_execute_command
+    return client
@@ -0,0 +1,70 @@
+# backend/app/core/upsert.py
+"""
+Upserts (INSERT ... ON CONFLICT) for SQLite and PostgreSQL.
+
+`upsert_increment` inserts a row or, if the key already exists, adds the given
+deltas to its counters in the same statement (INSERT ... ON CONFLICT DO UPDATE),
+so concurrent writers never lose increments.
+
+`upsert_rows` bulk-inserts rows with batched multi-row statements and either leaves
+existing rows alone or overwrites selected columns, for batch imports.
+"""
+from typing import Dict, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+    """INSERT construct of the session's dialect, which exposes on_conflict_* on SQLite and PostgreSQL."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(table)
+
+
+def upsert_increment(db: Session, model, key_columns: Iterable[str], rows: Iterable[Dict], counters: Iterable[str], assign: Iterable[str] = ()):
+    """
+    Insert `rows` into `model`'s table, or add their `counters` to the existing row with the same key.
+    Columns listed in `assign` are overwritten with the new value on conflict.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    table = model.__table__
+    stmt = dialect_insert(db, table)
+    updates = {col: table.c[col] + stmt.excluded[col] for col in counters}
+    updates.update({col: stmt.excluded[col] for col in assign})
+    stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=updates)
+    db.execute(stmt, rows)
+
+
+def upsert_rows(db: Session, model, key_columns: Iterable[str], rows: Iterable[Dict], update: Iterable[str] = ()) -> int:
+    """
+    Insert `rows` into `model`'s table with batched multi-row statements. Rows whose key
+    already exists are skipped, or, if `update` names columns, get those columns set from
+    the new row where the new value is not NULL. All rows must have the same keys and no
+    key may repeat.
+    Returns the number of rows inserted or updated.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    table = model.__table__
+    stmt = dialect_insert(db, table)
+    update = list(update)
+    if update:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={col: func.coalesce(stmt.excluded[col], table.c[col]) for col in update},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+    # With RETURNING, SQLAlchemy sends the rows as batched multi-row INSERTs ("insertmanyvalues")
+    # from one cached compiled statement; skipped rows return nothing, so this also counts writes.
+    stmt = stmt.returning(*table.primary_key.columns)
+    return len(db.execute(stmt, rows).all())
@@ -1,16 +1,23 @@
 # backend/app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware # <--- Added import for CORSMiddleware
+import hmac
 import os
 from pathlib import Path
 
-from .db import engine, Base, get_db
-from .models import user_model, sentence_model, question_model, user_answer_model, user_vocab_model, user_mistake_model
+from .db import engine, Base, get_db, init_db, replica_engines, mark_primary_sticky, request_subject, DB_AUTO_MIGRATE
+from .models import user_model, sentence_model, question_model, user_answer_model, user_vocab_model, user_mistake_model, answer_ingest_model, user_stats_model, llm_call_model
 from .routers import auth_router, practice_router, vocab_router, mistakes_router, monitor_router
-from .services import practice_service
+from .services import practice_service, answer_ingest_service
+from .core.pool_metrics import PoolHolderMiddleware
+from .core.sql_profiler import SqlProfilerMiddleware
+from .core import metrics
+from .core import tracing
+from .core import redis_client
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+tracing.setup_tracing()
+
+# Schema changes are an explicit step (python -m app.cli migrate); see DB_AUTO_MIGRATE in db.py
 
 app = FastAPI(
     title="英语长句理解训练系统 API",
@@ -22,17 +29,27 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Initialize cache pool and start cache monitoring on application startup."""
+    if DB_AUTO_MIGRATE:
+        init_db()
     print("[Application] Starting cache initialization...")
-    practice_service._start_cache_monitor()
+    # 仅由持有 Redis 租约的进程运行缓存监听和清理（见 CACHE_BACKGROUND_MODE）
+    practice_service._start_background_cache_work()
     # practice_service._initialize_cache_pool() # Removed: Cache pool is now initialized per user on first request
-    print("[Application] Cache system initialized (monitor started, pool per-user)")
+    print(f"[Application] Cache system initialized (background mode: {practice_service.CACHE_BACKGROUND_MODE}, pool per-user)")
+    if answer_ingest_service.is_stream_mode():
+        answer_ingest_service._start_ingest_consumer()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up cache monitoring on application shutdown."""
     print("[Application] Shutting down cache monitor...")
-    practice_service._stop_cache_monitor()
+    practice_service._stop_background_cache_work()
     print("[Application] Cache monitor stopped")
+    if answer_ingest_service.is_stream_mode():
+        answer_ingest_service._stop_ingest_consumer()
+    redis_client.close_all()
+    metrics.mark_worker_dead()
+    tracing.shutdown_tracing()
 
 # CORS Configuration
 origins = [
@@ -49,14 +66,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "Server-Timing"],  # Keyset pagination cursor for list endpoints; per-request DB time
 )
 
+app.add_middleware(PoolHolderMiddleware)  # labels pool checkouts with the route for /monitor/db/pool-metrics
+app.add_middleware(SqlProfilerMiddleware)  # per-request query count/time -> Server-Timing, /monitor/sql/profile
+app.add_middleware(metrics.MetricsMiddleware)  # per-route request count/latency for /metrics
+app.add_middleware(tracing.TracingMiddleware)  # request spans when TRACING_EXPORTER is console/file
+
+if replica_engines:
+    @app.middleware("http")
+    async def keep_writers_on_primary(request: Request, call_next):
+        """After a successful write, route that user's reads to the primary for a few seconds."""
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            await mark_primary_sticky(request_subject(request))
+        return response
+
 app.include_router(auth_router)
 app.include_router(practice_router)
 app.include_router(vocab_router)
 app.include_router(mistakes_router)
 app.include_router(monitor_router)
 
+# Prometheus scrape endpoint. nginx denies /api/metrics; set METRICS_BEARER_TOKEN to also
+# require "Authorization: Bearer <token>" from the scraper.
+METRICS_BEARER_TOKEN = os.getenv("METRICS_BEARER_TOKEN")
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    if METRICS_BEARER_TOKEN and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_BEARER_TOKEN}"
+    ):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
 # Load all saved queues on startup
 @app.get("/", tags=["Root"])
 async def read_root():
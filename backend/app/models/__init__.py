@@ -8,6 +8,10 @@ from .question_model import Question, QuestionType
 from .user_answer_model import UserAnswer
 from .user_vocab_model import UserVocab, VocabStatus
 from .user_mistake_model import UserMistake
+from .user_question_mistake_model import UserQuestionMistake
+from .answer_ingest_model import AnswerIngestKey
+from .user_stats_model import UserPracticeStats, UserDailyActivity
+from .llm_call_model import LLMCallRecord
 
 __all__ = [
     "User", "UserPlan",
@@ -16,4 +20,8 @@ __all__ = [
     "UserAnswer",
     "UserVocab", "VocabStatus",
     "UserMistake",
+    "UserQuestionMistake",
+    "AnswerIngestKey",
+    "UserPracticeStats", "UserDailyActivity",
+    "LLMCallRecord",
 ]
\ No newline at end of file
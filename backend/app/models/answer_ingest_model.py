@@ -0,0 +1,15 @@
+# backend/app/models/answer_ingest_model.py
+from sqlalchemy import Column, String
+from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
+from ..db import Base
+
+class AnswerIngestKey(Base):
+    """已写入数据库的答题流条目，用于保证 Redis Stream 重投递时只写入一次"""
+    __tablename__ = "answer_ingest_keys"
+
+    stream_id = Column(String(64), primary_key=True, comment="Redis Stream 条目 ID（幂等键）")
+    ingested_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), index=True, comment="写入数据库的时间")
+
+    def __repr__(self):
+        return f"<AnswerIngestKey(stream_id='{self.stream_id}')>"
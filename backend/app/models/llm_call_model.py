@@ -0,0 +1,27 @@
+# backend/app/models/llm_call_model.py
+from sqlalchemy import Column, BigInteger, Integer, String, Index
+from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
+from ..db import Base
+
+class LLMCallRecord(Base):
+    """LLM 调用台账（只追加）：每次调用的调用点、模型、token 用量、耗时和结果"""
+    __tablename__ = "llm_calls"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    created_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), nullable=False, comment="调用结束时间")
+    call_site = Column(String(64), nullable=False, comment="调用点，例如 generate_question / word_explanation")
+    prompt_variant = Column(String(32), nullable=True, comment="提示词变体，例如 history（附带历史题目）")
+    model = Column(String(128), nullable=False)
+    outcome = Column(String(16), nullable=False, comment="success / error / parse_error")
+    latency_ms = Column(Integer, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    error = Column(String(255), nullable=True, comment="失败时的异常摘要")
+
+    __table_args__ = (
+        Index("ix_llm_calls_created_at", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<LLMCallRecord(id={self.id}, call_site='{self.call_site}', model='{self.model}', outcome='{self.outcome}')>"
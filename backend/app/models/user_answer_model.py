@@ -1,13 +1,19 @@
 # backend/app/models/user_answer_model.py
 import uuid
-from sqlalchemy import Column, Text, Boolean, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, Text, Boolean, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
 from ..db import Base
 
 class UserAnswer(Base):
     __tablename__ = "user_answers"
+    __table_args__ = (
+        # Keyset pagination over a user's history / mistakes: (answered_at, id) per user
+        Index("ix_user_answers_user_answered_at", "user_id", "answered_at", "id"),
+        Index("ix_user_answers_user_correct_answered_at", "user_id", "is_correct", "answered_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), nullable=True) # Removed ForeignKey, set nullable to True
@@ -15,7 +21,7 @@ class UserAnswer(Base):
     selected_word_answer = Column(Text, nullable=True, comment="用户选择的单词答案")
     selected_translation_answer = Column(Text, nullable=True, comment="用户选择的翻译答案")
     is_correct = Column(Boolean, nullable=False, comment="是否正确")
-    answered_at = Column(DateTime(timezone=True), server_default=func.now(), comment="答题时间戳")
+    answered_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), comment="答题时间戳")
 
     # Relationships (optional, if needed for direct navigation from UserAnswer)
     # user = relationship("User") # Comment out or remove if ForeignKey is removed and relationship is no longer desired
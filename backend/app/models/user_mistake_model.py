@@ -1,13 +1,17 @@
 # backend/app/models/user_mistake_model.py
 import uuid
-from sqlalchemy import Column, Text, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, Text, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
 from ..db import Base
 
 class UserMistake(Base):
     __tablename__ = "user_mistakes"
+    __table_args__ = (
+        Index("ix_user_mistakes_user_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
@@ -15,7 +19,7 @@ class UserMistake(Base):
     # question_id = Column(UUID(as_uuid=True), ForeignKey('questions.id'), nullable=False) # More specific: which question was wrong
     grammar_point = Column(Text, nullable=True, comment="出错语法点 (can be derived from sentence or question)")
     # user_answer_id = Column(UUID(as_uuid=True), ForeignKey('user_answers.id'), nullable=True, comment="Link to the specific wrong answer")
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="错误记录时间")
+    created_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), comment="错误记录时间")
 
     user = relationship("User") # Add back_populates in User model if needed
     sentence = relationship("Sentence", back_populates="user_mistakes")
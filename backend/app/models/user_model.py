@@ -1,8 +1,9 @@
 # backend/app/models/user_model.py
 import uuid
-from sqlalchemy import Column, String, DateTime, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, String, Enum as SQLAlchemyEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
 from ..db import Base
 import enum
 
@@ -16,7 +17,7 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now())
     plan = Column(SQLAlchemyEnum(UserPlan), default=UserPlan.FREE)
 
     def __repr__(self):
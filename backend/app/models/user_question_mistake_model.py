@@ -0,0 +1,36 @@
+# backend/app/models/user_question_mistake_model.py
+from sqlalchemy import Column, Text, Boolean, Float, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
+from ..db import Base
+
+class UserQuestionMistake(Base):
+    """每个用户每道错题一行的汇总（错题本与复习队列），在提交答案的同一事务中增量更新 (services.mistake_review_service)"""
+    __tablename__ = "user_question_mistakes"
+    __table_args__ = (
+        # Review session: a user's open mistakes, highest priority first (optionally within one cluster)
+        Index("ix_user_question_mistakes_queue", "user_id", "cleared", "priority"),
+        Index("ix_user_question_mistakes_cluster_queue", "user_id", "cluster", "cleared", "priority"),
+        # Mistakes list: keyset pagination over (last_wrong_at, last_answer_id) per user
+        Index("ix_user_question_mistakes_user_last_wrong", "user_id", "last_wrong_at", "last_answer_id"),
+    )
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    question_id = Column(Integer, ForeignKey('questions.id'), primary_key=True)
+    cluster = Column(Text, nullable=False, comment="归一化的知识点（无知识点时为主题），用于分组复习")
+    cluster_label = Column(Text, nullable=False, comment="分组的显示名称")
+    wrong_count = Column(Integer, nullable=False, default=0, comment="答错次数")
+    correct_streak = Column(Integer, nullable=False, default=0, comment="最近一次答错后连续答对次数")
+    first_wrong_at = Column(UTCDateTime(timezone=True), nullable=True, comment="首次答错时间")
+    last_wrong_at = Column(UTCDateTime(timezone=True), nullable=False, comment="最近答错时间")
+    last_answer_id = Column(Integer, nullable=True, comment="最近一次答错的 user_answers.id")
+    last_selected_word_answer = Column(Text, nullable=True, comment="最近一次答错时选择的单词答案")
+    last_selected_translation_answer = Column(Text, nullable=True, comment="最近一次答错时选择的翻译答案")
+    priority = Column(Float, nullable=False, comment="复习优先级: log2(1+答错次数) - 连续答对次数 + 最近答错时间/半衰期")
+    cleared = Column(Boolean, nullable=False, default=False, comment="已连续答对足够次数，移出复习队列")
+    dismissed_at = Column(UTCDateTime(timezone=True), nullable=True, comment="用户最近一次从错题本中移除的时间；此后答错才计数，再次答错时恢复显示")
+    updated_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserQuestionMistake(user_id='{self.user_id}', question_id={self.question_id}, wrong={self.wrong_count})>"
@@ -0,0 +1,36 @@
+# backend/app/models/user_stats_model.py
+from sqlalchemy import Column, Integer, Date, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
+from ..db import Base
+
+class UserPracticeStats(Base):
+    """每个用户的练习统计汇总，在提交答案的同一事务中增量更新"""
+    __tablename__ = "user_practice_stats"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    total_answers = Column(Integer, nullable=False, default=0, comment="总答题数")
+    correct_answers = Column(Integer, nullable=False, default=0, comment="正确答题数")
+    topic_counts = Column(JSON, nullable=False, default=dict, comment="按主题统计: {topic: {total, correct}}")
+    knowledge_point_counts = Column(JSON, nullable=False, default=dict, comment="按知识点统计: {knowledge_point: {total, correct}}")
+    last_answered_at = Column(UTCDateTime(timezone=True), nullable=True, comment="最近答题时间")
+    last_active_day = Column(Date, nullable=True, comment="最近有答题的日期 (UTC)")
+    current_streak = Column(Integer, nullable=False, default=0, comment="截至 last_active_day 的连续答题天数")
+    longest_streak = Column(Integer, nullable=False, default=0, comment="最长连续答题天数")
+    updated_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserPracticeStats(user_id='{self.user_id}', total={self.total_answers}, correct={self.correct_answers})>"
+
+class UserDailyActivity(Base):
+    """每个用户每天（UTC）的答题汇总，用于热力图与连续打卡统计"""
+    __tablename__ = "user_daily_activity"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, primary_key=True, comment="答题日期 (UTC)")
+    total_answers = Column(Integer, nullable=False, default=0, comment="当天答题数")
+    correct_answers = Column(Integer, nullable=False, default=0, comment="当天正确数")
+
+    def __repr__(self):
+        return f"<UserDailyActivity(user_id='{self.user_id}', day={self.day}, total={self.total_answers})>"
@@ -1,9 +1,10 @@
 # backend/app/models/user_vocab_model.py
 import uuid
-from sqlalchemy import Column, Text, DateTime, Enum as SQLAlchemyEnum, ForeignKey, Integer
+from sqlalchemy import Column, Text, Enum as SQLAlchemyEnum, ForeignKey, Integer, Float, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from ..core.db_types import UTCDateTime
 from ..db import Base
 import enum
 
@@ -14,6 +15,14 @@ class VocabStatus(str, enum.Enum):
 
 class UserVocab(Base):
     __tablename__ = "user_vocab"
+    __table_args__ = (
+        # Keyset pagination over a user's vocabulary: (added_at, id) per user
+        Index("ix_user_vocab_user_added_at", "user_id", "added_at", "id"),
+        # Review queue: a user's due words are a range scan ordered by due_at
+        Index("ix_user_vocab_user_due_at", "user_id", "due_at", "id"),
+        # One entry per word per user; bulk import upserts on it
+        Index("uq_user_vocab_user_word", "user_id", "word", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
@@ -22,8 +31,14 @@ class UserVocab(Base):
     definition = Column(Text, nullable=True, comment="释义（JSON格式存储）")
     sentence_id = Column(Integer, ForeignKey('sentences.id'), nullable=True, comment="来自哪个句子（可追踪）")
     status = Column(SQLAlchemyEnum(VocabStatus), default=VocabStatus.NEW, nullable=False)
-    added_at = Column(DateTime(timezone=True), server_default=func.now(), comment="添加时间")
-    # last_reviewed_at = Column(DateTime(timezone=True), nullable=True) # Optional for spaced repetition
+    added_at = Column(UTCDateTime(timezone=True), default=func.now(), server_default=func.now(), comment="添加时间")
+    # Spaced repetition (SM-2), see services.vocab_service.schedule_review
+    due_at = Column(UTCDateTime(timezone=True), default=func.now(), nullable=True, comment="下次复习时间")
+    interval_days = Column(Float, nullable=False, default=0, server_default="0", comment="当前复习间隔（天）")
+    ease = Column(Float, nullable=False, default=2.5, server_default="2.5", comment="难度系数 (SM-2 EF)")
+    repetitions = Column(Integer, nullable=False, default=0, server_default="0", comment="连续答对次数")
+    lapses = Column(Integer, nullable=False, default=0, server_default="0", comment="遗忘次数")
+    last_reviewed_at = Column(UTCDateTime(timezone=True), nullable=True, comment="上次复习时间")
 
     user = relationship("User") # Add back_populates in User model if needed
     sentence = relationship("Sentence", back_populates="user_vocabs")
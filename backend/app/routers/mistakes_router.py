@@ -1,11 +1,12 @@
 # backend/app/routers/mistakes_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import schemas, services, models
-from ..db import get_db
+from ..db import get_db, get_read_db
 from ..services import auth_service # For protecting routes
+from ..core import pagination
 
 router = APIRouter(
     prefix="/mistakes",
@@ -15,36 +16,50 @@ router = APIRouter(
 
 @router.get("/")
 async def get_user_mistakes(
+    response: Response,
     skip: int = 0, limit: int = 100,
-    grammar_point: str = None, # Optional filter by grammar point
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None, # 上一页响应头 X-Next-Cursor 中的游标
+    grammar_point: str = None, # Optional filter by grammar point (knowledge point or topic)
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
     """
-    获取用户的错题记录，基于user_answers和questions表的联合查询
+    获取用户的错题（每道题一条，含答错次数与首次/最近答错时间），来自错题汇总表
     """
-    mistakes = services.mistake_service.get_user_incorrect_answers(
-        db, 
-        user_id=current_user.id, 
-        skip=skip, 
-        limit=limit
-    )
-    
-    # 如果指定了语法点过滤，则进行过滤
-    if grammar_point:
-        mistakes = [
-            mistake for mistake in mistakes 
-            if grammar_point.lower() in (mistake.get('topic', '').lower() or 
-                                        any(gp.lower().find(grammar_point.lower()) != -1 
-                                           for gp in mistake.get('grammar_points', [])))
-        ]
-    
+    try:
+        mistakes = services.mistake_service.get_user_incorrect_answers(
+            db, 
+            user_id=current_user.id, 
+            skip=skip, 
+            limit=limit,
+            cursor=cursor,
+            grammar_point=grammar_point
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if len(mistakes) == limit:
+        last = mistakes[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last["answered_at"], last["id"])
+
     return mistakes
 
+@router.get("/review/session")
+async def get_review_session(
+    size: int = Query(20, ge=1, le=50),
+    cluster: Optional[str] = None, # 只复习某个知识点分组（分组键或显示名称）
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """
+    开始一轮错题复习：按优先级（答错次数与最近答错时间）取出待复习的错题，并按知识点分组
+    """
+    return services.mistake_review_service.get_review_session(db, user_id=current_user.id, size=size, cluster=cluster)
+
 @router.get("/{answer_id}")
 async def get_mistake_details(
     answer_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_service.get_current_active_user) # Ensure user owns the mistake
 ):
     """
@@ -69,7 +84,7 @@ async def delete_mistake(
     current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
     """
-    删除特定的错题记录（删除user_answer记录）
+    删除特定的错题：从错题本与复习队列中移除这道题（不删除答题记录，练习统计不变），再次答错时重新出现
     """
     # 首先检查记录是否存在且属于当前用户
     user_answer = db.query(models.UserAnswer).filter(
@@ -78,13 +93,10 @@ async def delete_mistake(
         models.UserAnswer.is_correct == False
     ).first()
     
-    if not user_answer:
+    if not user_answer or not services.mistake_review_service.dismiss(db, current_user.id, user_answer.question_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Mistake not found or not owned by user"
         )
-    
-    # 删除记录
-    db.delete(user_answer)
     db.commit()
     return
\ No newline at end of file
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.pool import QueuePool
 from sqlalchemy import text
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import os
 import time
 from datetime import datetime
 
-from ..db import engine, get_db
-from ..services import auth_service
+from ..db import engine, get_db, replica_engines, REPLICA_STICKY_SECONDS
+from ..core import pool_metrics, sql_profiler, cache_codec, redis_client
+from ..services import auth_service, llm_ledger_service, practice_service, vocab_service
 from .. import models
 
 router = APIRouter(
@@ -69,6 +71,128 @@ async def get_database_pool_status(
             "timestamp": datetime.utcnow().isoformat()
         }
 
+@router.get("/db/pool-metrics")
+async def get_database_pool_metrics(
+    reset: bool = False,
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """获取连接池等待时间、连接持有时长（按路由/后台任务）和超时次数的直方图
+
+    reset=true 时返回当前数据后清零（active_holders 不受影响）。
+    """
+    pools = []
+    for metrics in pool_metrics.all_metrics():
+        pools.append(metrics.snapshot())
+        if reset:
+            metrics.reset()
+    return {
+        "status": "success",
+        "data": {
+            "buckets_ms": list(pool_metrics.BUCKETS_MS),
+            "pools": pools,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    }
+
+@router.get("/sql/profile")
+async def get_sql_profile(
+    reset: bool = False,
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """按路由汇总每个请求的 SQL 语句数和耗时，并列出疑似 N+1 的重复语句"""
+    return {
+        "status": "success",
+        "data": {
+            "enabled": sql_profiler.SQL_PROFILING_ENABLED,
+            "repeat_warning_threshold": sql_profiler.SQL_REPEAT_WARNING_THRESHOLD,
+            "routes": sql_profiler.route_report(reset=reset),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    }
+
+@router.get("/llm/calls")
+async def get_llm_call_rollups(
+    hours: int = Query(24, ge=1, le=llm_ledger_service.MAX_ROLLUP_HOURS),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """按调用点、提示词变体和模型汇总 LLM 调用：次数、失败率、解析失败率、耗时分位数、token 和费用"""
+    return {
+        "status": "success",
+        "data": llm_ledger_service.get_rollups(db, hours=hours)
+    }
+
+@router.get("/llm/calls/recent")
+async def get_recent_llm_calls(
+    limit: int = Query(50, ge=1, le=500),
+    outcome: Optional[str] = Query(None, description="success / error / parse_error"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """最近的 LLM 调用明细"""
+    return {
+        "status": "success",
+        "data": llm_ledger_service.get_recent_calls(db, limit=limit, outcome=outcome)
+    }
+
+@router.get("/redis/status")
+async def get_redis_status(
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Redis 连通性（PING 耗时）与共享连接池的使用情况"""
+    ping_ms = redis_client.ping()
+    return {
+        "status": "success",
+        "data": {
+            "reachable": ping_ms is not None,
+            "ping_ms": ping_ms,
+            "url": redis_client.REDIS_URL.split("@")[-1],  # drop credentials
+            "max_connections": redis_client.REDIS_MAX_CONNECTIONS,
+            "socket_timeout_seconds": redis_client.REDIS_SOCKET_TIMEOUT,
+            "pools": redis_client.pool_status(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    }
+
+@router.get("/cache/leader")
+async def get_cache_leader(
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """当前负责缓存补充与清理的进程（Redis 租约持有者）"""
+    election = practice_service.CACHE_LEADER
+    if election is None:
+        data = {"mode": practice_service.CACHE_BACKGROUND_MODE, "is_leader": practice_service.CACHE_MONITOR_RUNNING}
+    else:
+        data = {"mode": practice_service.CACHE_BACKGROUND_MODE, **election.status()}
+    return {"status": "success", "data": data}
+
+@router.get("/cache/memory")
+async def get_cache_memory(
+    sample: int = Query(200, ge=1, le=5000, description="每类缓存抽样的键数"),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Redis 中练习题缓存和单词释义缓存的键数、存储大小与压缩率"""
+    combinations = {f"{topic}_{difficulty}" for topic, difficulty in practice_service.CACHE_COMBINATIONS}
+    report = cache_codec.memory_report(practice_service.r_values, {
+        "practice_question": lambda key: key.rsplit(':', 1)[-1] in combinations,
+        "word_explanation": lambda key: key.startswith(vocab_service.WORD_CACHE_PREFIX),
+    }, sample=sample)
+    report["pool_policy"] = {
+        "pooled_users": practice_service.r.zcard(practice_service.LAST_SEEN_KEY),
+        "max_pooled_users": practice_service.CACHE_MAX_POOLED_USERS,
+        "inactive_after_seconds": practice_service.CACHE_INACTIVE_SECONDS,
+        "combinations_per_user": min(practice_service.CACHE_USER_QUOTA, len(practice_service.CACHE_COMBINATIONS)),
+    }
+    try:
+        info = practice_service.r_values.info("memory")
+        report["redis_used_memory"] = info.get("used_memory")
+        report["redis_used_memory_human"] = info.get("used_memory_human")
+    except Exception as e:
+        report["redis_used_memory"] = None
+        print(f"[Monitor] Could not read Redis memory info: {e}")
+    report["timestamp"] = datetime.utcnow().isoformat()
+    return {"status": "success", "data": report}
+
 @router.get("/db/connection-test")
 async def test_database_connection(
     db: Session = Depends(get_db),
@@ -99,6 +223,60 @@ async def test_database_connection(
             "timestamp": datetime.utcnow().isoformat()
         }
 
+# 复制延迟超过该秒数时在健康检查中告警
+REPLICA_LAG_WARNING_SECONDS = float(os.getenv("REPLICA_LAG_WARNING_SECONDS", 30))
+
+def _replica_lag_seconds(conn) -> Optional[float]:
+    """Replay lag of a PostgreSQL standby; None where the database cannot report it."""
+    if conn.dialect.name != "postgresql":
+        return None
+    lag = conn.execute(text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )).scalar()
+    return float(lag) if lag is not None else None
+
+def _replica_status() -> list:
+    replicas = []
+    for index, replica in enumerate(replica_engines):
+        info = {
+            "index": index,
+            "database_url": replica.url.render_as_string(hide_password=True),
+        }
+        try:
+            start_time = time.time()
+            with replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                lag = _replica_lag_seconds(conn)
+            info.update({
+                "status": "healthy",
+                "response_time_ms": round((time.time() - start_time) * 1000, 2),
+                "replication_lag_seconds": round(lag, 3) if lag is not None else None,
+                "checked_out_connections": replica.pool.checkedout() if isinstance(replica.pool, QueuePool) else None,
+            })
+            if lag is not None and lag > REPLICA_LAG_WARNING_SECONDS:
+                info["status"] = "lagging"
+        except Exception as e:
+            info.update({"status": "error", "message": str(e)})
+        replicas.append(info)
+    return replicas
+
+@router.get("/db/replicas")
+async def get_replica_status(
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """获取只读副本的连通性和复制延迟"""
+    return {
+        "status": "success",
+        "data": {
+            "replica_count": len(replica_engines),
+            "sticky_seconds": REPLICA_STICKY_SECONDS,
+            "lag_warning_seconds": REPLICA_LAG_WARNING_SECONDS,
+            "replicas": _replica_status(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    }
+
 @router.get("/db/health")
 async def get_database_health(
     current_user: models.User = Depends(auth_service.get_current_active_user)
@@ -135,6 +313,17 @@ async def get_database_health(
         if connection_response["status"] == "error":
             overall_status = "critical"
             issues.append("Database connection test failed")
+
+        replicas = _replica_status()
+        for replica in replicas:
+            if replica["status"] == "healthy":
+                continue
+            if overall_status == "healthy":
+                overall_status = "warning"
+            if replica["status"] == "lagging":
+                issues.append(f"Replica {replica['index']} is {replica['replication_lag_seconds']}s behind the primary")
+            else:
+                issues.append(f"Replica {replica['index']} is unreachable")
         
         return {
             "status": "success",
@@ -143,6 +332,7 @@ async def get_database_health(
                 "issues": issues,
                 "pool_status": pool_response,
                 "connection_test": connection_response,
+                "replicas": replicas,
                 "timestamp": datetime.utcnow().isoformat()
             }
         }
@@ -10,14 +10,16 @@
 - 获取用户的练习统计信息
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from .. import schemas, services, models
-from ..db import get_db
-from ..services import auth_service # For protecting routes
+from ..db import get_db, get_read_db
+from ..services import auth_service, answer_ingest_service # For protecting routes
+from ..core import pagination, serialization
 
 router = APIRouter(
     prefix="/practice",
@@ -51,23 +53,25 @@ async def get_new_practice_set(
     current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
     """从 Redis 缓存或生成一个新的练习题目，历史记录从数据库中自动获取"""
-    question = services.get_new_questions(
-        db=db, 
-        user_id=current_user.id, 
-        topic=topic, 
-        difficulty=difficulty
-    )
+    # 命中缓存时全程走异步 Redis，不阻塞事件循环；未命中再到线程池里同步生成
+    question = await services.practice_service.get_cached_question_async(current_user.id, topic, difficulty)
+    if not question:
+        question = await run_in_threadpool(
+            services.get_new_questions,
+            db=db,
+            user_id=current_user.id,
+            topic=topic,
+            difficulty=difficulty
+        )
     if not question:
         # Log this event or handle it more gracefully
         print(f"[PracticeRouter] /set/new failed to get or generate a question for user {current_user.id}, topic: {topic}, difficulty: {difficulty}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Could not retrieve or generate a new question at this time.")
     
-    # Ensure the question object is correctly serialized by schemas.QuestionRead
-    # This might involve eager loading relationships if QuestionRead expects them
-    # For example, if options are related and needed:
-    # _ = question.options # Accessing options to trigger lazy load if not already loaded
-    
-    return question
+    # question 已是按 QuestionRead 校验并序列化好的 JSON，直接返回，跳过 response_model 的二次校验
+    # (response_model 仍保留，用于生成 OpenAPI 文档)
+    return serialization.RawJSONResponse(question)
+
 # Submit answers for a practice set
 @router.post("/set/submit", response_model=List[schemas.UserAnswerRead])
 async def submit_practice_set_answers(
@@ -82,7 +86,11 @@ async def submit_practice_set_answers(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No answers provided")
     
     # Pass current_user.id to the service layer
-    evaluated_answers = services.submit_answers(db, user_id=current_user.id, answers=answers)
+    if answer_ingest_service.is_stream_mode():
+        # Write-behind: graded here, persisted by the stream consumer (answers carry no id yet)
+        evaluated_answers = answer_ingest_service.enqueue_answers(db, user_id=current_user.id, answers=answers)
+    else:
+        evaluated_answers = services.submit_answers(db, user_id=current_user.id, answers=answers)
     print(f"[PracticeRouter] /set/submit processed answers, result: {evaluated_answers}") # DEBUG PRINT
     return evaluated_answers
 
@@ -90,7 +98,7 @@ async def submit_practice_set_answers(
 @router.get("/question/{question_id}", response_model=schemas.QuestionRead)
 async def get_question_by_id(
     question_id: str, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
     # current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
     """获取特定问题的详细信息"""
@@ -102,52 +110,46 @@ async def get_question_by_id(
 # Get user's practice history
 @router.get("/history", response_model=List[schemas.UserAnswerRead])
 async def get_practice_history(
+    response: Response,
     limit: int = 10,
     offset: int = 0,
-    db: Session = Depends(get_db)
-    # current_user: models.User = Depends(auth_service.get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
     """获取用户的练习历史记录"""
-    # 查询用户的答题记录，按时间倒序排列
-    user_answers = db.query(models.UserAnswer).filter(
-        models.UserAnswer.user_id == "temp_user_id_for_testing" # Placeholder
-    ).order_by(
-        models.UserAnswer.answered_at.desc()
-    ).offset(offset).limit(limit).all()
-    
+    # 查询用户的答题记录，按 (answered_at, id) 倒序排列；offset 仅为兼容保留，优先使用 cursor
+    query = db.query(models.UserAnswer).filter(
+        models.UserAnswer.user_id == current_user.id
+    )
+    try:
+        query = pagination.apply_keyset(query, models.UserAnswer.answered_at, models.UserAnswer.id, cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if not cursor and offset:
+        query = query.offset(offset)
+    user_answers = query.limit(limit).all()
+
+    if len(user_answers) == limit:
+        last = user_answers[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last.answered_at, last.id)
     return user_answers
 
 # Get user's practice statistics
 @router.get("/stats")
 async def get_practice_stats(
-    db: Session = Depends(get_db)
-    # current_user: models.User = Depends(auth_service.get_current_active_user)
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
-    """获取用户的练习统计信息"""
-    # 查询用户的总答题数
-    total_answers = db.query(models.UserAnswer).filter(
-        models.UserAnswer.user_id == "temp_user_id_for_testing" # Placeholder
-    ).count()
-    
-    # 查询用户的正确答题数
-    correct_answers = db.query(models.UserAnswer).filter(
-        models.UserAnswer.user_id == "temp_user_id_for_testing", # Placeholder
-        models.UserAnswer.is_correct == True
-    ).count()
-    
-    # 计算正确率
-    accuracy = 0 if total_answers == 0 else (correct_answers / total_answers) * 100
-    
-    # 查询用户最近一周的答题情况
-    one_week_ago = datetime.utcnow() - timedelta(days=7)
-    recent_answers = db.query(models.UserAnswer).filter(
-        models.UserAnswer.user_id == "temp_user_id_for_testing", # Placeholder
-        models.UserAnswer.answered_at >= one_week_ago
-    ).count()
-    
-    return {
-        "total_answers": total_answers,
-        "correct_answers": correct_answers,
-        "accuracy": round(accuracy, 2),  # 保留两位小数
-        "recent_answers": recent_answers
-    }
+    """获取用户的练习统计信息（读取提交答案时增量维护的统计汇总，不再扫描 user_answers）"""
+    return services.practice_stats_service.get_user_stats(db, current_user.id)
+
+# Get user's daily activity heatmap and streaks
+@router.get("/activity")
+async def get_practice_activity(
+    weeks: int = Query(12, ge=1, le=53, description="Number of weeks to include in the heatmap"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """获取用户每日答题热力图（答题数、正确率）以及当前/最长连续答题天数（按 UTC 日期统计）"""
+    return services.practice_stats_service.get_user_activity(db, current_user.id, weeks=weeks)
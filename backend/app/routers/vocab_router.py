@@ -1,11 +1,15 @@
 # backend/app/routers/vocab_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import schemas, services, models
-from ..db import get_db
+from ..db import get_db, get_read_db, request_subject
 from ..services import auth_service # For protecting routes
+from ..services import vocab_transfer_service
+from ..core import pagination
 
 router = APIRouter(
     prefix="/vocab",
@@ -20,18 +24,11 @@ async def add_word_to_vocab(
     current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
     try:
-        # Check if word already exists for this user
-        existing_entry = services.vocab_service.get_vocab_entry_by_word(
-            db, user_id=current_user.id, word=vocab_entry.word
-        )
-        if existing_entry:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Word already in vocabulary")
-        
-        # Add word to vocabulary
+        # Add word to vocabulary (ValueError if the user already has it)
         created_entry = services.vocab_service.add_vocab_entry(db, user_id=current_user.id, vocab_data=vocab_entry)
         return created_entry
-    except HTTPException:
-        raise
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Word already in vocabulary")
     except Exception as e:
         print(f"[VocabRouter] Error adding word to vocabulary: {e}")
         raise HTTPException(
@@ -41,13 +38,109 @@ async def add_word_to_vocab(
 
 @router.get("/", response_model=List[schemas.UserVocabRead])
 async def get_user_vocab(
+    response: Response,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None, # Opaque cursor from the previous page's X-Next-Cursor header
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth_service.get_current_active_user)
 ):
-    vocab_list = services.vocab_service.get_user_vocab_entries(db, user_id=current_user.id, skip=skip, limit=limit)
+    try:
+        vocab_list = services.vocab_service.get_user_vocab_entries(
+            db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if len(vocab_list) == limit:
+        last = vocab_list[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last.added_at, last.id)
     return vocab_list
-    raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Endpoint not yet implemented")
+
+@router.get("/search", response_model=List[schemas.VocabSearchHit])
+async def search_vocab(
+    q: str = Query(..., min_length=1, max_length=100),
+    skip: int = Query(0, ge=0, le=200), limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Prefix, substring and typo-tolerant search over the user's words and definitions, best matches first"""
+    hits = services.vocab_service.search_vocab_entries(db, user_id=current_user.id, q=q, skip=skip, limit=limit)
+    return [
+        schemas.VocabSearchHit(**schemas.UserVocabRead.model_validate(entry, from_attributes=True).model_dump(), match=match)
+        for entry, match in hits
+    ]
+
+@router.post("/import", response_model=schemas.VocabImportResult)
+async def import_vocab(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson|anki)$",
+                               description="Defaults from Content-Type: text/csv, application/x-ndjson, text/plain (Anki)"),
+    on_conflict: str = Query("skip", pattern="^(skip|update)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Bulk-add words from the raw request body (CSV, NDJSON or Anki plain-text notes)"""
+    fmt = fmt or vocab_transfer_service.format_from_content_type(request.headers.get("content-type"))
+    try:
+        return await vocab_transfer_service.import_vocab(
+            db, current_user.id, request.stream(), fmt, update=on_conflict == "update"
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8 text")
+    except Exception as e:
+        print(f"[VocabRouter] Error importing vocabulary: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import vocabulary"
+        )
+
+@router.get("/export")
+async def export_vocab(
+    request: Request,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson|anki)$"),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Stream the whole vocabulary book as CSV, NDJSON or Anki plain-text notes"""
+    return StreamingResponse(
+        vocab_transfer_service.export_vocab(current_user.id, fmt, subject=request_subject(request)),
+        media_type=vocab_transfer_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="vocabulary.{vocab_transfer_service.FILE_EXTENSIONS[fmt]}"'},
+    )
+
+@router.get("/review/due", response_model=List[schemas.UserVocabRead])
+async def get_due_vocab(
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Words due for review now, most overdue first"""
+    return services.vocab_service.get_due_vocab_entries(db, user_id=current_user.id, limit=limit)
+
+@router.post("/review/{vocab_id}", response_model=schemas.UserVocabRead)
+async def review_vocab_entry(
+    vocab_id: int,
+    review: schemas.VocabReviewRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth_service.get_current_active_user)
+):
+    """Grade a review (SM-2 quality 0-5) and schedule the word's next review"""
+    try:
+        reviewed_entry = services.vocab_service.review_vocab_entry(
+            db, vocab_id=vocab_id, user_id=current_user.id, grade=review.grade
+        )
+        if not reviewed_entry:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary entry not found or not owned by user"
+            )
+        return reviewed_entry
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[VocabRouter] Error recording vocabulary review: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to record vocabulary review"
+        )
 
 @router.put("/{vocab_id}", response_model=schemas.UserVocabRead)
 async def update_vocab_entry_status(
@@ -108,8 +201,12 @@ async def get_word_explanation(
 ):
     """Get explanation for a specific word with optional sentence context"""
     try:
-        # Call the vocabulary service to get word explanation
-        explanation = services.vocab_service.get_word_explanation(db, request.word, request.sentence)
+        # Cache hits are served on the event loop; the LLM call runs in the threadpool
+        explanation = await services.vocab_service.get_cached_explanation_async(request.word, request.sentence)
+        if not explanation:
+            explanation = await run_in_threadpool(
+                services.vocab_service.get_word_explanation, db, request.word, request.sentence
+            )
         if not explanation:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No explanation found for word: {request.word}")
         return explanation
@@ -24,7 +24,7 @@ class UserAnswerCreate(BaseModel):
 
 # Schema for reading user answer data
 class UserAnswerRead(UserAnswerBase):
-    id: int = Field(..., example=1)
+    id: Optional[int] = Field(..., example=1, description="None while the answer is queued for write-behind ingestion")
     answered_at: datetime = Field(..., example=datetime.utcnow())
 
     class Config:
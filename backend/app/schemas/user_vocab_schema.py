@@ -35,12 +35,38 @@ class UserVocabRead(UserVocabBase):
     user_id: UUID = Field(..., example="123e4567-e89b-12d3-a456-426614174000")
     status: VocabStatus = Field(..., example=VocabStatus.NEW)
     added_at: datetime = Field(..., example=datetime.utcnow())
-    # last_reviewed_at: Optional[datetime] = None
+    due_at: Optional[datetime] = Field(None, description="下次复习时间")
+    interval_days: float = Field(0, example=6, description="当前复习间隔（天）")
+    ease: float = Field(2.5, example=2.5, description="难度系数 (SM-2 EF)")
+    repetitions: int = Field(0, example=2, description="连续答对次数")
+    last_reviewed_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True # Pydantic V1
         # from_attributes = True # Pydantic V2
 
+# Schema for a vocab search result
+class VocabSearchHit(UserVocabRead):
+    match: str = Field(..., example="prefix", description="匹配方式: exact / prefix / substring / fuzzy / definition")
+
+# Schema for grading a review of a vocab entry
+class VocabReviewRequest(BaseModel):
+    grade: int = Field(..., ge=0, le=5, example=4, description="SM-2 回忆质量: 0-2 忘记, 3 困难, 4 良好, 5 轻松")
+
+# Schemas for bulk import results
+class VocabImportError(BaseModel):
+    line: int = Field(..., example=12, description="出错的行号（从 1 开始）")
+    error: str = Field(..., example="missing word")
+
+class VocabImportResult(BaseModel):
+    format: str = Field(..., example="csv")
+    rows: int = Field(..., description="文件中的有效单词行数")
+    imported: int = Field(..., description="新增（或 on_conflict=update 时更新）的单词数")
+    skipped: int = Field(..., description="已存在或文件内重复而跳过的单词数")
+    invalid: int = Field(..., description="无法解析的行数")
+    truncated: bool = Field(False, description="超过单次导入上限，其余行未读取")
+    errors: List[VocabImportError] = Field(default_factory=list, description="前若干个错误")
+
 # Schema for word definitions
 class WordDefinition(BaseModel):
     part_of_speech: str = Field(..., example="v.", description="词性")
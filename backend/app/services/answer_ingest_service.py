@@ -0,0 +1,298 @@
+# backend/app/services/answer_ingest_service.py
+"""
+Write-behind ingestion of practice answers through a Redis Stream.
+
+With ANSWER_INGEST_MODE=stream, /practice/set/submit grades the answers in-process,
+appends the graded set to a Redis Stream as a single entry and returns without
+touching user_answers. A consumer thread in each worker reads the stream through a
+consumer group and flushes batches into the database.
+
+Exactly-once: the stream entry ID is the idempotency key. Each flush inserts the
+entry IDs into answer_ingest_keys in the same transaction as the answers, and only
+acknowledges the entries after the commit. An entry that is redelivered (consumer
+crashed after commit, before XACK) is found in answer_ingest_keys and skipped.
+Entries left pending by a dead consumer are taken over with XAUTOCLAIM.
+
+Poison entries: when a batch fails with a non-transient error it is retried one
+entry at a time, so the good entries are written and acked. An entry that still
+fails (undecodable payload, FK / integrity error such as an answer to a question
+deleted after queuing) is retried up to INGEST_MAX_ATTEMPTS times, then copied to
+the dead-letter stream (INGEST_DEAD_LETTER_KEY) with its error and acked, so it no
+longer blocks the pending list. Undecodable payloads are dead-lettered at once.
+Attempts are counted in a hash because re-reading our own pending list does not
+raise the XPENDING delivery count. Connection errors never count as attempts.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import redis
+from sqlalchemy import exc, insert
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..core import metrics, pool_metrics
+from . import practice_service
+
+ANSWER_INGEST_MODE = os.getenv("ANSWER_INGEST_MODE", "sync").lower()  # "sync" | "stream"
+INGEST_STREAM_KEY = os.getenv("ANSWER_INGEST_STREAM", "answers:ingest")
+INGEST_GROUP = "answer-writers"
+INGEST_CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+INGEST_BATCH_SIZE = int(os.getenv("ANSWER_INGEST_BATCH_SIZE", 200))
+INGEST_BLOCK_MS = 2000
+INGEST_CLAIM_IDLE_MS = 60 * 1000  # take over entries another consumer has held this long without acking
+INGEST_CLAIM_INTERVAL_SECONDS = 30
+INGEST_KEY_RETENTION = timedelta(days=1)  # keys only matter between commit and XACK
+INGEST_MAX_ATTEMPTS = int(os.getenv("ANSWER_INGEST_MAX_ATTEMPTS", 5))
+INGEST_DEAD_LETTER_KEY = os.getenv("ANSWER_INGEST_DEAD_LETTER_STREAM", f"{INGEST_STREAM_KEY}:dead")
+INGEST_DEAD_LETTER_MAXLEN = 10000
+INGEST_ATTEMPTS_KEY = f"{INGEST_STREAM_KEY}:attempts"  # hash: stream entry id -> failed attempts
+
+INGEST_CONSUMER_RUNNING = False
+INGEST_CONSUMER_THREAD = None
+
+def is_stream_mode() -> bool:
+    return ANSWER_INGEST_MODE == "stream"
+
+def _encode_row(row: dict) -> dict:
+    return {
+        **row,
+        "user_id": str(row["user_id"]),
+        "answered_at": row["answered_at"].isoformat(),
+    }
+
+def _decode_row(data: dict) -> dict:
+    return {
+        **data,
+        "user_id": uuid.UUID(data["user_id"]),
+        "answered_at": datetime.fromisoformat(data["answered_at"]),
+    }
+
+def enqueue_answers(db: Session, user_id, answers: List[schemas.UserAnswerCreate]) -> List[dict]:
+    """Grades the answers and appends them to the ingest stream.
+
+    Returned rows carry no id yet; they are written to user_answers by the consumer.
+    Falls back to the synchronous write path if Redis is unavailable.
+    """
+    rows = practice_service.grade_answers(db, user_id, answers)
+    if not rows:
+        return []
+    payload = json.dumps([_encode_row(row) for row in rows], ensure_ascii=False)
+    try:
+        entry_id = practice_service.r.xadd(INGEST_STREAM_KEY, {"payload": payload})
+    except redis.RedisError as e:
+        print(f"[AnswerIngest] XADD failed, writing answers synchronously: {e}")
+        return practice_service.submit_answers(db, user_id, answers)
+    print(f"[AnswerIngest] Queued {len(rows)} answers for user {user_id} as stream entry {entry_id}")
+    return [dict(row, id=None) for row in rows]
+
+def _ensure_group():
+    try:
+        practice_service.r.xgroup_create(INGEST_STREAM_KEY, INGEST_GROUP, id="0", mkstream=True)
+        print(f"[AnswerIngest] Created consumer group {INGEST_GROUP} on {INGEST_STREAM_KEY}")
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def _ack(entry_ids: List[str]):
+    if entry_ids:
+        pipe = practice_service.r.pipeline()
+        pipe.xack(INGEST_STREAM_KEY, INGEST_GROUP, *entry_ids)
+        pipe.xdel(INGEST_STREAM_KEY, *entry_ids)
+        pipe.hdel(INGEST_ATTEMPTS_KEY, *entry_ids)
+        pipe.execute()
+
+def _decode_payload(fields: dict) -> List[dict]:
+    return [_decode_row(data) for data in json.loads(fields["payload"])]
+
+def _is_transient(error: Exception) -> bool:
+    """Errors that say nothing about the entry itself (database or Redis unavailable); never dead-lettered."""
+    if isinstance(error, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, redis.RedisError)):
+        return True
+    return bool(getattr(error, "connection_invalidated", False))
+
+def _dead_letter(entry_id: str, fields: dict, reason: str, error: Exception):
+    """Moves an entry that cannot be written to the dead-letter stream and acks it."""
+    practice_service.r.xadd(INGEST_DEAD_LETTER_KEY, {
+        "stream_id": entry_id,
+        "reason": reason,
+        "error": str(error)[:1000],
+        "payload": fields.get("payload", ""),
+    }, maxlen=INGEST_DEAD_LETTER_MAXLEN, approximate=True)
+    _ack([entry_id])
+    metrics.ANSWER_INGEST_DEAD_LETTERED.labels(reason=reason).inc()
+    print(f"[AnswerIngest] Dead-lettered stream entry {entry_id} to {INGEST_DEAD_LETTER_KEY} ({reason}): {error}")
+
+def _write_batch(batch: List[Tuple[str, dict, List[dict]]]) -> Optional[Exception]:
+    """Writes decoded entries in one transaction; returns the error instead of raising."""
+    from ..db import SessionLocal
+
+    entry_ids = [entry_id for entry_id, _, _ in batch]
+    db = SessionLocal()
+    try:
+        already_ingested = {
+            stream_id for (stream_id,) in db.query(models.AnswerIngestKey.stream_id)
+            .filter(models.AnswerIngestKey.stream_id.in_(entry_ids))
+        }
+        keys = []
+        rows = []
+        for entry_id, _, entry_rows in batch:
+            if entry_id in already_ingested:
+                continue
+            keys.append({"stream_id": entry_id})
+            rows.extend(entry_rows)
+
+        if keys:
+            db.execute(insert(models.AnswerIngestKey.__table__), keys)
+            if rows:
+                practice_service.store_graded_answers(db, rows)
+            db.commit()
+            print(f"[AnswerIngest] Flushed {len(rows)} answers from {len(keys)} stream entries")
+        return None
+    except Exception as e:
+        # An IntegrityError on answer_ingest_keys means another consumer committed the same
+        # entries first; the retry finds them in answer_ingest_keys and only acks.
+        db.rollback()
+        return e
+    finally:
+        db.close()
+
+def flush_entries(entries: List[Tuple[str, Optional[dict]]]) -> bool:
+    """Writes a batch of stream entries to the database exactly once, then acks them.
+
+    Returns False if some entries could not be committed; they stay pending and are retried.
+    """
+    done = []
+    batch = []
+    for entry_id, fields in entries:
+        # Entries deleted from the stream are still listed in the PEL, with no fields
+        if not fields:
+            done.append(entry_id)
+            continue
+        try:
+            batch.append((entry_id, fields, _decode_payload(fields)))
+        except Exception as e:
+            _dead_letter(entry_id, fields, "decode", e)
+
+    error = _write_batch(batch) if batch else None
+    if error is None:
+        _ack(done + [entry_id for entry_id, _, _ in batch])
+        return True
+    print(f"[AnswerIngest] Flush of {len(batch)} stream entries failed: {error}")
+    if _is_transient(error):
+        _ack(done)
+        return False
+
+    # Isolate the failing entries so they do not hold back the rest of the batch
+    pending = False
+    for entry in batch:
+        entry_id, fields, _ = entry
+        entry_error = error if len(batch) == 1 else _write_batch([entry])
+        if entry_error is None:
+            done.append(entry_id)
+        elif _is_transient(entry_error):
+            pending = True
+        elif practice_service.r.hincrby(INGEST_ATTEMPTS_KEY, entry_id, 1) >= INGEST_MAX_ATTEMPTS:
+            _dead_letter(entry_id, fields, "write", entry_error)
+        else:
+            print(f"[AnswerIngest] Stream entry {entry_id} failed, will retry: {entry_error}")
+            pending = True
+    _ack(done)
+    return not pending
+
+def _prune_ingest_keys():
+    from ..db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - INGEST_KEY_RETENTION
+        deleted = db.query(models.AnswerIngestKey).filter(models.AnswerIngestKey.ingested_at < cutoff).delete()
+        db.commit()
+        if deleted:
+            print(f"[AnswerIngest] Pruned {deleted} old idempotency keys")
+    except Exception as e:
+        db.rollback()
+        print(f"[AnswerIngest] Error pruning idempotency keys: {e}")
+    finally:
+        db.close()
+
+def _consume():
+    with pool_metrics.holder("answer_ingest"):
+        _consume_loop()
+
+def _consume_loop():
+    r = practice_service.r
+    # Start with our own pending entries: deliveries that were never acked (crash, failed flush)
+    read_pending = True
+    last_claim = 0.0
+    last_prune = 0.0
+
+    while INGEST_CONSUMER_RUNNING:
+        try:
+            if read_pending:
+                response = r.xreadgroup(INGEST_GROUP, INGEST_CONSUMER_NAME, {INGEST_STREAM_KEY: "0"}, count=INGEST_BATCH_SIZE)
+            else:
+                response = r.xreadgroup(INGEST_GROUP, INGEST_CONSUMER_NAME, {INGEST_STREAM_KEY: ">"},
+                                        count=INGEST_BATCH_SIZE, block=INGEST_BLOCK_MS)
+            entries = response[0][1] if response else []
+
+            if entries:
+                if not flush_entries(entries):
+                    read_pending = True
+                    time.sleep(1)
+            elif read_pending:
+                read_pending = False
+
+            now = time.monotonic()
+            if now - last_claim > INGEST_CLAIM_INTERVAL_SECONDS:
+                last_claim = now
+                _, claimed, *_ = r.xautoclaim(INGEST_STREAM_KEY, INGEST_GROUP, INGEST_CONSUMER_NAME,
+                                              min_idle_time=INGEST_CLAIM_IDLE_MS, count=INGEST_BATCH_SIZE)
+                if claimed:
+                    print(f"[AnswerIngest] Claimed {len(claimed)} stale stream entries")
+                    read_pending = True
+            if now - last_prune > 3600:
+                last_prune = now
+                _prune_ingest_keys()
+        except redis.RedisError as e:
+            print(f"[AnswerIngest] Redis error in consumer, retrying: {e}")
+            read_pending = True
+            time.sleep(2)
+        except Exception as e:
+            print(f"[AnswerIngest] Consumer error: {e}")
+            import traceback
+            traceback.print_exc()
+            read_pending = True
+            time.sleep(2)
+
+def _start_ingest_consumer():
+    """Start the stream consumer thread for this worker process."""
+    global INGEST_CONSUMER_RUNNING, INGEST_CONSUMER_THREAD
+
+    if INGEST_CONSUMER_RUNNING:
+        print("[AnswerIngest] Consumer already running")
+        return
+    try:
+        _ensure_group()
+    except redis.RedisError as e:
+        print(f"[AnswerIngest] Failed to create consumer group, consumer not started: {e}")
+        return
+
+    INGEST_CONSUMER_RUNNING = True
+    INGEST_CONSUMER_THREAD = threading.Thread(target=_consume, daemon=True)
+    INGEST_CONSUMER_THREAD.start()
+    print(f"[AnswerIngest] Consumer {INGEST_CONSUMER_NAME} started on {INGEST_STREAM_KEY}")
+
+def _stop_ingest_consumer():
+    """Stop the stream consumer; unacked entries are picked up again on restart or by another worker."""
+    global INGEST_CONSUMER_RUNNING
+
+    INGEST_CONSUMER_RUNNING = False
+    if INGEST_CONSUMER_THREAD:
+        INGEST_CONSUMER_THREAD.join(timeout=INGEST_BLOCK_MS / 1000 + 1)
+    print("[AnswerIngest] Consumer stopped")
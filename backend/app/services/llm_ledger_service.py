@@ -0,0 +1,240 @@
+# backend/app/services/llm_ledger_service.py
+"""
+LLM call ledger.
+
+Every call wrapped in core.metrics.llm_call is appended to llm_calls: call site,
+prompt variant, model, outcome (success / error / parse_error), latency and token
+usage. Rows are never updated; `prune_llm_calls` drops old ones. Cost is not
+stored but derived at read time from LLM_PRICES_PER_1K, so price changes apply to
+history too.
+
+`record` runs in the LLM call path, where the calling thread may already hold pooled
+connections; taking another one there can deadlock a busy pool. It only puts the row
+on an in-process queue. One writer thread per process drains the queue and inserts
+rows in batches of up to LLM_LEDGER_BATCH_SIZE, holding a single connection per batch.
+When the queue is full (LLM_LEDGER_QUEUE_SIZE) rows are dropped rather than blocking
+the caller. Pending rows are written at interpreter exit.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func, insert, or_
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core import pool_metrics
+
+# USD per 1K tokens as (prompt, completion); override/extend with LLM_PRICES_PER_1K='{"model": [0.1, 0.2]}'
+DEFAULT_PRICES_PER_1K: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "openai/gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+}
+LLM_PRICES_PER_1K = {**DEFAULT_PRICES_PER_1K, **{
+    model: tuple(prices) for model, prices in json.loads(os.getenv("LLM_PRICES_PER_1K", "{}")).items()
+}}
+MAX_ROLLUP_HOURS = 24 * 30
+LLM_LEDGER_QUEUE_SIZE = int(os.getenv("LLM_LEDGER_QUEUE_SIZE", 10000))
+LLM_LEDGER_BATCH_SIZE = int(os.getenv("LLM_LEDGER_BATCH_SIZE", 500))
+
+_pending: "queue.Queue[dict]" = queue.Queue(maxsize=LLM_LEDGER_QUEUE_SIZE)
+_writer_lock = threading.Lock()
+_writer_thread: Optional[threading.Thread] = None
+
+def record(call, latency_ms: float, error: Optional[BaseException] = None):
+    """Queue one call for the ledger; never touches the database in the caller's thread."""
+    row = {
+        "created_at": datetime.now(timezone.utc),
+        "call_site": call.call_site,
+        "prompt_variant": call.prompt_variant,
+        "model": call.model,
+        "outcome": call.outcome,
+        "latency_ms": int(round(latency_ms)),
+        "prompt_tokens": call.prompt_tokens,
+        "completion_tokens": call.completion_tokens,
+        "error": f"{type(error).__name__}: {error}"[:255] if error else None,
+    }
+    try:
+        _pending.put_nowait(row)
+    except queue.Full:
+        print(f"[LLMLedger] Queue full, dropped {call.call_site} call")
+        return
+    _ensure_writer()
+
+def _ensure_writer():
+    global _writer_thread
+
+    if _writer_thread is not None and _writer_thread.is_alive():
+        return
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_writer_loop, name="llm-ledger-writer", daemon=True)
+            _writer_thread.start()
+            atexit.register(flush)
+
+def _writer_loop():
+    with pool_metrics.holder("llm_ledger"):
+        while True:
+            batch = [_pending.get()]
+            while len(batch) < LLM_LEDGER_BATCH_SIZE:
+                try:
+                    batch.append(_pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                _write_batch(batch)
+            finally:
+                for _ in batch:
+                    _pending.task_done()
+
+def _write_batch(rows: list):
+    from ..db import engine
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(models.LLMCallRecord.__table__), rows)
+    except Exception as e:
+        print(f"[LLMLedger] Failed to record {len(rows)} calls: {e}")
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until queued rows are written (at most `timeout` seconds). Returns True if the queue drained."""
+    deadline = time.monotonic() + timeout
+    while _pending.unfinished_tasks:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def _cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    prices = LLM_PRICES_PER_1K.get(model)
+    if not prices:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000
+
+def _percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+_PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+def _latency_percentiles(db: Session, since: datetime) -> Dict[tuple, dict]:
+    """p50 / p95 / p99 latency per (call_site, prompt_variant, model)."""
+    table = models.LLMCallRecord
+    group_columns = (table.call_site, table.prompt_variant, table.model)
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.query(*group_columns, *(
+            func.percentile_disc(q).within_group(table.latency_ms) for _, q in _PERCENTILES
+        )).filter(table.created_at >= since).group_by(*group_columns).all()
+        return {tuple(row[:3]): dict(zip((name for name, _ in _PERCENTILES), row[3:])) for row in rows}
+
+    # Elsewhere: only the latency column, already sorted by the database
+    latencies = defaultdict(list)
+    for call_site, variant, model, latency_ms in db.query(*group_columns, table.latency_ms).filter(
+        table.created_at >= since
+    ).order_by(*group_columns, table.latency_ms):
+        latencies[(call_site, variant, model)].append(latency_ms)
+    return {key: {name: _percentile(values, q) for name, q in _PERCENTILES} for key, values in latencies.items()}
+
+def get_rollups(db: Session, hours: int = 24) -> dict:
+    """Per (call_site, prompt_variant, model) counts, outcomes, latency percentiles, tokens and cost."""
+    hours = max(1, min(hours, MAX_ROLLUP_HOURS))
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    table = models.LLMCallRecord
+    has_usage = or_(table.prompt_tokens.isnot(None), table.completion_tokens.isnot(None))
+    rows = db.query(
+        table.call_site, table.prompt_variant, table.model, table.outcome,
+        func.count(table.id),
+        func.sum(table.latency_ms),
+        func.max(table.latency_ms),
+        func.coalesce(func.sum(table.prompt_tokens), 0),
+        func.coalesce(func.sum(table.completion_tokens), 0),
+        func.sum(case((has_usage, 1), else_=0)),
+    ).filter(table.created_at >= since).group_by(
+        table.call_site, table.prompt_variant, table.model, table.outcome
+    ).all()
+
+    groups = defaultdict(lambda: {"outcomes": defaultdict(int), "calls": 0, "latency_sum": 0, "latency_max": 0,
+                                  "prompt_tokens": 0, "completion_tokens": 0, "calls_with_usage": 0})
+    for call_site, variant, model, outcome, calls, latency_sum, latency_max, prompt_tokens, completion_tokens, with_usage in rows:
+        group = groups[(call_site, variant, model)]
+        group["outcomes"][outcome] += calls
+        group["calls"] += calls
+        group["latency_sum"] += latency_sum or 0
+        group["latency_max"] = max(group["latency_max"], latency_max or 0)
+        group["prompt_tokens"] += int(prompt_tokens)
+        group["completion_tokens"] += int(completion_tokens)
+        group["calls_with_usage"] += int(with_usage or 0)
+    percentiles = _latency_percentiles(db, since) if groups else {}
+
+    result = []
+    for (call_site, variant, model), group in groups.items():
+        calls = group["calls"]
+        group_percentiles = percentiles.get((call_site, variant, model), {})
+        with_usage = group["calls_with_usage"]
+        cost = _cost(model, group["prompt_tokens"], group["completion_tokens"])
+        result.append({
+            "call_site": call_site,
+            "prompt_variant": variant,
+            "model": model,
+            "calls": calls,
+            "outcomes": dict(group["outcomes"]),
+            "error_rate": round((calls - group["outcomes"].get("success", 0)) / calls * 100, 2),
+            "parse_failure_rate": round(group["outcomes"].get("parse_error", 0) / calls * 100, 2),
+            "latency_ms": {
+                "avg": round(group["latency_sum"] / calls, 1),
+                "p50": group_percentiles.get("p50"),
+                "p95": group_percentiles.get("p95"),
+                "p99": group_percentiles.get("p99"),
+                "max": group["latency_max"],
+            },
+            "prompt_tokens": group["prompt_tokens"],
+            "completion_tokens": group["completion_tokens"],
+            "avg_prompt_tokens": round(group["prompt_tokens"] / with_usage, 1) if with_usage else None,
+            "avg_completion_tokens": round(group["completion_tokens"] / with_usage, 1) if with_usage else None,
+            "cost_usd": round(cost, 6) if cost is not None else None,
+        })
+    result.sort(key=lambda item: item["calls"], reverse=True)
+    return {
+        "since": since.isoformat(),
+        "hours": hours,
+        "total_calls": sum(item["calls"] for item in result),
+        "total_cost_usd": round(sum(item["cost_usd"] or 0 for item in result), 6),
+        "groups": result,
+    }
+
+def get_recent_calls(db: Session, limit: int = 50, outcome: Optional[str] = None) -> list:
+    query = db.query(models.LLMCallRecord)
+    if outcome:
+        query = query.filter(models.LLMCallRecord.outcome == outcome)
+    calls = query.order_by(models.LLMCallRecord.id.desc()).limit(limit).all()
+    return [
+        {
+            "id": call.id,
+            "created_at": call.created_at.isoformat() if call.created_at else None,
+            "call_site": call.call_site,
+            "prompt_variant": call.prompt_variant,
+            "model": call.model,
+            "outcome": call.outcome,
+            "latency_ms": call.latency_ms,
+            "prompt_tokens": call.prompt_tokens,
+            "completion_tokens": call.completion_tokens,
+            "error": call.error,
+        }
+        for call in calls
+    ]
+
+def prune_llm_calls(db: Session, days: int = 30) -> int:
+    """Delete ledger rows older than `days` days. Returns the number of rows removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    deleted = db.query(models.LLMCallRecord).filter(models.LLMCallRecord.created_at < cutoff).delete()
+    db.commit()
+    return deleted
@@ -0,0 +1,303 @@
+# backend/app/services/mistake_review_service.py
+"""
+Mistake aggregate and review queue.
+
+user_question_mistakes holds one row per (user, question) the user has answered wrong,
+grouped into clusters by normalized knowledge point (the sentence topic when the
+question has none), with the wrong count, first / last wrong time and the answers
+given the last time. Rows are updated in the same transaction that writes the answers
+(see practice_service.store_graded_answers), so the mistakes list (mistake_service)
+and review sessions read one row per question instead of joining all wrong answers.
+
+    priority = log2(1 + wrong_count) - correct_streak + last_wrong_at / half-life
+
+Every repeated failure, and every half-life of recency, is worth the same. Because
+recency enters as an absolute timestamp rather than an age, the order never has to be
+recomputed as time passes. Correct answers after the last failure lower the priority;
+MISTAKE_CLEAR_STREAK of them in a row clear the mistake from the queue until it is
+missed again. `dismiss` hides a mistake from the list and the queue without touching
+user_answers: answers given before dismissed_at no longer count, and the next wrong
+answer brings it back with fresh counts. `rebuild_review_queue` recomputes the rows
+from user_answers, keeping dismissals.
+"""
+import math
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .. import models
+
+MISTAKE_REVIEW_HALF_LIFE_HOURS = float(os.getenv("MISTAKE_REVIEW_HALF_LIFE_HOURS", 72))
+MISTAKE_CLEAR_STREAK = int(os.getenv("MISTAKE_CLEAR_STREAK", 2))
+MAX_SESSION_SIZE = 50
+
+_PARENTHETICAL = re.compile(r"\s*[(（].*?[)）]\s*")
+_PUNCTUATION = re.compile(r"[\s\-_/·:：,，.。]+")
+
+def cluster_for(knowledge_point: Optional[str], topic: Optional[str]) -> Tuple[str, str]:
+    """(cluster key, display label): "虚拟语气 (Subjunctive Mood)" and "虚拟语气" share the key "虚拟语气"."""
+    label = (knowledge_point or "").strip() or (topic or "").strip() or "general"
+    key = _PARENTHETICAL.sub(" ", label).strip() or label
+    key = _PUNCTUATION.sub(" ", key.casefold()).strip()
+    return key or "general", label
+
+def _epoch(value: datetime) -> float:
+    # naive timestamps are UTC
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+def _priority(wrong_count: int, correct_streak: int, last_wrong_at: datetime) -> float:
+    return math.log2(1 + wrong_count) - correct_streak + _epoch(last_wrong_at) / (MISTAKE_REVIEW_HALF_LIFE_HOURS * 3600)
+
+def _apply_answer(entry: models.UserQuestionMistake, answer, is_correct: bool, answered_at: datetime):
+    """`answer`: the user_answers row (anything with id / selected_word_answer / selected_translation_answer)."""
+    if answered_before_dismissal(entry, answered_at):
+        return
+    if entry.dismissed_at is not None and not _wrong_since_dismissal(entry):
+        if is_correct:
+            return  # dismissed: only a new mistake brings it back
+        _reset(entry)
+    if is_correct:
+        entry.correct_streak = (entry.correct_streak or 0) + 1
+        if entry.correct_streak >= MISTAKE_CLEAR_STREAK:
+            entry.cleared = True
+    else:
+        entry.wrong_count = (entry.wrong_count or 0) + 1
+        entry.correct_streak = 0
+        entry.cleared = False
+        if entry.first_wrong_at is None or _epoch(answered_at) < _epoch(entry.first_wrong_at):
+            entry.first_wrong_at = answered_at
+        if entry.last_wrong_at is None or _epoch(answered_at) >= _epoch(entry.last_wrong_at):
+            _set_last_wrong(entry, answer, answered_at)
+    entry.priority = _priority(entry.wrong_count, entry.correct_streak, entry.last_wrong_at)
+
+def _reset(entry: models.UserQuestionMistake):
+    entry.wrong_count = 0
+    entry.correct_streak = 0
+    entry.cleared = False
+    entry.first_wrong_at = None
+    entry.last_wrong_at = None
+
+def answered_before_dismissal(entry: models.UserQuestionMistake, answered_at: datetime) -> bool:
+    """Whether an answer was given before the user last dismissed this mistake (and so no longer counts)."""
+    return entry.dismissed_at is not None and _epoch(answered_at) <= _epoch(entry.dismissed_at)
+
+def _wrong_since_dismissal(entry: models.UserQuestionMistake) -> bool:
+    return entry.last_wrong_at is not None and _epoch(entry.last_wrong_at) > _epoch(entry.dismissed_at)
+
+def not_dismissed():
+    """Filter for mistakes that are listed: never dismissed, or answered wrong again since."""
+    Mistake = models.UserQuestionMistake
+    return or_(Mistake.dismissed_at.is_(None), Mistake.last_wrong_at > Mistake.dismissed_at)
+
+def _set_last_wrong(entry: models.UserQuestionMistake, answer, answered_at: datetime):
+    entry.last_wrong_at = answered_at
+    entry.last_answer_id = _field(answer, "id")
+    entry.last_selected_word_answer = _field(answer, "selected_word_answer")
+    entry.last_selected_translation_answer = _field(answer, "selected_translation_answer")
+
+def _field(answer, name: str):
+    return answer.get(name) if isinstance(answer, dict) else getattr(answer, name, None)
+
+def _new_entry(user_id, question_id: int, question) -> models.UserQuestionMistake:
+    cluster, label = cluster_for(question.knowledge_point if question else None, question.topic if question else None)
+    return models.UserQuestionMistake(
+        user_id=user_id, question_id=question_id, cluster=cluster, cluster_label=label,
+        wrong_count=0, correct_streak=0, cleared=False
+    )
+
+def _load_entries(db: Session, user_id, question_ids) -> Dict[int, models.UserQuestionMistake]:
+    return {
+        entry.question_id: entry for entry in db.query(models.UserQuestionMistake).filter(
+            models.UserQuestionMistake.user_id == user_id,
+            models.UserQuestionMistake.question_id.in_(question_ids)
+        )
+    }
+
+def record_answers(db: Session, rows: List[dict], questions: Dict[int, tuple]):
+    """Applies newly stored answers to their users' review queues. Does not commit.
+
+    Runs after practice_stats_service.record_answers, whose lock on the user's stats row
+    serializes concurrent submits of the same user, so the read-modify-write here is safe.
+    """
+    by_user = defaultdict(list)
+    for row in rows:
+        if row["user_id"] is not None:
+            by_user[row["user_id"]].append(row)
+
+    for user_id, user_rows in by_user.items():
+        entries = _load_entries(db, user_id, {row["question_id"] for row in user_rows})
+        for row in sorted(user_rows, key=lambda row: (_epoch(row["answered_at"]), row["id"])):
+            entry = entries.get(row["question_id"])
+            if entry is None:
+                if row["is_correct"]:
+                    continue  # never missed, nothing to review
+                entry = entries[row["question_id"]] = _new_entry(user_id, row["question_id"], questions.get(row["question_id"]))
+                db.add(entry)
+            _apply_answer(entry, row, row["is_correct"], row["answered_at"])
+    db.flush()
+
+def discard_answers(db: Session, rows: List[dict]):
+    """Takes deleted wrong answers out of the aggregate. Does not commit.
+
+    When the last wrong answer of a question is deleted and others remain, the "last
+    answer" fields move to the latest remaining one. first_wrong_at is left as it is;
+    `rebuild_review_queue` recomputes it exactly.
+    """
+    by_user = defaultdict(list)
+    for row in rows:
+        if row["user_id"] is not None and not row["is_correct"]:
+            by_user[row["user_id"]].append(row)
+
+    for user_id, user_rows in by_user.items():
+        entries = _load_entries(db, user_id, {row["question_id"] for row in user_rows})
+        deleted_ids = {row["id"] for row in user_rows}
+        for row in user_rows:
+            entry = entries.get(row["question_id"])
+            if entry is None:
+                continue
+            if answered_before_dismissal(entry, row["answered_at"]):
+                continue  # not counted since the mistake was dismissed
+            entry.wrong_count -= 1
+            if entry.wrong_count <= 0:
+                db.delete(entry)
+                del entries[row["question_id"]]
+                continue
+            if entry.last_answer_id in deleted_ids:
+                latest = db.query(models.UserAnswer).filter(
+                    models.UserAnswer.user_id == user_id,
+                    models.UserAnswer.question_id == row["question_id"],
+                    models.UserAnswer.is_correct == False,
+                    models.UserAnswer.id.notin_(deleted_ids)
+                ).order_by(models.UserAnswer.answered_at.desc(), models.UserAnswer.id.desc()).first()
+                if latest is not None:
+                    _set_last_wrong(entry, latest, latest.answered_at)
+            entry.priority = _priority(entry.wrong_count, entry.correct_streak, entry.last_wrong_at)
+    db.flush()
+
+def dismiss(db: Session, user_id, question_id: int) -> bool:
+    """Hides a question from the user's mistakes list and review queue. Returns False if there is no open mistake. Does not commit."""
+    entry = db.get(models.UserQuestionMistake, (user_id, question_id))
+    if entry is None or (entry.dismissed_at is not None and not _wrong_since_dismissal(entry)):
+        return False
+    entry.dismissed_at = datetime.now(timezone.utc)
+    db.flush()
+    return True
+
+def get_review_session(db: Session, user_id, size: int = 20, cluster: Optional[str] = None) -> dict:
+    """
+    The `size` open mistakes with the highest priority (optionally from one cluster), grouped by
+    cluster, clusters ordered by their best item. Also returns the open count per cluster.
+    """
+    size = max(1, min(size, MAX_SESSION_SIZE))
+    Mistake = models.UserQuestionMistake
+    query = db.query(Mistake).filter(Mistake.user_id == user_id, Mistake.cleared == False, not_dismissed())
+    if cluster:
+        query = query.filter(Mistake.cluster == cluster_for(cluster, None)[0])
+    entries = query.order_by(Mistake.priority.desc()).limit(size).all()
+
+    details = {}
+    if entries:
+        details = {
+            question.id: (question, sentence) for question, sentence in db.query(models.Question, models.Sentence).outerjoin(
+                models.Sentence, models.Question.sentence_id == models.Sentence.id
+            ).filter(models.Question.id.in_([entry.question_id for entry in entries]))
+        }
+
+    groups: Dict[str, dict] = {}
+    for entry in entries:
+        if entry.question_id not in details:
+            continue
+        question, sentence = details[entry.question_id]
+        group = groups.setdefault(entry.cluster, {"cluster": entry.cluster, "label": entry.cluster_label, "items": []})
+        group["items"].append({
+            "question_id": question.id,
+            "sentence": sentence.text if sentence else "",
+            "question_type": question.type.value,
+            "question_text": question.question_text or "",
+            "options": question.options if question.options else [],
+            "correct_answer": question.correct_answer,
+            "explanation": question.explanation or "",
+            "translation_text": question.translation_text,
+            "translation_options": question.translation_options if question.translation_options else [],
+            "correct_translation": question.correct_translation,
+            "knowledge_point": question.knowledge_point,
+            "difficulty": question.difficulty or "medium",
+            "wrong_count": entry.wrong_count,
+            "correct_streak": entry.correct_streak,
+            "last_wrong_at": entry.last_wrong_at.isoformat(),
+        })
+
+    open_counts = db.query(Mistake.cluster, Mistake.cluster_label, func.count()).filter(
+        Mistake.user_id == user_id, Mistake.cleared == False, not_dismissed()
+    ).group_by(Mistake.cluster, Mistake.cluster_label).all()
+    clusters = defaultdict(lambda: {"label": None, "open": 0})
+    for key, label, count in open_counts:
+        clusters[key]["label"] = clusters[key]["label"] or label
+        clusters[key]["open"] += count
+
+    return {
+        "size": sum(len(group["items"]) for group in groups.values()),
+        "groups": list(groups.values()),
+        "clusters": sorted(
+            ({"cluster": key, "label": value["label"], "open": value["open"]} for key, value in clusters.items()),
+            key=lambda item: item["open"], reverse=True
+        ),
+    }
+
+def rebuild_review_queue(db: Session, user_id: Optional[str] = None) -> int:
+    """Recomputes aggregate rows from user_answers for one user, or for every user. Returns the number of users rebuilt."""
+    if user_id:
+        user_ids = [user_id]
+    else:
+        user_ids = [uid for (uid,) in db.query(models.UserAnswer.user_id).filter(
+            models.UserAnswer.user_id.isnot(None),
+            models.UserAnswer.is_correct == False
+        ).distinct()]
+
+    for uid in user_ids:
+        # Dismissals are not in user_answers: replay them at the time they happened
+        dismissed = dict(db.query(models.UserQuestionMistake.question_id, models.UserQuestionMistake.dismissed_at).filter(
+            models.UserQuestionMistake.user_id == uid,
+            models.UserQuestionMistake.dismissed_at.isnot(None)
+        ))
+        db.query(models.UserQuestionMistake).filter(models.UserQuestionMistake.user_id == uid).delete()
+        answers = db.query(
+            models.UserAnswer.id,
+            models.UserAnswer.question_id,
+            models.UserAnswer.is_correct,
+            models.UserAnswer.answered_at,
+            models.UserAnswer.selected_word_answer,
+            models.UserAnswer.selected_translation_answer,
+            models.Question.knowledge_point,
+            models.Sentence.grammar_point.label("topic"),
+        ).join(
+            models.Question, models.UserAnswer.question_id == models.Question.id
+        ).outerjoin(
+            models.Sentence, models.Question.sentence_id == models.Sentence.id
+        ).filter(
+            models.UserAnswer.user_id == uid
+        ).order_by(models.UserAnswer.answered_at, models.UserAnswer.id).all()
+
+        entries = {}
+        for answer in answers:
+            entry = entries.get(answer.question_id)
+            dismissed_at = dismissed.get(answer.question_id)
+            if entry is not None and dismissed_at is not None and _epoch(answer.answered_at) > _epoch(dismissed_at):
+                entry.dismissed_at = dismissed.pop(answer.question_id)
+            if entry is None:
+                if answer.is_correct:
+                    continue
+                entry = entries[answer.question_id] = _new_entry(uid, answer.question_id, answer)
+            _apply_answer(entry, answer, answer.is_correct, answer.answered_at)
+        for question_id, dismissed_at in dismissed.items():
+            if question_id in entries:
+                entries[question_id].dismissed_at = dismissed_at
+        db.add_all(entries.values())
+        db.commit()
+        print(f"[MistakeReview] Rebuilt review queue for user {uid}: {len(entries)} questions")
+    return len(user_ids)
@@ -1,9 +1,12 @@
 # backend/app/services/mistake_service.py
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
 from typing import List, Optional
 
 from .. import models, schemas
+from ..core.pagination import apply_keyset
+from ..core.text_search import contains
+from . import mistake_review_service
 
 def add_user_mistake(db: Session, user_id, mistake_data: schemas.question_schema) -> models.UserMistake:
     # Potentially check if a similar mistake for the same sentence already exists to avoid duplicates
@@ -24,11 +27,14 @@ def add_user_mistake(db: Session, user_id, mistake_data: schemas.question_schema
     db.refresh(db_mistake)
     return db_mistake
 
-def get_user_mistakes_list(db: Session, user_id, grammar_point: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[models.UserMistake]:
+def get_user_mistakes_list(db: Session, user_id, grammar_point: Optional[str] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.UserMistake]:
     query = db.query(models.UserMistake).filter(models.UserMistake.user_id == user_id)
     if grammar_point:
         query = query.filter(models.UserMistake.grammar_point.ilike(f"%{grammar_point}%")) # Case-insensitive search
-    return query.order_by(models.UserMistake.created_at.desc()).offset(skip).limit(limit).all()
+    query = apply_keyset(query, models.UserMistake.created_at, models.UserMistake.id, cursor)
+    if not cursor and skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def get_mistake_by_id_for_user(db: Session, mistake_id: str, user_id) -> Optional[models.UserMistake]:
     return db.query(models.UserMistake).filter(
@@ -44,59 +50,78 @@ def delete_user_mistake(db: Session, mistake_id: str, user_id) -> bool:
         return True
     return False
 
-def get_user_incorrect_answers(db: Session, user_id, skip: int = 0, limit: int = 100) -> List[dict]:
-    """
-    获取用户的错题记录，通过联合user_answers和questions表查询is_correct为false的记录
-    """
-    # 联合查询user_answers和questions表，获取错题信息
-    query = db.query(
-        models.UserAnswer,
+def _grammar_point_filter(db: Session, grammar_point: str):
+    """语法点过滤：匹配题目知识点 (Question.knowledge_point) 或句子主题 (Sentence.grammar_point)"""
+    conditions = [
+        contains(db, models.Question.knowledge_point, grammar_point),
+        contains(db, models.Sentence.grammar_point, grammar_point),
+    ]
+    # 未设置语法点的句子在返回结果中显示为 "general"
+    if grammar_point.lower() in "general":
+        conditions.append(models.Sentence.grammar_point.is_(None))
+    return or_(*conditions)
+
+def _mistake_record(mistake: models.UserQuestionMistake, question: models.Question, sentence: models.Sentence) -> dict:
+    return {
+        "id": str(mistake.last_answer_id),
+        "question_id": str(question.id),
+        "sentence": sentence.text,
+        "question_type": question.type.value,
+        "question_text": question.question_text or "",
+        "selected_word_answer": mistake.last_selected_word_answer,
+        "selected_translation_answer": mistake.last_selected_translation_answer,
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation or "",
+        "grammar_points": [question.knowledge_point] if question.knowledge_point else [],
+        "answered_at": mistake.last_wrong_at.isoformat(),
+        "difficulty": question.difficulty or "medium",
+        "topic": sentence.grammar_point or "general",
+        "options": question.options if question.options else [],
+        "translation_text": question.translation_text,
+        "translation_options": question.translation_options if question.translation_options else [],
+        "correct_translation": question.correct_translation,
+        "wrong_count": mistake.wrong_count,
+        "first_wrong_at": (mistake.first_wrong_at or mistake.last_wrong_at).isoformat(),
+        "last_wrong_at": mistake.last_wrong_at.isoformat(),
+        "cleared": mistake.cleared,
+    }
+
+def _mistakes_query(db: Session, user_id):
+    return db.query(
+        models.UserQuestionMistake,
         models.Question,
         models.Sentence
     ).join(
-        models.Question, models.UserAnswer.question_id == models.Question.id
+        models.Question, models.UserQuestionMistake.question_id == models.Question.id
     ).join(
         models.Sentence, models.Question.sentence_id == models.Sentence.id
     ).filter(
-        and_(
-            models.UserAnswer.user_id == user_id,
-            models.UserAnswer.is_correct == False
-        )
-    ).order_by(
-        models.UserAnswer.answered_at.desc()
-    ).offset(skip).limit(limit)
-    
-    results = query.all()
-    
-    # 格式化返回数据
-    mistake_records = []
-    for user_answer, question, sentence in results:
-        mistake_record = {
-            "id": str(user_answer.id),
-            "question_id": str(question.id),
-            "sentence": sentence.text,
-            "question_type": question.type.value,
-            "question_text": question.question_text or "",
-             "selected_word_answer": user_answer.selected_word_answer,
-             "selected_translation_answer": user_answer.selected_translation_answer,
-             "correct_answer": question.correct_answer,
-            "explanation": question.explanation or "",
-            "grammar_points": [question.knowledge_point] if question.knowledge_point else [],
-            "answered_at": user_answer.answered_at.isoformat(),
-            "difficulty": question.difficulty or "medium",
-            "topic": sentence.grammar_point or "general",
-            "options": question.options if question.options else [],
-            "translation_text": question.translation_text,
-            "translation_options": question.translation_options if question.translation_options else [],
-            "correct_translation": question.correct_translation
-        }
-        mistake_records.append(mistake_record)
-    
-    return mistake_records
+        models.UserQuestionMistake.user_id == user_id,
+        mistake_review_service.not_dismissed(),
+        # "id" and the cursor come from last_answer_id; a row without one cannot be fetched, deleted or paged past
+        models.UserQuestionMistake.last_answer_id.isnot(None)
+    )
+
+def get_user_incorrect_answers(db: Session, user_id, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, grammar_point: Optional[str] = None) -> List[dict]:
+    """
+    获取用户的错题：每道答错过的题目一条，来自 user_question_mistakes 汇总表（提交答案时增量维护），
+    附带答错次数、首次/最近答错时间以及最近一次答错时的作答
+    "id" 为最近一次答错的 user_answers.id，详情与删除接口仍按它查找
+    按 (最近答错时间, id) 倒序，传入上一页的 cursor 进行游标分页；skip 仅为兼容保留
+    grammar_point 过滤在 SQL 中完成（由文本索引支持），保证每页条数正确
+    """
+    query = _mistakes_query(db, user_id)
+    if grammar_point:
+        query = query.filter(_grammar_point_filter(db, grammar_point))
+    query = apply_keyset(query, models.UserQuestionMistake.last_wrong_at, models.UserQuestionMistake.last_answer_id, cursor)
+    if not cursor and skip:
+        query = query.offset(skip)
+
+    return [_mistake_record(mistake, question, sentence) for mistake, question, sentence in query.limit(limit).all()]
 
 def get_user_incorrect_answer_by_id(db: Session, user_id, answer_id: int) -> Optional[dict]:
     """
-    根据答案ID获取特定的错题记录
+    根据答案ID获取特定的错题记录（该次作答），附带该题的答错汇总
     """
     result = db.query(
         models.UserAnswer,
@@ -118,6 +143,9 @@ def get_user_incorrect_answer_by_id(db: Session, user_id, answer_id: int) -> Opt
         return None
     
     user_answer, question, sentence = result
+    mistake = db.get(models.UserQuestionMistake, (user_id, question.id))
+    if mistake is not None and mistake_review_service.answered_before_dismissal(mistake, user_answer.answered_at):
+        return None  # removed from the mistakes list
     
     return {
         "id": str(user_answer.id),
@@ -125,9 +153,9 @@ def get_user_incorrect_answer_by_id(db: Session, user_id, answer_id: int) -> Opt
         "sentence": sentence.text,
         "question_type": question.type.value,
         "question_text": question.question_text or "",
-         "selected_word_answer": user_answer.selected_word_answer,
-         "selected_translation_answer": user_answer.selected_translation_answer,
-         "correct_answer": question.correct_answer,
+        "selected_word_answer": user_answer.selected_word_answer,
+        "selected_translation_answer": user_answer.selected_translation_answer,
+        "correct_answer": question.correct_answer,
         "explanation": question.explanation or "",
         "grammar_points": [question.knowledge_point] if question.knowledge_point else [],
         "answered_at": user_answer.answered_at.isoformat(),
@@ -136,5 +164,9 @@ def get_user_incorrect_answer_by_id(db: Session, user_id, answer_id: int) -> Opt
         "options": question.options if question.options else [],
         "translation_text": question.translation_text,
         "translation_options": question.translation_options if question.translation_options else [],
-        "correct_translation": question.correct_translation
-    }
\ No newline at end of file
+        "correct_translation": question.correct_translation,
+        "wrong_count": mistake.wrong_count if mistake else 1,
+        "first_wrong_at": (mistake.first_wrong_at or mistake.last_wrong_at).isoformat() if mistake else user_answer.answered_at.isoformat(),
+        "last_wrong_at": mistake.last_wrong_at.isoformat() if mistake else user_answer.answered_at.isoformat(),
+        "cleared": mistake.cleared if mistake else False,
+    }
@@ -1,31 +1,57 @@
 # backend/app/services/practice_service.py
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional, Dict, Deque
 import random # For basic random selection, can be replaced with more sophisticated logic
-from collections import deque
+from collections import deque, OrderedDict
 import threading
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import json,os
+import time
 import redis
 from datetime import datetime
 
 from .. import models, schemas
-
-# Redis Configuration
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-REDIS_DB = int(os.getenv("REDIS_DB", 0))
-
-r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+from . import practice_stats_service
+from . import mistake_review_service
+from ..core import pool_metrics
+from ..core import metrics
+from ..core import tracing
+from ..core import serialization
+from ..core import cache_codec
+from ..core import redis_client
+from ..core import leader
+
+# Redis clients share the pools in core.redis_client (no connection is made at import)
+r = redis_client.get_sync(decode_responses=True)
+# Cached question values may be compressed (core.cache_codec), so they are read and written as bytes
+r_values = redis_client.get_sync(decode_responses=False)
+question_codec = cache_codec.codec_for("practice_question")
 
 # Define a cache key prefix
 # CACHE_KEY_PREFIX = "practice_question:" # Removed as per user request
 CACHE_EXPIRATION_SECONDS = 3600*48  # 48 hour
+# Activity-aware retention: pools of users not seen for CACHE_INACTIVE_SECONDS are neither refilled
+# nor kept; at most CACHE_MAX_POOLED_USERS users keep a pool (least recently active are evicted first),
+# and each user gets refills for at most CACHE_USER_QUOTA combinations (their most recently used ones).
+CACHE_INACTIVE_SECONDS = int(os.getenv("CACHE_INACTIVE_SECONDS", 3600 * 24))
+CACHE_MAX_POOLED_USERS = int(os.getenv("CACHE_MAX_POOLED_USERS", 5000))
+CACHE_USER_QUOTA = int(os.getenv("CACHE_USER_QUOTA", 15))
+CACHE_SWEEP_INTERVAL_SECONDS = int(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", 300))
+# Keyspace monitor + sweeper: "leader" (default) runs them only in the process holding the practice-cache
+# lease (core.leader), "always" in every process (single worker), "off" in none (run `python -m app.cli cache-worker`)
+CACHE_BACKGROUND_MODE = os.getenv("CACHE_BACKGROUND_MODE", "leader").lower()
+REFILL_LOCK_SECONDS = 180  # longer than any single generation; guards one cache key across processes
+LAST_SEEN_KEY = "practice:last_seen"         # zset user_id -> last activity (unix seconds)
+COMBO_USAGE_KEY_PREFIX = "practice:combos:"  # zset per user: "topic_difficulty" -> last request
 CACHE_MONITOR_RUNNING=False
 CACHE_MONITOR_THREAD = None
 REDIS_PUBSUB = None
+CACHE_SWEEPER_THREAD = None
+CACHE_SWEEPER_STOP = threading.Event()
+CACHE_LEADER = None
 # Global cache monitoring configuration using Redis notifications
 # Removed USER_CACHE_INITIALIZED as per user request, initialization check is done by r.exists()
 # USER_CACHE_INITIALIZED = set()
@@ -49,6 +75,140 @@ CACHE_COMBINATIONS = [
     ('history', 'advanced'),
 ]
 
+def _cache_metric_labels(topic: Optional[str], difficulty: Optional[str]):
+    """(topic, difficulty) metric labels; anything outside CACHE_COMBINATIONS is 'other' to bound the series."""
+    combination = (topic or 'general', difficulty or 'medium')
+    return combination if combination in CACHE_COMBINATIONS else ('other', 'other')
+
+def touch_user(user_id, topic: Optional[str] = None, difficulty: Optional[str] = None):
+    """Record activity for a user (and the combination they asked for), which keeps their pool refilled."""
+    if not user_id:
+        return
+    now = time.time()
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.zadd(LAST_SEEN_KEY, {str(user_id): now})
+        if topic and difficulty:
+            usage_key = f"{COMBO_USAGE_KEY_PREFIX}{user_id}"
+            pipe.zadd(usage_key, {f"{topic}_{difficulty}": now})
+            pipe.expire(usage_key, CACHE_INACTIVE_SECONDS * 2)
+        pipe.execute()
+    except Exception as e:
+        print(f"[CacheService] Error recording activity for user {user_id}: {e}")
+
+def _is_user_active(user_id) -> bool:
+    """Global pools are always active; users only while seen within CACHE_INACTIVE_SECONDS."""
+    if not user_id:
+        return True
+    last_seen = r.zscore(LAST_SEEN_KEY, str(user_id))
+    return last_seen is not None and last_seen >= time.time() - CACHE_INACTIVE_SECONDS
+
+def _quota_combinations(user_id) -> List[tuple]:
+    """Combinations this user's pool keeps: their CACHE_USER_QUOTA most recently used ones,
+    topped up in CACHE_COMBINATIONS order."""
+    if not user_id or CACHE_USER_QUOTA >= len(CACHE_COMBINATIONS):
+        return list(CACHE_COMBINATIONS)
+    return _combinations_from_recent(r.zrevrange(f"{COMBO_USAGE_KEY_PREFIX}{user_id}", 0, CACHE_USER_QUOTA - 1))
+
+def _combinations_from_recent(recent) -> List[tuple]:
+    recent = {item.decode() if isinstance(item, bytes) else item for item in recent}
+    chosen = [combination for combination in CACHE_COMBINATIONS if f"{combination[0]}_{combination[1]}" in recent]
+    for combination in CACHE_COMBINATIONS:
+        if len(chosen) >= CACHE_USER_QUOTA:
+            break
+        if combination not in chosen:
+            chosen.append(combination)
+    return chosen
+
+def _release_user_pools(user_ids: List[str]) -> int:
+    """Drop the cached questions and activity of these users. Returns the number of keys removed."""
+    removed = 0
+    for user_id in user_ids:
+        keys = [f"{user_id}:{topic}_{difficulty}" for topic, difficulty in CACHE_COMBINATIONS]
+        keys.append(f"{COMBO_USAGE_KEY_PREFIX}{user_id}")
+        # Leave last_seen first so the keyspace 'del' events below see an inactive user and do not refill
+        r.zrem(LAST_SEEN_KEY, user_id)
+        removed += r.unlink(*keys)
+    return removed
+
+def sweep_inactive_pools() -> dict:
+    """Reclaim pools of users inactive past CACHE_INACTIVE_SECONDS, then evict the least recently
+    active users while more than CACHE_MAX_POOLED_USERS have a pool."""
+    cutoff = time.time() - CACHE_INACTIVE_SECONDS
+    inactive = r.zrangebyscore(LAST_SEEN_KEY, "-inf", f"({cutoff}")
+    removed = _release_user_pools(inactive)
+    over_budget = []
+    excess = r.zcard(LAST_SEEN_KEY) - CACHE_MAX_POOLED_USERS
+    if excess > 0:
+        over_budget = r.zrange(LAST_SEEN_KEY, 0, excess - 1)
+        removed += _release_user_pools(over_budget)
+    if inactive:
+        metrics.PRACTICE_CACHE_EVICTIONS.labels("inactive").inc(len(inactive))
+    if over_budget:
+        metrics.PRACTICE_CACHE_EVICTIONS.labels("budget").inc(len(over_budget))
+    pooled_users = r.zcard(LAST_SEEN_KEY)
+    metrics.PRACTICE_CACHE_POOLED_USERS.set(pooled_users)
+    if inactive or over_budget:
+        print(f"[CacheService] Swept pools: {len(inactive)} inactive, {len(over_budget)} over budget, {removed} keys removed")
+    return {"inactive_users": len(inactive), "evicted_users": len(over_budget), "keys_removed": removed,
+            "pooled_users": pooled_users}
+
+def _start_cache_sweeper():
+    """Run sweep_inactive_pools every CACHE_SWEEP_INTERVAL_SECONDS in a daemon thread."""
+    global CACHE_SWEEPER_THREAD
+    if CACHE_SWEEPER_THREAD is not None:
+        return
+    CACHE_SWEEPER_STOP.clear()
+
+    def sweep_loop():
+        while not CACHE_SWEEPER_STOP.wait(CACHE_SWEEP_INTERVAL_SECONDS):
+            try:
+                sweep_inactive_pools()
+            except Exception as e:
+                print(f"[CacheService] Cache sweep failed: {e}")
+
+    CACHE_SWEEPER_THREAD = threading.Thread(target=sweep_loop, name="cache-sweeper", daemon=True)
+    CACHE_SWEEPER_THREAD.start()
+    print(f"[CacheService] Cache sweeper started (inactive after {CACHE_INACTIVE_SECONDS}s, "
+          f"at most {CACHE_MAX_POOLED_USERS} pooled users, {CACHE_USER_QUOTA} combinations per user)")
+
+def _stop_cache_sweeper():
+    global CACHE_SWEEPER_THREAD
+    CACHE_SWEEPER_STOP.set()
+    CACHE_SWEEPER_THREAD = None
+
+def _start_background_cache_work(force: bool = False):
+    """Start the keyspace monitor and sweeper according to CACHE_BACKGROUND_MODE (`force` campaigns even when "off")."""
+    global CACHE_LEADER
+    mode = "leader" if force and CACHE_BACKGROUND_MODE == "off" else CACHE_BACKGROUND_MODE
+    if mode == "off":
+        print("[CacheService] Background cache work disabled in this process (CACHE_BACKGROUND_MODE=off)")
+        return
+    if mode == "always":
+        _on_cache_leader_elected()
+        return
+    if CACHE_LEADER is None:
+        CACHE_LEADER = leader.LeaderElection(r, "practice-cache", _on_cache_leader_elected, _on_cache_leader_lost)
+    CACHE_LEADER.start()
+
+def _stop_background_cache_work():
+    global CACHE_LEADER
+    if CACHE_LEADER is not None:
+        CACHE_LEADER.stop()  # steps down (stopping monitor and sweeper) and releases the lease
+        CACHE_LEADER = None
+    else:
+        _on_cache_leader_lost()
+
+def _on_cache_leader_elected():
+    metrics.PRACTICE_CACHE_LEADER.set(1)
+    _start_cache_monitor()
+    _start_cache_sweeper()
+
+def _on_cache_leader_lost():
+    metrics.PRACTICE_CACHE_LEADER.set(0)
+    _stop_cache_monitor()
+    _stop_cache_sweeper()
+
 def _setup_redis_notifications():
     """Setup Redis keyspace notifications for cache monitoring."""
     try:
@@ -80,16 +240,17 @@ def _start_cache_monitor():
     
     def monitor_cache():
         global REDIS_PUBSUB
+        pubsub = None
         try:
             # Create a separate Redis connection for pubsub
-            pubsub_redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
-            REDIS_PUBSUB = pubsub_redis.pubsub()
+            pubsub_redis = redis_client.pubsub_client()
+            pubsub = REDIS_PUBSUB = pubsub_redis.pubsub()
             
             # Subscribe to both keyevent and keyspace notifications
             # __keyevent@0__:expired - for expired keys
             # __keyevent@0__:del - for deleted keys
             # __keyspace@0__:* - for all keyspace events
-            REDIS_PUBSUB.psubscribe(
+            pubsub.psubscribe(
                 '__keyevent@0__:expired', 
                 '__keyevent@0__:del',
                 '__keyspace@0__:*'
@@ -98,7 +259,7 @@ def _start_cache_monitor():
             print("[CacheService] Cache monitor started, listening for Redis notifications")
             print(f"[CacheService] Monitoring cache combinations: {CACHE_COMBINATIONS}")
             
-            for message in REDIS_PUBSUB.listen():
+            for message in pubsub.listen():
                 # print(f"[CacheService] Raw Redis message: {message}")
                 
                 if message['type'] == 'pmessage':
@@ -139,12 +300,14 @@ def _start_cache_monitor():
                     #         print(f"[CacheService] Ignoring keyevent for non-cache key: {key}")
                             
         except Exception as e:
+            if not CACHE_MONITOR_RUNNING:
+                return  # closed by _stop_cache_monitor
             print(f"[CacheService] Cache monitor error: {e}")
             import traceback
             traceback.print_exc()
         finally:
-            if REDIS_PUBSUB:
-                REDIS_PUBSUB.close()
+            if pubsub is not None:
+                pubsub.close()  # our own; REDIS_PUBSUB may already belong to a newer monitor
     
     CACHE_MONITOR_RUNNING = True
     CACHE_MONITOR_THREAD = threading.Thread(target=monitor_cache, daemon=True)
@@ -172,31 +335,63 @@ def replenish_cache(user_id: Optional[str], topic: str, difficulty: str, async_m
         difficulty: 难度
         async_mode: 是否异步执行，默认True
     """
+    metric_labels = _cache_metric_labels(topic, difficulty)
+
     def replenish_task():
         db = None
         try:
             print(f"[CacheService] 开始补充缓存 - 用户: {user_id or 'global'}, 主题: {topic}, 难度: {difficulty}")
             
-            # 在后台线程中创建新的数据库连接
-            from ..db import get_db
+            # 在后台线程中创建新的数据库会话（首次查询时才占用连接）
+            from ..db import get_db, get_read_session
             db = next(get_db())
             
             user_prefix = user_id if user_id else "global"
             cache_key = f"{user_prefix}:{topic}_{difficulty}"
             
+            # 不活跃用户、或不在配额内的组合不再补充
+            if not _is_user_active(user_id):
+                print(f"[CacheService] 用户 {user_id} 已不活跃，跳过补充: {cache_key}")
+                metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "inactive").inc()
+            elif (topic, difficulty) not in _quota_combinations(user_id):
+                print(f"[CacheService] 组合 {topic}_{difficulty} 超出用户配额，跳过补充: {cache_key}")
+                metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "over_quota").inc()
             # 只有当缓存键不存在时才补充，避免覆盖现有数据
-            if not r.exists(cache_key):
-                print(f"[CacheService] 开始为缓存键补充内容: {cache_key}")
-                result = _generate_and_cache_question(db, user_id, topic, difficulty)
+            elif not r.exists(cache_key):
+                # 跨进程的补充锁：同一个缓存键同一时间只生成一次
+                lock_key = f"refill-lock:{cache_key}"
+                lock_token = leader.acquire_lock(r, lock_key, REFILL_LOCK_SECONDS)
+                if not lock_token:
+                    print(f"[CacheService] 缓存键 {cache_key} 正在由其他进程补充，跳过")
+                    metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "locked").inc()
+                    return
+                try:
+                    print(f"[CacheService] 开始为缓存键补充内容: {cache_key}")
+                    # 历史题目走只读副本（已配置且用户未刚写入时），否则复用 db；
+                    # 调用 LLM 前归还连接，生成期间本线程不占用任何连接
+                    read_db = get_read_session(str(user_id) if user_id else None, primary=db)
+                    try:
+                        history = _recent_question_texts(read_db, user_id)
+                    finally:
+                        if read_db is not db:
+                            read_db.close()
+                        db.rollback()
+                    result = _generate_and_cache_question(db, user_id, topic, difficulty, history=history)
+                finally:
+                    leader.release_lock(r, lock_key, lock_token)
                 if result:
                     print(f"[CacheService] 成功补充缓存键: {cache_key}")
+                    metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "success").inc()
                 else:
                     print(f"[CacheService] 补充缓存键失败: {cache_key}")
+                    metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "failed").inc()
             else:
                 print(f"[CacheService] 缓存键 {cache_key} 已存在，跳过补充")
+                metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "skipped").inc()
                 
         except Exception as e:
             print(f"[CacheService] 缓存补充过程中出错，缓存键 {cache_key}: {e}")
+            metrics.PRACTICE_CACHE_REPLENISH.labels(*metric_labels, "error").inc()
             if db:
                 try:
                     db.rollback()
@@ -210,14 +405,32 @@ def replenish_cache(user_id: Optional[str], topic: str, difficulty: str, async_m
                 except Exception as close_error:
                     print(f"[CacheService] 关闭数据库连接时出错: {close_error}")
     
+    # 后台线程开启新的 trace，并链接到触发补充的请求 span
+    trace_link = tracing.current_link() if async_mode else None
+    span_attributes = {"cache.user": str(user_id or "global"), "cache.topic": topic, "cache.difficulty": difficulty}
+
+    def labelled_replenish_task():
+        # 连接池指标中把该线程持有的连接归到 replenish_cache
+        try:
+            with pool_metrics.holder("replenish_cache"):
+                if async_mode:
+                    with tracing.background_span("replenish_cache", trace_link, **span_attributes):
+                        replenish_task()
+                else:
+                    with tracing.tracer.start_as_current_span("replenish_cache", attributes=span_attributes):
+                        replenish_task()
+        finally:
+            metrics.PRACTICE_GENERATION_IN_PROGRESS.dec()
+
+    metrics.PRACTICE_GENERATION_IN_PROGRESS.inc()
     if async_mode:
         # 在后台线程中异步执行
         import threading
-        thread = threading.Thread(target=replenish_task, daemon=True)
+        thread = threading.Thread(target=labelled_replenish_task, daemon=True)
         thread.start()
     else:
         # 同步执行
-        replenish_task()
+        labelled_replenish_task()
 
 def _stop_cache_monitor():
     """Stop the global cache monitoring."""
@@ -228,6 +441,7 @@ def _stop_cache_monitor():
         REDIS_PUBSUB.close()
     print("[CacheService] Cache monitor stopped")
 
+@tracing.traced()
 def _initialize_cache_pool(db: Session, user_id: str):
     """Initialize the cache pool with questions for all combinations for a specific user."""
     # Removed check for user_id in USER_CACHE_INITIALIZED
@@ -238,9 +452,12 @@ def _initialize_cache_pool(db: Session, user_id: str):
     print(f"[CacheService] Initializing cache pool for user {user_id}...")
     
     try:
-        for topic, difficulty in CACHE_COMBINATIONS:
+        touch_user(user_id)
+        combinations = _quota_combinations(user_id)
+        present = redis_client.exists_many(r, [f"{user_id}:{topic}_{difficulty}" for topic, difficulty in combinations])
+        for (topic, difficulty), exists in zip(combinations, present):
             cache_key = f"{user_id}:{topic}_{difficulty}"
-            if not r.exists(cache_key):
+            if not exists:
                 print(f"[CacheService] Pre-generating cache for user {user_id}, key {cache_key}")
                 replenish_cache(user_id, topic, difficulty)
         # Removed USER_CACHE_INITIALIZED.add(user_id)
@@ -249,16 +466,16 @@ def _initialize_cache_pool(db: Session, user_id: str):
         print(f"[CacheService] Error initializing cache pool for user {user_id}: {e}")
     # Removed finally db.close() as db is passed in and should be managed by the caller
 
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field
+# langchain is imported inside generate_single_question: it costs over a second at import time
+from pydantic import BaseModel, ConfigDict, Field
 import uuid
 import os
 from pathlib import Path
 
 # Pydantic model for the expected JSON structure of a question
 class GeneratedQuestion(BaseModel):
+    model_config = ConfigDict(defer_build=True)  # schema is built on first use, not at import
+
     sentence_with_blank: str = Field(description="The sentence with a blank to be filled")
     options: List[str] = Field(description="List of four options for the blank-filling question")
     answer: str = Field(description="The correct option for the blank-filling question")
@@ -269,33 +486,87 @@ class GeneratedQuestion(BaseModel):
     difficulty: str = Field(description="The difficulty level of the question (e.g., medium, hard, advanced)")
     knowledge_point: str = Field(description="The main knowledge point or grammar rule tested by this question (e.g., past tense, phrasal verbs)")
 
-def _generate_and_cache_question(db: Session, user_id: Optional[str], topic: Optional[str], difficulty: Optional[str]) -> Optional[dict]:
-    """Generates a single question and caches it with nested sentence data, returns cached dict."""
-    question = generate_single_question(db, user_id, topic, difficulty)
+def _question_payload(question: models.Question) -> bytes:
+    """QuestionRead JSON for a question. The only place a served question is validated."""
+    return serialization.dumps(schemas.QuestionRead.model_validate(question).model_dump(mode='json'))
+
+
+@tracing.traced()
+def _generate_and_cache_question(db: Session, user_id: Optional[str], topic: Optional[str], difficulty: Optional[str], history: Optional[List[str]] = None) -> Optional[bytes]:
+    """Generates a single question and caches its QuestionRead JSON (nested sentence included), returns the JSON."""
+    question = generate_single_question(db, user_id, topic, difficulty, history=history)
     if question:
         user_prefix = user_id if user_id else "global"
         cache_key = f"{user_prefix}:{topic or 'general'}_{difficulty or 'medium'}" # Changed _ to : for user_id separation
-        from .. import schemas
         try:
-            question_read = schemas.QuestionRead.model_validate(question)
-            cached_question = question_read.model_dump(mode='json')
-            question_data = json.dumps(cached_question, ensure_ascii=False)
-            r.setex(cache_key, CACHE_EXPIRATION_SECONDS, question_data)
+            question_data = _question_payload(question)
+            r_values.setex(cache_key, CACHE_EXPIRATION_SECONDS, question_codec.encode(question_data))
             print(f"[CacheService] Cached question {question.id} with nested sentence data, key: {cache_key}")
-            return cached_question
+            return question_data
         except Exception as e:
             print(f"[CacheService] Error caching question {question.id}: {e}")
             return None
 
 
 
+async def get_cached_question_async(user_id, topic: Optional[str] = None, difficulty: Optional[str] = None) -> Optional[bytes]:
+    """Cache-hit path of get_new_questions on the async Redis client, for use from request handlers.
+
+    Records activity, takes the cached question and checks the user's pool in two pipelined
+    round trips; missing pool entries are scheduled for refill. Returns None on a miss or a
+    Redis error, in which case the caller falls back to get_new_questions in a worker thread.
+    """
+    actual_topic = topic or 'general'
+    actual_difficulty = difficulty or 'medium'
+    cache_key = f"{user_id}:{actual_topic}_{actual_difficulty}"
+    limit_combinations = user_id and CACHE_USER_QUOTA < len(CACHE_COMBINATIONS)
+    try:
+        client = redis_client.get_async(decode_responses=False)
+        pipe = client.pipeline(transaction=False)
+        if user_id:
+            now = time.time()
+            usage_key = f"{COMBO_USAGE_KEY_PREFIX}{user_id}"
+            pipe.zadd(LAST_SEEN_KEY, {str(user_id): now})
+            pipe.zadd(usage_key, {f"{actual_topic}_{actual_difficulty}": now})
+            pipe.expire(usage_key, CACHE_INACTIVE_SECONDS * 2)
+            if limit_combinations:
+                pipe.zrevrange(usage_key, 0, CACHE_USER_QUOTA - 1)
+        results = await pipe.execute()
+        combinations = _combinations_from_recent(results[-1]) if limit_combinations else list(CACHE_COMBINATIONS)
+        pool_keys = [f"{user_id}:{t}_{d}" for t, d in combinations] if user_id else []
+
+        pipe = client.pipeline(transaction=False)
+        pipe.getdel(cache_key)
+        for key in pool_keys:
+            pipe.exists(key)
+        cached, *present = await pipe.execute()
+    except redis.RedisError as e:
+        print(f"[CacheService] Async cache read failed for key {cache_key}: {e}")
+        return None
+
+    # The key just taken is refilled by the keyspace monitor; schedule the other gaps here
+    for (t, d), key, exists in zip(combinations, pool_keys, present):
+        if not exists and key != cache_key:
+            replenish_cache(user_id, t, d)
+
+    question_data = question_codec.decode(cached)
+    if question_data:
+        metrics.PRACTICE_CACHE_REQUESTS.labels(*_cache_metric_labels(actual_topic, actual_difficulty), "hit").inc()
+    return question_data
+
+
+@tracing.traced()
 def get_new_questions(
     db: Session, 
     user_id: Optional[str], 
     topic: Optional[str] = None, 
     difficulty: Optional[str] = None
-) -> Optional[dict]:
-    """Fetches a new question from cache, with Redis notifications handling replenishment."""
+) -> Optional[bytes]:
+    """Fetches a new question from cache, with Redis notifications handling replenishment.
+
+    Returns the question as QuestionRead JSON, ready to send (see core.serialization):
+    a cache hit is only decompressed, never parsed.
+    """
     print(f"[PracticeService] get_new_questions called with user_id: {user_id}, topic: {topic}, difficulty: {difficulty}")
 
     if user_id: # Check if user_id is provided before attempting to initialize its cache pool
@@ -306,6 +577,7 @@ def get_new_questions(
     
     actual_topic = topic or 'general'
     actual_difficulty = difficulty or 'medium'
+    touch_user(user_id, actual_topic, actual_difficulty)
     # Simplified cache key format: topic_difficulty
     cache_key = f"{user_id}:{actual_topic}_{actual_difficulty}"
     
@@ -313,14 +585,16 @@ def get_new_questions(
     max_attempts = 3
     for attempt in range(max_attempts):
         try:
-            cached_question_data = r.getdel(cache_key)
+            cached_question_data = question_codec.decode(r_values.getdel(cache_key))
             if cached_question_data:
-                question_dict = json.loads(cached_question_data)
-                return question_dict
-        except (json.JSONDecodeError, Exception) as e:
+                # Validated when it was cached; pass the JSON through without parsing it
+                metrics.PRACTICE_CACHE_REQUESTS.labels(*_cache_metric_labels(actual_topic, actual_difficulty), "hit").inc()
+                return cached_question_data
+        except Exception as e:
             print(f"[CacheService] Error reading cached data for key {cache_key}: {e}, trying again (attempt {attempt + 1})")
         
         # Small delay between attempts
+        tracing.add_event("cache_retry_sleep", attempt=attempt + 1, sleep_ms=100)
         import time
         time.sleep(0.1)
     
@@ -330,15 +604,13 @@ def get_new_questions(
     question = generate_single_question(db, user_id, actual_topic, actual_difficulty)
     if question:
         try:
-            # Use Pydantic serialization instead of _create_question_dict
-            from .. import schemas
-            question_read = schemas.QuestionRead.model_validate(question)
-            # Use model_dump with mode='json' to properly serialize UUID objects
-            question_dict = question_read.model_dump(mode='json')
+            question_data = _question_payload(question)
             print(f"[CacheService] Generated question {question.id} without caching (cache miss scenario)")
-            return question_dict
+            metrics.PRACTICE_CACHE_REQUESTS.labels(*_cache_metric_labels(actual_topic, actual_difficulty), "fallback").inc()
+            return question_data
         except Exception as e:
             print(f"[CacheService] Error creating question dict {question.id}: {e}")
+    metrics.PRACTICE_CACHE_REQUESTS.labels(*_cache_metric_labels(actual_topic, actual_difficulty), "failed").inc()
     return None
 
 
@@ -348,15 +620,52 @@ def get_question_by_id(db: Session, question_id: str) -> Optional[models.Questio
     """Fetches a question by its ID from the database."""
     try:
         question_int_id = int(question_id)
-        return db.query(models.Question).filter(models.Question.id == question_int_id).first()
+        # QuestionRead nests the sentence; load it in the same query instead of lazily
+        return db.query(models.Question).options(joinedload(models.Question.sentence))\
+            .filter(models.Question.id == question_int_id).first()
     except ValueError:
         print(f"[PracticeService] Invalid integer format: {question_id}")
         return None
 
 
-def generate_single_question(db: Session, user_id: Optional[str], topic: Optional[str] = None, difficulty: Optional[str] = None) -> Optional[models.Question]:
+def _recent_question_texts(db: Session, user_id: Optional[str]) -> List[str]:
+    """Sentences of the user's 10 most recently answered questions, for the prompt's avoid-list."""
+    # Convert user_id string to UUID if it's not None
+    user_uuid = None
+    if user_id:
+        try:
+            import uuid
+            user_uuid = uuid.UUID(user_id) if isinstance(user_id, str) else user_id
+        except ValueError:
+            print(f"[PracticeService] Invalid UUID format for user_id: {user_id}")
+            user_uuid = None
+    
+    # 查询用户最近回答的10个问题
+    historical_questions = db.query(models.Question)\
+        .join(models.UserAnswer)\
+        .filter(models.UserAnswer.user_id == user_uuid)\
+        .order_by(models.UserAnswer.answered_at.desc())\
+        .limit(10)\
+        .all()
+    print(f"[PracticeService] Retrieved {len(historical_questions)} historical questions for user {user_id}")
+    historical_sentences_texts = []
+    for q in historical_questions:
+        if q.translation_text:
+            historical_sentences_texts.append(q.translation_text)
+        elif q.question_text and q.correct_answer:
+            # Ensure question_text is a string before calling replace
+            question_text_str = str(q.question_text)
+            historical_sentences_texts.append(f"{question_text_str.replace('____', q.correct_answer)}")
+    return historical_sentences_texts
+
+@tracing.traced()
+def generate_single_question(db: Session, user_id: Optional[str], topic: Optional[str] = None, difficulty: Optional[str] = None, history: Optional[List[str]] = None) -> Optional[models.Question]:
     # ... existing code ...
-    """Generates a new question for a user using Langchain ChatModel."""
+    """Generates a new question for a user using Langchain ChatModel.
+
+    `history` is the user's recent sentences (see _recent_question_texts); when not given it is
+    read through `db`. The generated question is always written through `db`.
+    """
     print(f"[PracticeService] generate_single_question called with user_id: {user_id}, topic: {topic}, difficulty: {difficulty}")
     print(f"[PracticeService] get_new_questions called with user_id: {user_id} (generates 1 question)")
 
@@ -381,6 +690,10 @@ def generate_single_question(db: Session, user_id: Optional[str], topic: Optiona
     if api_base:
         llm_params["base_url"] = api_base
 
+    from langchain_openai import ChatOpenAI
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser
+
     llm = ChatOpenAI(**llm_params)
     parser = JsonOutputParser(pydantic_object=GeneratedQuestion)
 
@@ -424,32 +737,7 @@ def generate_single_question(db: Session, user_id: Optional[str], topic: Optiona
 
     if topic and topic.lower() != 'general':
         topic_prompt_addition = f" The question should be related to the topic: '{topic}'."
-        # 查询用户最近回答的10个问题
-    # Convert user_id string to UUID if it's not None
-    user_uuid = None
-    if user_id:
-        try:
-            import uuid
-            user_uuid = uuid.UUID(user_id) if isinstance(user_id, str) else user_id
-        except ValueError:
-            print(f"[PracticeService] Invalid UUID format for user_id: {user_id}")
-            user_uuid = None
-    
-    historical_questions = db.query(models.Question)\
-        .join(models.UserAnswer)\
-        .filter(models.UserAnswer.user_id == user_uuid)\
-        .order_by(models.UserAnswer.answered_at.desc())\
-        .limit(10)\
-        .all()
-    print(f"[PracticeService] Retrieved {len(historical_questions)} historical questions for user {user_id}")
-    historical_sentences_texts = []
-    for q in historical_questions:
-        if q.translation_text:
-            historical_sentences_texts.append(q.translation_text)
-        elif q.question_text and q.correct_answer:
-            # Ensure question_text is a string before calling replace
-            question_text_str = str(q.question_text)
-            historical_sentences_texts.append(f"{question_text_str.replace('____', q.correct_answer)}")
+    historical_sentences_texts = history if history is not None else _recent_question_texts(db, user_id)
 
     if historical_sentences_texts:
         sentences_to_avoid_str = "\n".join([f'- {s}' for s in historical_sentences_texts])
@@ -462,24 +750,36 @@ def generate_single_question(db: Session, user_id: Optional[str], topic: Optiona
         ("human", human_prompt_content)
     ])
 
-    chain = prompt | llm | parser
+    # The parser runs separately so the AIMessage (token usage) is visible to llm_call
+    chain = prompt | llm
 
     print(f"[PracticeService] Invoking Langchain chain to generate 1 question.")
     raw_generated_data: Optional[GeneratedQuestion] = None
     try:
-        raw_generated_data = chain.invoke({})
-        print(f"[PracticeService] Raw generated data from LLM: {raw_generated_data}")
-        if not isinstance(raw_generated_data, GeneratedQuestion):
-            if isinstance(raw_generated_data, dict):
-                try:
-                    raw_generated_data = GeneratedQuestion(**raw_generated_data)
-                    print(f"[PracticeService] Successfully parsed dict into GeneratedQuestion")
-                except Exception as parse_exc:
-                    print(f"[PracticeService] Error parsing dict into GeneratedQuestion: {parse_exc}. Data: {raw_generated_data}")
+        with metrics.llm_call("generate_question", model_name) as call:
+            if history_prompt_addition:
+                call.prompt_variant = "history"
+            message = chain.invoke({})
+            call.set_usage(message)
+            try:
+                raw_generated_data = parser.invoke(message)
+            except Exception:
+                call.parse_failed()
+                raise
+            print(f"[PracticeService] Raw generated data from LLM: {raw_generated_data}")
+            if not isinstance(raw_generated_data, GeneratedQuestion):
+                if isinstance(raw_generated_data, dict):
+                    try:
+                        raw_generated_data = GeneratedQuestion(**raw_generated_data)
+                        print(f"[PracticeService] Successfully parsed dict into GeneratedQuestion")
+                    except Exception as parse_exc:
+                        call.parse_failed()
+                        print(f"[PracticeService] Error parsing dict into GeneratedQuestion: {parse_exc}. Data: {raw_generated_data}")
+                        return None
+                else:
+                    call.parse_failed()
+                    print(f"[PracticeService] LLM did not return a GeneratedQuestion or a parsable dict. Type: {type(raw_generated_data)}")
                     return None
-            else:
-                print(f"[PracticeService] LLM did not return a GeneratedQuestion or a parsable dict. Type: {type(raw_generated_data)}")
-                return None
 
     except Exception as e:
         print(f"[PracticeService] Error generating or parsing question from LLM: {e}")
@@ -550,52 +850,137 @@ def generate_single_question(db: Session, user_id: Optional[str], topic: Optiona
         print(f"[PracticeService] Error committing question to DB: {commit_exc}")
         return None
 
-def submit_answers(db: Session, user_id: str, answers: List[schemas.UserAnswerCreate]) -> List[models.UserAnswer]:
-    """Submits a list of user answers, evaluates them, and stores them in the database."""
-    created_user_answers = []
+# Grading columns of a question never change once it is generated, so keep a bounded
+# in-process copy and skip the questions lookup for recently served questions.
+GRADING_CACHE_SIZE = int(os.getenv("GRADING_CACHE_SIZE", 10000))
+_grading_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_grading_cache_lock = threading.Lock()
+
+def _load_grading_info(db: Session, question_ids) -> Dict[int, tuple]:
+    """Returns (id, type, correct_answer, correct_translation, knowledge_point, topic) per question id.
+
+    Misses are loaded with one IN query; topic is the sentence's grammar_point.
+    """
+    found = {}
+    missing = []
+    with _grading_cache_lock:
+        for question_id in question_ids:
+            info = _grading_cache.get(question_id)
+            if info is None:
+                missing.append(question_id)
+            else:
+                _grading_cache.move_to_end(question_id)
+                found[question_id] = info
+
+    if missing:
+        rows = db.query(
+            models.Question.id,
+            models.Question.type,
+            models.Question.correct_answer,
+            models.Question.correct_translation,
+            models.Question.knowledge_point,
+            models.Sentence.grammar_point.label("topic")
+        ).outerjoin(
+            models.Sentence, models.Question.sentence_id == models.Sentence.id
+        ).filter(models.Question.id.in_(missing)).all()
+        with _grading_cache_lock:
+            for row in rows:
+                found[row.id] = row
+                _grading_cache[row.id] = row
+            while len(_grading_cache) > GRADING_CACHE_SIZE:
+                _grading_cache.popitem(last=False)
+    return found
+
+def _grade_answer(user_id: str, question, answer_data: schemas.UserAnswerCreate) -> dict:
+    """Evaluates one answer against its question and returns the user_answers row to insert."""
+    is_correct = False
+    selected_word_answer = None
+    selected_translation_answer = None
+
+    if question.type == models.QuestionType.WORD_CHOICE:
+        selected_word_answer = answer_data.selected_word_answer
+        is_correct = (selected_word_answer == question.correct_answer)
+    elif question.type == models.QuestionType.TRANSLATION:
+        selected_translation_answer = answer_data.selected_translation_answer
+        if question.correct_translation is not None:
+            is_correct = (selected_translation_answer == question.correct_translation)
+
+    return {
+        "user_id": user_id,
+        "question_id": answer_data.question_id,
+        "selected_word_answer": selected_word_answer,
+        "selected_translation_answer": selected_translation_answer,
+        "is_correct": is_correct,
+        "answered_at": answer_data.answered_at if answer_data.answered_at else datetime.utcnow()
+    }
+
+@tracing.traced()
+def grade_answers(db: Session, user_id: str, answers: List[schemas.UserAnswerCreate]) -> List[dict]:
+    """Grades a set of answers in memory. Answers to unknown questions are dropped."""
+    questions = _load_grading_info(db, {answer_data.question_id for answer_data in answers})
+    rows = []
     for answer_data in answers:
-        question = db.query(models.Question).filter(models.Question.id == answer_data.question_id).first()
+        question = questions.get(answer_data.question_id)
         if not question:
             continue
+        rows.append(_grade_answer(user_id, question, answer_data))
+    return rows
+
+@tracing.traced()
+def store_graded_answers(db: Session, rows: List[dict]) -> List[dict]:
+    """Inserts graded answer rows with a single multi-row INSERT ... RETURNING and updates
+    the per-user rollups in the same transaction. Does not commit."""
+    user_answers = models.UserAnswer.__table__
+    created_user_answers = db.execute(
+        insert(user_answers).returning(*user_answers.c),
+        rows
+    ).mappings().all()
+    # Multi-row INSERT assigns ids in parameter order; sort to return answers in submission order
+    created_user_answers = sorted((dict(row) for row in created_user_answers), key=lambda row: row["id"])
+
+    questions = _load_grading_info(db, {row["question_id"] for row in created_user_answers})
+    practice_stats_service.record_answers(db, created_user_answers, questions)
+    mistake_review_service.record_answers(db, created_user_answers, questions)
+    return created_user_answers
 
-        is_correct = False
-        selected_word_answer = None
-        selected_translation_answer = None
-        
-        if question.type == models.QuestionType.WORD_CHOICE:
-            selected_word_answer = answer_data.selected_word_answer
-            is_correct = (selected_word_answer == question.correct_answer)
-        elif question.type == models.QuestionType.TRANSLATION:
-            selected_translation_answer = answer_data.selected_translation_answer
-            if question.correct_translation is not None:
-                is_correct = (selected_translation_answer == question.correct_translation)
-            else:
-                is_correct = False
-        else:
-            is_correct = False
-
-        db_user_answer_data = {
-            "user_id": user_id,
-            "question_id": answer_data.question_id,
-            "selected_word_answer": selected_word_answer,
-            "selected_translation_answer": selected_translation_answer,
-            "is_correct": is_correct,
-            "answered_at": answer_data.answered_at if answer_data.answered_at else datetime.utcnow()
+def delete_answers(db: Session, user_answers: List[models.UserAnswer]):
+    """Deletes stored answers and removes them from the per-user rollups. Does not commit."""
+    rows = [
+        {
+            "id": ua.id,
+            "user_id": ua.user_id,
+            "question_id": ua.question_id,
+            "is_correct": ua.is_correct,
+            "answered_at": ua.answered_at,
         }
-        
-        db_user_answer = models.UserAnswer(**db_user_answer_data)
-        
-        db.add(db_user_answer)
-        created_user_answers.append(db_user_answer)
+        for ua in user_answers
+    ]
+    questions = _load_grading_info(db, {row["question_id"] for row in rows})
+    practice_stats_service.discard_answers(db, rows, questions)
+    mistake_review_service.discard_answers(db, rows)
+    for ua in user_answers:
+        db.delete(ua)
+
+@tracing.traced()
+def submit_answers(db: Session, user_id: str, answers: List[schemas.UserAnswerCreate]) -> List[dict]:
+    """Submits a list of user answers, evaluates them, and stores them in the database.
+
+    All referenced questions are loaded with one IN query (grading columns only) and the
+    graded answers are written with a single multi-row INSERT ... RETURNING, so the number
+    of round trips does not grow with the size of the set.
+    """
+    rows = grade_answers(db, user_id, answers)
+    if not rows:
+        return []
 
     try:
+        created_user_answers = store_graded_answers(db, rows)
         db.commit()
-        for ua in created_user_answers:
-            db.refresh(ua)
     except Exception as e:
         db.rollback()
+        print(f"[PracticeService] Error storing submitted answers: {e}")
         return []
-        
+
     return created_user_answers
 
 
@@ -0,0 +1,289 @@
+# backend/app/services/practice_stats_service.py
+"""
+Per-user practice statistics rollups.
+
+user_practice_stats holds one row per user (totals plus per-topic and per-knowledge-point
+counts) and user_daily_activity one row per user per UTC day. Both are updated in the
+same transaction that writes the answers (see practice_service.store_graded_answers),
+so /practice/stats reads a primary-key row instead of counting user_answers, and
+/practice/activity (heatmap and streaks) reads a short primary-key range of daily rows.
+`rebuild_user_stats` recomputes them from the raw answers.
+"""
+import copy
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.upsert import upsert_increment
+
+RECENT_DAYS = 7
+MAX_HEATMAP_WEEKS = 53
+
+def answer_day(answered_at: datetime) -> date:
+    """UTC calendar day of an answer timestamp (naive timestamps are already UTC)."""
+    if answered_at.tzinfo is not None:
+        answered_at = answered_at.astimezone(timezone.utc)
+    return answered_at.date()
+
+def _answer_day_column(db: Session):
+    """SQL counterpart of answer_day(): the UTC day of user_answers.answered_at.
+
+    date() on a timestamptz uses the session time zone on PostgreSQL, so convert to UTC
+    first; SQLite stores the timestamps as naive UTC text already.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", models.UserAnswer.answered_at))
+    return func.date(models.UserAnswer.answered_at)
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _bump(counts: Dict[str, dict], key: str, total: int, correct: int):
+    entry = counts.setdefault(key, {"total": 0, "correct": 0})
+    entry["total"] += total
+    entry["correct"] += correct
+    if entry["total"] <= 0:
+        del counts[key]
+
+def _advance_streak(stats: models.UserPracticeStats, days):
+    """Extends the streak with newly active days. Days before last_active_day (backfilled
+    answers) cannot be merged incrementally and are left to rebuild_user_stats."""
+    for day in sorted(days):
+        last = stats.last_active_day
+        if last is not None and day <= last:
+            continue
+        if last is not None and day == last + timedelta(days=1):
+            stats.current_streak = (stats.current_streak or 0) + 1
+        else:
+            stats.current_streak = 1
+        stats.last_active_day = day
+        stats.longest_streak = max(stats.longest_streak or 0, stats.current_streak)
+
+def _lock_stats_row(db: Session, user_id) -> models.UserPracticeStats:
+    """Loads the user's stats row for update, creating it on first use."""
+    stats = db.query(models.UserPracticeStats).filter(
+        models.UserPracticeStats.user_id == user_id
+    ).with_for_update().first()
+    if stats:
+        return stats
+    try:
+        with db.begin_nested():
+            stats = models.UserPracticeStats(
+                user_id=user_id, total_answers=0, correct_answers=0,
+                topic_counts={}, knowledge_point_counts={},
+                current_streak=0, longest_streak=0
+            )
+            db.add(stats)
+    except IntegrityError:
+        # Created concurrently by another submit for the same user
+        stats = db.query(models.UserPracticeStats).filter(
+            models.UserPracticeStats.user_id == user_id
+        ).with_for_update().one()
+    return stats
+
+def _apply(db: Session, rows: List[dict], questions: Dict[int, tuple], sign: int):
+    by_user = defaultdict(list)
+    for row in rows:
+        if row["user_id"] is not None:
+            by_user[row["user_id"]].append(row)
+
+    for user_id, user_rows in by_user.items():
+        stats = _lock_stats_row(db, user_id)
+        # JSON columns only persist on reassignment, so work on copies
+        topic_counts = copy.deepcopy(stats.topic_counts or {})
+        knowledge_point_counts = copy.deepcopy(stats.knowledge_point_counts or {})
+        daily = defaultdict(lambda: [0, 0])
+
+        for row in user_rows:
+            question = questions.get(row["question_id"])
+            correct = sign if row["is_correct"] else 0
+            stats.total_answers += sign
+            stats.correct_answers += correct
+            _bump(topic_counts, (question.topic if question else None) or "general", sign, correct)
+            if question and question.knowledge_point:
+                _bump(knowledge_point_counts, question.knowledge_point, sign, correct)
+            bucket = daily[answer_day(row["answered_at"])]
+            bucket[0] += sign
+            bucket[1] += correct
+
+        stats.topic_counts = topic_counts
+        stats.knowledge_point_counts = knowledge_point_counts
+        if sign > 0:
+            latest = max((row["answered_at"] for row in user_rows), key=_naive_utc)
+            if stats.last_answered_at is None or _naive_utc(latest) > _naive_utc(stats.last_answered_at):
+                stats.last_answered_at = latest
+            _advance_streak(stats, daily.keys())
+
+        if sign > 0:
+            upsert_increment(
+                db, models.UserDailyActivity, ["user_id", "day"],
+                [{"user_id": user_id, "day": day, "total_answers": total, "correct_answers": correct}
+                 for day, (total, correct) in daily.items()],
+                ["total_answers", "correct_answers"]
+            )
+        else:
+            for day, (total, correct) in daily.items():
+                db.query(models.UserDailyActivity).filter(
+                    models.UserDailyActivity.user_id == user_id,
+                    models.UserDailyActivity.day == day
+                ).update({
+                    models.UserDailyActivity.total_answers: models.UserDailyActivity.total_answers + total,
+                    models.UserDailyActivity.correct_answers: models.UserDailyActivity.correct_answers + correct,
+                }, synchronize_session=False)
+    db.flush()
+
+def record_answers(db: Session, rows: List[dict], questions: Dict[int, tuple]):
+    """Adds newly stored answers to their users' rollups. Does not commit."""
+    _apply(db, rows, questions, 1)
+
+def discard_answers(db: Session, rows: List[dict], questions: Dict[int, tuple]):
+    """Removes deleted answers from their users' rollups. Does not commit."""
+    _apply(db, rows, questions, -1)
+
+def _breakdown(counts: Dict[str, dict], label: str) -> List[dict]:
+    items = [
+        {
+            label: key,
+            "total": value["total"],
+            "correct": value["correct"],
+            "accuracy": round(value["correct"] / value["total"] * 100, 2) if value["total"] else 0,
+        }
+        for key, value in (counts or {}).items()
+    ]
+    return sorted(items, key=lambda item: item["total"], reverse=True)
+
+def get_user_stats(db: Session, user_id) -> dict:
+    """Serves /practice/stats from the rollup row plus the last week of daily buckets."""
+    stats = db.get(models.UserPracticeStats, user_id)
+    since = datetime.now(timezone.utc).date() - timedelta(days=RECENT_DAYS)
+    recent_answers = db.query(func.coalesce(func.sum(models.UserDailyActivity.total_answers), 0)).filter(
+        models.UserDailyActivity.user_id == user_id,
+        models.UserDailyActivity.day >= since
+    ).scalar()
+
+    total_answers = stats.total_answers if stats else 0
+    correct_answers = stats.correct_answers if stats else 0
+    accuracy = 0 if total_answers == 0 else (correct_answers / total_answers) * 100
+    return {
+        "total_answers": total_answers,
+        "correct_answers": correct_answers,
+        "accuracy": round(accuracy, 2),  # 保留两位小数
+        "recent_answers": recent_answers,
+        "last_answered_at": stats.last_answered_at.isoformat() if stats and stats.last_answered_at else None,
+        "topics": _breakdown(stats.topic_counts if stats else {}, "topic"),
+        "knowledge_points": _breakdown(stats.knowledge_point_counts if stats else {}, "knowledge_point"),
+    }
+
+def _live_streak(stats: Optional[models.UserPracticeStats], today: date) -> int:
+    """The stored streak only counts while the user was active today or yesterday."""
+    if not stats or not stats.last_active_day or stats.last_active_day < today - timedelta(days=1):
+        return 0
+    return stats.current_streak or 0
+
+def get_user_activity(db: Session, user_id, weeks: int = 12) -> dict:
+    """Daily heatmap for the last `weeks` weeks (starting on a Monday) plus current and longest streak."""
+    weeks = max(1, min(weeks, MAX_HEATMAP_WEEKS))
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=weeks * 7 - 1)
+    start -= timedelta(days=start.weekday())
+
+    buckets = {
+        row.day: row for row in db.query(models.UserDailyActivity).filter(
+            models.UserDailyActivity.user_id == user_id,
+            models.UserDailyActivity.day >= start,
+            models.UserDailyActivity.day <= today
+        )
+    }
+    days = []
+    day = start
+    while day <= today:
+        row = buckets.get(day)
+        total = row.total_answers if row else 0
+        correct = row.correct_answers if row else 0
+        days.append({
+            "day": day.isoformat(),
+            "total": total,
+            "correct": correct,
+            "accuracy": round(correct / total * 100, 2) if total else 0,
+        })
+        day += timedelta(days=1)
+
+    stats = db.get(models.UserPracticeStats, user_id)
+    return {
+        "start_day": start.isoformat(),
+        "end_day": today.isoformat(),
+        "days": days,
+        "active_days": sum(1 for d in days if d["total"] > 0),
+        "current_streak": _live_streak(stats, today),
+        "longest_streak": stats.longest_streak if stats else 0,
+        "last_active_day": stats.last_active_day.isoformat() if stats and stats.last_active_day else None,
+    }
+
+def rebuild_user_stats(db: Session, user_id: Optional[str] = None) -> int:
+    """Recomputes rollups from user_answers for one user, or for every user. Returns the number of users rebuilt."""
+    if user_id:
+        user_ids = [user_id]
+    else:
+        user_ids = [uid for (uid,) in db.query(models.UserAnswer.user_id).filter(
+            models.UserAnswer.user_id.isnot(None)
+        ).distinct()]
+
+    correct_sum = func.sum(case((models.UserAnswer.is_correct == True, 1), else_=0))
+    for uid in user_ids:
+        db.query(models.UserPracticeStats).filter(models.UserPracticeStats.user_id == uid).delete()
+        db.query(models.UserDailyActivity).filter(models.UserDailyActivity.user_id == uid).delete()
+
+        stats = models.UserPracticeStats(
+            user_id=uid, total_answers=0, correct_answers=0,
+            topic_counts={}, knowledge_point_counts={},
+            current_streak=0, longest_streak=0
+        )
+        topic_counts, knowledge_point_counts = {}, {}
+        groups = db.query(
+            models.Sentence.grammar_point,
+            models.Question.knowledge_point,
+            func.count(models.UserAnswer.id),
+            correct_sum,
+            func.max(models.UserAnswer.answered_at)
+        ).join(
+            models.Question, models.UserAnswer.question_id == models.Question.id
+        ).outerjoin(
+            models.Sentence, models.Question.sentence_id == models.Sentence.id
+        ).filter(
+            models.UserAnswer.user_id == uid
+        ).group_by(models.Sentence.grammar_point, models.Question.knowledge_point).all()
+
+        for topic, knowledge_point, total, correct, latest in groups:
+            correct = correct or 0
+            stats.total_answers += total
+            stats.correct_answers += correct
+            _bump(topic_counts, topic or "general", total, correct)
+            if knowledge_point:
+                _bump(knowledge_point_counts, knowledge_point, total, correct)
+            if latest and (stats.last_answered_at is None or latest > stats.last_answered_at):
+                stats.last_answered_at = latest
+        stats.topic_counts = topic_counts
+        stats.knowledge_point_counts = knowledge_point_counts
+        db.add(stats)
+
+        day_col = _answer_day_column(db)
+        active_days = []
+        for day, total, correct in db.query(day_col, func.count(models.UserAnswer.id), correct_sum).filter(
+            models.UserAnswer.user_id == uid
+        ).group_by(day_col).all():
+            if isinstance(day, str):  # SQLite returns date() as text
+                day = date.fromisoformat(day)
+            active_days.append(day)
+            db.add(models.UserDailyActivity(user_id=uid, day=day, total_answers=total, correct_answers=correct or 0))
+        _advance_streak(stats, active_days)
+
+        db.commit()
+        print(f"[PracticeStats] Rebuilt stats for user {uid}: {stats.total_answers} answers")
+    return len(user_ids)
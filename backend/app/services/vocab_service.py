@@ -1,23 +1,104 @@
 # backend/app/services/vocab_service.py
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from .. import models, schemas
+from ..core.pagination import apply_keyset
+from ..core import metrics
+from ..core import tracing
+from ..core import cache_codec, redis_client, serialization, text_search
+
+# Word explanations list every common meaning of the lemma, so they are cached per lemma
+# (lower-cased), not per sentence. Values go through core.cache_codec. Which lemma a form
+# belongs to depends on the sentence ("saw" -> see / saw, "left" -> leave / left), so the
+# form -> lemma resolution the LLM made is cached per (form, sentence) under WORD_LEMMA_PREFIX.
+WORD_CACHE_PREFIX = "word_explanation:lemma:"
+WORD_LEMMA_PREFIX = "word_lemma:"
+WORD_CACHE_SECONDS = int(os.getenv("WORD_EXPLANATION_CACHE_SECONDS", 3600 * 24 * 30))
+
+_word_cache = redis_client.get_sync(decode_responses=False)
+word_codec = cache_codec.codec_for("word_explanation")
+
+# Spaced repetition. Due words come from the (user_id, due_at) index; with VOCAB_DUE_ZSET=1 they
+# are read from a per-user sorted set (score = due timestamp) that is rebuilt from the database
+# when missing, and kept up to date on add / review / delete.
+VOCAB_MASTERED_INTERVAL_DAYS = float(os.getenv("VOCAB_MASTERED_INTERVAL_DAYS", 21))
+VOCAB_DUE_ZSET = os.getenv("VOCAB_DUE_ZSET", "0").lower() in ("1", "true", "yes")
+VOCAB_DUE_ZSET_SECONDS = int(os.getenv("VOCAB_DUE_ZSET_SECONDS", 3600 * 24 * 7))
+VOCAB_DUE_KEY_PREFIX = "vocab:due:"
+MIN_EASE = 1.3
+
+# Search: each candidate query (prefix / substring) is capped, then candidates are ranked in Python.
+# Typo candidates come best-first from the trigram index and need an edit distance each, so fewer are taken.
+VOCAB_SEARCH_MAX_CANDIDATES = int(os.getenv("VOCAB_SEARCH_MAX_CANDIDATES", 200))
+VOCAB_SEARCH_FUZZY_CANDIDATES = int(os.getenv("VOCAB_SEARCH_FUZZY_CANDIDATES", 50))
+VOCAB_SEARCH_FUZZY_MIN_LENGTH = 4
+
+# Only touch a user's set if it exists, so a single ZADD never passes for the whole queue
+_ZADD_IF_EXISTS = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('zadd', KEYS[1], ARGV[1], ARGV[2])
+end
+return 0
+"""
+
+
+def _word_cache_key(lemma: str) -> str:
+    return f"{WORD_CACHE_PREFIX}{lemma.strip().lower()}"
+
+
+def _lemma_cache_key(word: str, sentence: Optional[str]) -> str:
+    context = " ".join((sentence or "").split()).lower()
+    digest = hashlib.sha1(context.encode("utf-8")).hexdigest()[:16]
+    return f"{WORD_LEMMA_PREFIX}{word.strip().lower()}:{digest}"
+
+
+def _decode_explanation(payload) -> Optional[schemas.WordExplanation]:
+    payload = word_codec.decode(payload)
+    return schemas.WordExplanation.model_validate_json(payload) if payload else None
+
+
+def _get_cached_explanation(word: str, sentence: Optional[str]) -> Optional[schemas.WordExplanation]:
+    try:
+        lemma = _word_cache.get(_lemma_cache_key(word, sentence))
+        return _decode_explanation(_word_cache.get(_word_cache_key(lemma.decode("utf-8")))) if lemma else None
+    except Exception as e:
+        print(f"[VocabService] Error reading cached explanation for {word}: {e}")
+        return None
+
+
+async def get_cached_explanation_async(word: str, sentence: Optional[str] = None) -> Optional[schemas.WordExplanation]:
+    """Cached explanation via the async Redis client, so a hit never blocks the event loop."""
+    try:
+        client = redis_client.get_async(decode_responses=False)
+        lemma = await client.get(_lemma_cache_key(word, sentence))
+        return _decode_explanation(await client.get(_word_cache_key(lemma.decode("utf-8")))) if lemma else None
+    except Exception as e:
+        print(f"[VocabService] Error reading cached explanation for {word}: {e}")
+        return None
+
+
+def _cache_explanation(word: str, sentence: Optional[str], explanation: schemas.WordExplanation):
+    try:
+        lemma = explanation.word.strip().lower() or word.strip().lower()
+        payload = serialization.dumps(explanation.model_dump(mode='json'))
+        pipe = _word_cache.pipeline(transaction=False)
+        pipe.setex(_word_cache_key(lemma), WORD_CACHE_SECONDS, word_codec.encode(payload))
+        pipe.setex(_lemma_cache_key(word, sentence), WORD_CACHE_SECONDS, lemma.encode("utf-8"))
+        pipe.execute()
+    except Exception as e:
+        print(f"[VocabService] Error caching explanation for {word}: {e}")
+
 
 def add_vocab_entry(db: Session, user_id: str, vocab_data: schemas.UserVocabCreate) -> models.UserVocab:
     """
     Add a new vocabulary entry for a user
     """
-    # Check if the word already exists for this user
-    existing_entry = db.query(models.UserVocab).filter(
-        models.UserVocab.user_id == user_id,
-        models.UserVocab.word == vocab_data.word
-    ).first()
-    
-    if existing_entry:
-        raise ValueError(f"Word '{vocab_data.word}' already exists in vocabulary")
-    
-    # Create new vocabulary entry
+    # Create new vocabulary entry; the unique (user_id, word) index rejects duplicates
     db_vocab = models.UserVocab(
         user_id=user_id,
         word=vocab_data.word,
@@ -28,13 +109,30 @@ def add_vocab_entry(db: Session, user_id: str, vocab_data: schemas.UserVocabCrea
     )
     
     db.add(db_vocab)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        # Only the unique (user_id, word) index means "already there"; other violations
+        # (e.g. an unknown sentence_id on PostgreSQL) propagate
+        if get_vocab_entry_by_word(db, user_id=user_id, word=vocab_data.word):
+            raise ValueError(f"Word '{vocab_data.word}' already exists in vocabulary")
+        raise
     db.refresh(db_vocab)
+    _update_due_zset(db_vocab)
     
     return db_vocab
 
-def get_user_vocab_entries(db: Session, user_id: str, skip: int = 0, limit: int = 100) -> List[models.UserVocab]:
-    return db.query(models.UserVocab).filter(models.UserVocab.user_id == user_id).offset(skip).limit(limit).all()
+def get_user_vocab_entries(db: Session, user_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.UserVocab]:
+    """
+    List a user's vocabulary in (added_at, id) order.
+    Pass the `cursor` of the previous page for keyset pagination; `skip` is kept for compatibility only.
+    """
+    query = db.query(models.UserVocab).filter(models.UserVocab.user_id == user_id)
+    query = apply_keyset(query, models.UserVocab.added_at, models.UserVocab.id, cursor, descending=False)
+    if not cursor and skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def get_vocab_entry_by_id(db: Session, vocab_id: str, user_id: str) -> Optional[models.UserVocab]:
     return db.query(models.UserVocab).filter(models.UserVocab.id == vocab_id, models.UserVocab.user_id == user_id).first()
@@ -69,20 +167,214 @@ def delete_vocab_entry(db: Session, vocab_id: str, user_id: str) -> bool:
     if db_vocab_entry:
         db.delete(db_vocab_entry)
         db.commit()
+        _remove_from_due_zset(user_id, vocab_id)
         return True
     return False
 
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions), or limit + 1 if larger."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _rank_search_hit(word: str, in_definition: bool, term: str):
+    """(match, sort key) for a candidate, or None if it does not match closely enough."""
+    word = word.lower()
+    if word == term:
+        return "exact", (0, 0, len(word))
+    if word.startswith(term):
+        return "prefix", (1, 0, len(word))
+    position = word.find(term)
+    if position >= 0:
+        return "substring", (2, position, len(word))
+    if len(term) >= VOCAB_SEARCH_FUZZY_MIN_LENGTH:
+        limit = 1 if len(term) < 7 else 2
+        distance = _edit_distance(term, word, limit)
+        if distance <= limit:
+            return "fuzzy", (3, distance, len(word))
+        # a typo in the first letters of a longer word, e.g. "recieve" -> "receiver"
+        distance = _edit_distance(term, word[:len(term)], limit)
+        if distance <= limit:
+            return "fuzzy", (4, distance, len(word))
+    if in_definition:
+        return "definition", (5, 0, len(word))
+    return None
+
+def search_vocab_entries(db: Session, user_id: str, q: str, skip: int = 0, limit: int = 20) -> List[Tuple[models.UserVocab, str]]:
+    """
+    Search a user's words by prefix, substring (word or definition) and, for terms of 4+ characters,
+    with typo tolerance. Returns (entry, match) pairs, best first:
+    exact < prefix < substring < fuzzy < definition, then by position / distance and word length.
+
+    Candidates are collected as (id, word) through indexes, ranked here, and only the requested
+    page is loaded as full rows.
+    """
+    term = " ".join(q.split()).lower()
+    if not term:
+        return []
+    UserVocab = models.UserVocab
+    base = db.query(UserVocab.id, UserVocab.word).filter(UserVocab.user_id == user_id)
+    words, in_definition = {}, set()
+    # Prefix: a range scan on the unique (user_id, word) index
+    for prefix in {term, " ".join(q.split())}:
+        words.update(base.filter(UserVocab.word >= prefix, UserVocab.word < prefix + "\U0010ffff")
+                     .order_by(UserVocab.word).limit(VOCAB_SEARCH_MAX_CANDIDATES).all())
+    # Substrings, through the trigram index
+    words.update(base.filter(text_search.contains(db, UserVocab.word, term)).limit(VOCAB_SEARCH_MAX_CANDIDATES).all())
+    definition_hits = base.filter(text_search.contains(db, UserVocab.definition, term)).limit(VOCAB_SEARCH_MAX_CANDIDATES).all()
+    words.update(definition_hits)
+    in_definition.update(vocab_id for vocab_id, _ in definition_hits)
+    # Typos: the words sharing the most trigrams with the term
+    if len(term) >= VOCAB_SEARCH_FUZZY_MIN_LENGTH:
+        neighbours = text_search.similar(db, UserVocab.word, term)
+        words.update(base.join(neighbours, neighbours.c.id == UserVocab.id)
+                     .order_by(neighbours.c.score.desc()).limit(VOCAB_SEARCH_FUZZY_CANDIDATES).all())
+
+    ranked = []
+    for vocab_id, word in words.items():
+        hit = _rank_search_hit(word, vocab_id in in_definition, term)
+        if hit:
+            ranked.append((hit[1], vocab_id, hit[0]))
+    ranked.sort()
+    page = ranked[skip:skip + limit]
+    entries = {entry.id: entry for entry in db.query(UserVocab).filter(UserVocab.id.in_([vocab_id for _, vocab_id, _ in page]))} if page else {}
+    return [(entries[vocab_id], match) for _, vocab_id, match in page if vocab_id in entries]
+
+def schedule_review(entry: models.UserVocab, grade: int, now: datetime) -> models.UserVocab:
+    """
+    Apply one SM-2 review with recall quality `grade` (0-5) to `entry` and set its next due time.
+    A grade below 3 is a lapse: the word starts over with a one-day interval.
+    """
+    ease = entry.ease if entry.ease is not None else 2.5
+    repetitions = entry.repetitions or 0
+    if grade < 3:
+        repetitions = 0
+        interval = 1.0
+        entry.lapses = (entry.lapses or 0) + 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1.0
+        elif repetitions == 2:
+            interval = 6.0
+        else:
+            interval = round((entry.interval_days or 1.0) * ease, 1)
+    entry.ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    entry.repetitions = repetitions
+    entry.interval_days = interval
+    entry.last_reviewed_at = now
+    entry.due_at = now + timedelta(days=interval)
+    if grade < 3 or interval < VOCAB_MASTERED_INTERVAL_DAYS:
+        entry.status = models.VocabStatus.LEARNING
+    else:
+        entry.status = models.VocabStatus.MASTERED
+    return entry
+
+def review_vocab_entry(db: Session, vocab_id: str, user_id: str, grade: int) -> Optional[models.UserVocab]:
+    """Record a review of one of the user's words (primary-key lookup + single-row update)."""
+    db_vocab_entry = get_vocab_entry_by_id(db, vocab_id=vocab_id, user_id=user_id)
+    if db_vocab_entry:
+        schedule_review(db_vocab_entry, grade, datetime.now(timezone.utc))
+        db.commit()
+        db.refresh(db_vocab_entry)
+        _update_due_zset(db_vocab_entry)
+    return db_vocab_entry
+
+def get_due_vocab_entries(db: Session, user_id: str, limit: int = 20) -> List[models.UserVocab]:
+    """The user's words whose due_at has passed, most overdue first."""
+    now = datetime.now(timezone.utc)
+    if VOCAB_DUE_ZSET:
+        ids = _due_ids_from_zset(db, user_id, now, limit)
+        if ids is not None:
+            if not ids:
+                return []
+            rows = {row.id: row for row in db.query(models.UserVocab).filter(
+                models.UserVocab.user_id == user_id, models.UserVocab.id.in_(ids))}
+            return [rows[vocab_id] for vocab_id in ids if vocab_id in rows]
+    return db.query(models.UserVocab).filter(
+        models.UserVocab.user_id == user_id,
+        models.UserVocab.due_at <= now
+    ).order_by(models.UserVocab.due_at.asc(), models.UserVocab.id.asc()).limit(limit).all()
+
+def _due_key(user_id) -> str:
+    return f"{VOCAB_DUE_KEY_PREFIX}{user_id}"
+
+def _timestamp(value: datetime) -> float:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+def _due_ids_from_zset(db: Session, user_id: str, now: datetime, limit: int) -> Optional[List[int]]:
+    """Due entry ids from the user's sorted set, building it first if needed; None if Redis is unavailable."""
+    key = _due_key(user_id)
+    client = redis_client.get_sync()
+    try:
+        if not client.exists(key):
+            rows = db.query(models.UserVocab.id, models.UserVocab.due_at).filter(
+                models.UserVocab.user_id == user_id, models.UserVocab.due_at.isnot(None)).all()
+            if rows:
+                pipe = client.pipeline(transaction=True)
+                # NX: entries reviewed while we were reading keep the score they were given
+                pipe.zadd(key, {str(row.id): _timestamp(row.due_at) for row in rows}, nx=True)
+                pipe.expire(key, VOCAB_DUE_ZSET_SECONDS)
+                pipe.execute()
+        return [int(member) for member in client.zrangebyscore(key, "-inf", now.timestamp(), start=0, num=limit)]
+    except Exception as e:
+        print(f"[VocabService] Due-word set unavailable for user {user_id}, using the database: {e}")
+        return None
+
+def _update_due_zset(entry: models.UserVocab):
+    if not VOCAB_DUE_ZSET or entry.due_at is None:
+        return
+    try:
+        redis_client.get_sync().eval(_ZADD_IF_EXISTS, 1, _due_key(entry.user_id), _timestamp(entry.due_at), str(entry.id))
+    except Exception as e:
+        print(f"[VocabService] Error updating due-word set for user {entry.user_id}: {e}")
+
+def reset_due_zset(user_id):
+    """Drop the user's due-word set after bulk changes; the next due query rebuilds it."""
+    if not VOCAB_DUE_ZSET:
+        return
+    try:
+        redis_client.get_sync().delete(_due_key(user_id))
+    except Exception as e:
+        print(f"[VocabService] Error resetting due-word set for user {user_id}: {e}")
+
+def _remove_from_due_zset(user_id: str, vocab_id):
+    if not VOCAB_DUE_ZSET:
+        return
+    try:
+        redis_client.get_sync().zrem(_due_key(user_id), str(vocab_id))
+    except Exception as e:
+        print(f"[VocabService] Error updating due-word set for user {user_id}: {e}")
+
+@tracing.traced()
 def get_word_explanation(db: Session, word: str, sentence:str) -> schemas.WordExplanation:
     """
     Get explanation for a specific word using LLM with JSON mode structured outputs.
     Calls OpenAI/OpenRouter to generate word explanations in the specified format.
+    Successful explanations are cached per lemma, the resolved lemma per (word, sentence);
+    the fallback reply is not cached.
     """
-    import os
     import json
     from langchain_openai import ChatOpenAI
     from langchain_core.prompts import ChatPromptTemplate
     from typing import List, Dict, Any
     
+    cached = _get_cached_explanation(word, sentence)
+    if cached:
+        return cached
+
     try:
         # Get OpenAI configurations from environment variables
         api_key = os.getenv("OPENAI_API_KEY_WORD")
@@ -131,8 +423,9 @@ def get_word_explanation(db: Session, word: str, sentence:str) -> schemas.WordEx
         }
         
         # Setup LLM with JSON mode
+        model_name = "openai/gpt-4o-mini"
         llm_params = {
-            "model": "openai/gpt-4o-mini",
+            "model": model_name,
             "temperature": 0.3,
             "api_key": api_key,
             "model_kwargs": {
@@ -226,18 +519,24 @@ def get_word_explanation(db: Session, word: str, sentence:str) -> schemas.WordEx
         
         # Generate explanation
         print(f"[VocabService] Generating explanation for word: {word}")
-        result = chain.invoke({
-            "word": word,
-            "sentence": sentence
-        })
-        
-        print(f"[VocabService] LLM result: {result}")
-        
-        # Parse JSON response
-        if hasattr(result, 'content'):
-            result_data = json.loads(result.content)
-        else:
-            result_data = result
+        with metrics.llm_call("word_explanation", model_name) as call:
+            result = chain.invoke({
+                "word": word,
+                "sentence": sentence
+            })
+            call.set_usage(result)
+            
+            print(f"[VocabService] LLM result: {result}")
+            
+            # Parse JSON response
+            try:
+                if hasattr(result, 'content'):
+                    result_data = json.loads(result.content)
+                else:
+                    result_data = result
+            except ValueError:
+                call.parse_failed()
+                raise
         
         # Convert to our schema format
         definitions_data = []
@@ -247,11 +546,13 @@ def get_word_explanation(db: Session, word: str, sentence:str) -> schemas.WordEx
                 "meanings": definition.get("meanings", [])
             })
         
-        return schemas.WordExplanation(
+        explanation = schemas.WordExplanation(
             word=result_data.get("word", word),
             phonetic=result_data.get("phonetic"),
             definitions=definitions_data
         )
+        _cache_explanation(word, sentence, explanation)
+        return explanation
         
     except Exception as e:
         print(f"[VocabService] Error generating word explanation: {e}")
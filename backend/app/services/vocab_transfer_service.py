@@ -0,0 +1,314 @@
+# backend/app/services/vocab_transfer_service.py
+"""
+Bulk vocabulary import and export.
+
+Formats (same fields for import and export, see EXPORT_COLUMNS; only `word` is required):
+
+    csv     header row, then one word per row
+    ndjson  one JSON object per line
+    anki    Anki "Notes in Plain Text": front <TAB> back [<TAB> tags], with optional
+            "#separator:", "#html:" and "#... column:" header lines. front is the word;
+            back is the definition, optionally preceded by a /phonetic/
+
+Imports are parsed line by line as the request body arrives and written in batches
+of VOCAB_IMPORT_BATCH_SIZE, one INSERT ... ON CONFLICT (user_id, word) per batch
+(core.upsert), each batch in its own transaction. Words the user already has are
+skipped, or with update=True get their phonetic / definition filled in from the
+file; learning status and review schedule of existing words are never overwritten.
+
+Exports page through the (user_id, added_at, id) index on a read session and yield
+each page as soon as it is read, so memory stays flat however large the list is.
+"""
+import codecs
+import csv
+import io
+import os
+import re
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core import pagination, serialization
+from ..core.upsert import upsert_rows
+from ..db import get_read_session
+from . import vocab_service
+
+VOCAB_IMPORT_BATCH_SIZE = int(os.getenv("VOCAB_IMPORT_BATCH_SIZE", 1000))
+VOCAB_IMPORT_MAX_ROWS = int(os.getenv("VOCAB_IMPORT_MAX_ROWS", 100_000))
+VOCAB_EXPORT_PAGE_SIZE = int(os.getenv("VOCAB_EXPORT_PAGE_SIZE", 1000))
+MAX_REPORTED_ERRORS = 20
+MAX_WORD_LENGTH = 100
+
+FORMATS = ("csv", "ndjson", "anki")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "anki": "text/plain; charset=utf-8",
+}
+FILE_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "anki": "txt"}
+
+EXPORT_COLUMNS = ["word", "phonetic", "definition", "status", "added_at", "due_at", "interval_days", "ease",
+                  "repetitions", "lapses", "last_reviewed_at"]
+# Columns an import may overwrite on an existing word (update=True), and only with non-empty values
+UPDATE_COLUMNS = ["phonetic", "definition"]
+
+_DATETIME_COLUMNS = ("added_at", "due_at", "last_reviewed_at")
+_NUMBER_COLUMNS = {"interval_days": float, "ease": float, "repetitions": int, "lapses": int}
+_ANKI_SEPARATORS = {"tab": "\t", "comma": ",", "semicolon": ";", "space": " ", "pipe": "|", "colon": ":"}
+_HTML_TAG = re.compile(r"<[^>]+>")
+_LEADING_PHONETIC = re.compile(r"^\s*(/[^/]+/|\[[^\]]+\])\s*")
+
+
+def format_from_content_type(content_type: Optional[str]) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        return "ndjson"
+    if content_type in ("text/plain", "text/tab-separated-values"):
+        return "anki"
+    return "csv"
+
+
+# ---------- import ----------
+
+class _CsvRows:
+    """CSV records from lines; a quoted field may span several lines."""
+
+    def __init__(self):
+        self.header: Optional[List[str]] = None
+        self.pending = ""
+
+    def feed(self, line: str) -> Optional[Dict]:
+        self.pending = f"{self.pending}\n{line}" if self.pending else line
+        if self.pending.count('"') % 2:
+            return None  # inside a quoted field
+        record, self.pending = self.pending, ""
+        if not record.strip():
+            return None
+        values = next(csv.reader([record]))
+        if self.header is None:
+            self.header = [name.strip().lower() for name in values]
+            if "word" not in self.header:
+                raise ValueError("CSV header has no 'word' column")
+            return None
+        return dict(zip(self.header, values))
+
+
+class _NdjsonRows:
+    def feed(self, line: str) -> Optional[Dict]:
+        if not line.strip():
+            return None
+        row = serialization.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError("expected a JSON object")
+        return row
+
+
+class _AnkiRows:
+    def __init__(self):
+        self.separator = "\t"
+        self.html = False
+        self.skip_columns = set()  # 0-based notetype / deck / tags / guid columns
+
+    def feed(self, line: str) -> Optional[Dict]:
+        if line.startswith("#"):
+            self._header(line[1:])
+            return None
+        if not line.strip():
+            return None
+        fields = [field for i, field in enumerate(line.split(self.separator)) if i not in self.skip_columns]
+        if self.html:
+            fields = [_HTML_TAG.sub(" ", field).replace("&nbsp;", " ") for field in fields]
+        row = {"word": fields[0]}
+        back = fields[1].strip() if len(fields) > 1 else ""
+        phonetic = _LEADING_PHONETIC.match(back)
+        if phonetic:
+            row["phonetic"] = phonetic.group(1)
+            back = back[phonetic.end():]
+        row["definition"] = back
+        return row
+
+    def _header(self, header: str):
+        key, _, value = header.partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "separator":
+            self.separator = _ANKI_SEPARATORS.get(value.lower(), value[:1] or "\t")
+        elif key == "html":
+            self.html = value.lower() == "true"
+        elif key.endswith(" column") and value.isdigit():
+            self.skip_columns.add(int(value) - 1)
+
+
+_PARSERS = {"csv": _CsvRows, "ndjson": _NdjsonRows, "anki": _AnkiRows}
+
+
+def _normalize(raw: Dict, user_id: UUID, now: datetime) -> Dict:
+    """A parsed record -> a complete user_vocab row. Raises ValueError for unusable records."""
+    word = " ".join(str(raw.get("word") or "").split())
+    if not word:
+        raise ValueError("missing word")
+    if len(word) > MAX_WORD_LENGTH:
+        raise ValueError(f"word longer than {MAX_WORD_LENGTH} characters")
+    row = {
+        "user_id": user_id,
+        "word": word,
+        "phonetic": str(raw.get("phonetic") or "").strip() or None,
+        "definition": str(raw.get("definition") or "").strip() or None,
+        "status": models.VocabStatus.NEW,
+        "sentence_id": None,
+        "added_at": now,
+        "due_at": now,
+        "interval_days": 0.0,
+        "ease": 2.5,
+        "repetitions": 0,
+        "lapses": 0,
+        "last_reviewed_at": None,
+    }
+    if raw.get("status"):
+        try:
+            row["status"] = models.VocabStatus(str(raw["status"]).strip().lower())
+        except ValueError:
+            raise ValueError(f"unknown status {raw['status']!r}")
+    for column in _DATETIME_COLUMNS:
+        if raw.get(column):
+            value = datetime.fromisoformat(str(raw[column]).strip())
+            row[column] = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    for column, cast in _NUMBER_COLUMNS.items():
+        if raw.get(column) not in (None, ""):
+            row[column] = cast(raw[column])
+    return row
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream (UTF-8, optional BOM) into lines without the line terminator."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def _write_batch(db: Session, rows: List[Dict], update: bool) -> int:
+    try:
+        written = upsert_rows(db, models.UserVocab, ["user_id", "word"], rows, update=UPDATE_COLUMNS if update else ())
+        db.commit()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+
+
+async def import_vocab(db: Session, user_id: UUID, chunks: AsyncIterator[bytes], fmt: str = "csv",
+                       update: bool = False) -> Dict:
+    """Stream-parse an upload and upsert its words for `user_id`; returns the import summary."""
+    parser = _PARSERS[fmt]()
+    now = datetime.now(timezone.utc)
+    summary = {"format": fmt, "rows": 0, "imported": 0, "skipped": 0, "invalid": 0, "truncated": False, "errors": []}
+    batch: Dict[str, Dict] = {}
+
+    async def flush():
+        if batch:
+            written = await run_in_threadpool(_write_batch, db, list(batch.values()), update)
+            summary["imported"] += written
+            summary["skipped"] += len(batch) - written
+            batch.clear()
+
+    line_number = 0
+    async for line in _lines(chunks):
+        line_number += 1
+        try:
+            raw = parser.feed(line)
+            if raw is None:
+                continue
+            row = _normalize(raw, user_id, now)
+        except (ValueError, TypeError) as e:
+            summary["invalid"] += 1
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"line": line_number, "error": str(e)})
+            if fmt == "csv" and parser.header is None:
+                break  # without a usable header nothing else can be read
+            continue
+        if summary["rows"] >= VOCAB_IMPORT_MAX_ROWS:
+            summary["truncated"] = True
+            break
+        summary["rows"] += 1
+        if row["word"] in batch:
+            summary["skipped"] += 1  # repeated in the file: the first occurrence wins
+            continue
+        batch[row["word"]] = row
+        if len(batch) >= VOCAB_IMPORT_BATCH_SIZE:
+            await flush()
+    await flush()
+
+    if summary["imported"]:
+        vocab_service.reset_due_zset(user_id)
+    print(f"[VocabTransfer] Imported {summary['imported']}/{summary['rows']} {fmt} rows for user {user_id} "
+          f"({summary['skipped']} skipped, {summary['invalid']} invalid)")
+    return summary
+
+
+# ---------- export ----------
+
+def _export_pages(user_id: UUID, subject: Optional[str]) -> Iterator[List]:
+    db = get_read_session(subject)
+    try:
+        columns = [getattr(models.UserVocab, name) for name in EXPORT_COLUMNS] + [models.UserVocab.id]
+        cursor = None
+        while True:
+            query = db.query(*columns).filter(models.UserVocab.user_id == user_id)
+            query = pagination.apply_keyset(query, models.UserVocab.added_at, models.UserVocab.id, cursor, descending=False)
+            page = query.limit(VOCAB_EXPORT_PAGE_SIZE).all()
+            if not page:
+                return
+            yield page
+            if len(page) < VOCAB_EXPORT_PAGE_SIZE:
+                return
+            cursor = pagination.encode_cursor(page[-1].added_at, page[-1].id)
+    finally:
+        db.close()
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, models.VocabStatus):
+        return value.value
+    return value
+
+
+def _anki_field(value: Optional[str]) -> str:
+    return " ".join((value or "").split())
+
+
+def export_vocab(user_id: UUID, fmt: str = "csv", subject: Optional[str] = None) -> Iterator[bytes]:
+    """Yield the user's vocabulary in `fmt`, one encoded page at a time."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode("utf-8")
+    elif fmt == "anki":
+        yield b"#separator:tab\n#html:false\n#tags column:3\n"
+    for page in _export_pages(user_id, subject):
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in page:
+                writer.writerow([_export_value(getattr(row, name)) for name in EXPORT_COLUMNS])
+            yield buffer.getvalue().encode("utf-8")
+        elif fmt == "ndjson":
+            yield b"".join(serialization.dumps({name: _export_value(getattr(row, name)) for name in EXPORT_COLUMNS}) + b"\n"
+                           for row in page)
+        else:
+            lines = []
+            for row in page:
+                back = " ".join(part for part in (_anki_field(row.phonetic), _anki_field(row.definition)) if part)
+                lines.append(f"{_anki_field(row.word)}\t{back}\taienglish::{row.status.value}\n")
+            yield "".join(lines).encode("utf-8")
@@ -0,0 +1,86 @@
+# backend/bench/bench_import_time.py
+"""
+Cold-start check: time `import app.main` with `python -X importtime` in fresh interpreters.
+
+Reports the median total and the slowest top-level packages, and fails (exit 1) when
+- the median exceeds --max-ms,
+- a module that should load lazily (langchain, openai by default) is imported, or
+- importing the app touched the database (it must not run DDL or connect on import).
+
+    cd backend && python bench/bench_import_time.py --runs 5 --max-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_FORBIDDEN = ("langchain", "langchain_core", "langchain_openai", "openai")
+
+
+def _import_once(database_path: Path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"import app.main failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        if self_us.isdigit():
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median import time is above this")
+    parser.add_argument("--top", type=int, default=10, help="how many top-level packages to list")
+    parser.add_argument("--forbid", nargs="*", default=list(DEFAULT_FORBIDDEN),
+                        help="top-level modules that must not be imported by app.main")
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="bench_import_"))
+    database_path = tmp_dir / "import.db"
+    totals, runs = [], []
+    for _ in range(args.runs):
+        modules = _import_once(database_path)
+        totals.append(modules["app.main"][1] / 1000)
+        runs.append(modules)
+
+    # Self time summed per top-level package, from the median run
+    median_run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    per_package = defaultdict(int)
+    for name, (self_us, _) in median_run.items():
+        per_package[name.split(".")[0]] += self_us
+
+    median = statistics.median(totals)
+    print(f"import app.main: median {median:.0f} ms, min {min(totals):.0f} ms, max {max(totals):.0f} ms over {args.runs} runs\n")
+    print(f"{'package':<28} {'self ms':>8}")
+    for package, self_us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<28} {self_us / 1000:>8.1f}")
+
+    failures = []
+    loaded = sorted({name for name in median_run if name.split(".")[0] in args.forbid})
+    if loaded:
+        failures.append(f"modules that should load lazily were imported: {', '.join(loaded[:10])}")
+    if database_path.exists() and database_path.stat().st_size > 0:
+        failures.append(f"importing the app wrote to the database ({database_path})")
+    if args.max_ms is not None and median > args.max_ms:
+        failures.append(f"median import time {median:.0f} ms is above the {args.max_ms:.0f} ms budget")
+
+    if failures:
+        print("\nFAIL: " + "\nFAIL: ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# backend/bench/bench_pagination.py
+"""
+Deep-page latency: OFFSET vs keyset (cursor) pagination over user_answers.
+
+Seeds a throwaway SQLite database with one user's answer history and times
+fetching a page at increasing depths with both strategies.
+
+    cd backend && python bench/bench_pagination.py --answers 200000 --page-size 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_pagination_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+    from app.db import SessionLocal, engine, init_db
+    from app import models
+    from app.core import pagination
+
+    init_db()
+    user_id = uuid.uuid4()
+    db = SessionLocal()
+    sentence = models.Sentence(text="Benchmark sentence.", translation="基准句子。")
+    db.add(sentence)
+    db.flush()
+    question = models.Question(
+        sentence_id=sentence.id, type=models.QuestionType.WORD_CHOICE,
+        options=["a", "b", "c", "d"], correct_answer="a", order=1,
+    )
+    db.add(question)
+    db.flush()
+
+    print(f"Seeding {args.answers} answers into {tmp_dir}/bench.db ...")
+    start = datetime.utcnow() - timedelta(days=365)
+    rows = [
+        {
+            "user_id": user_id,
+            "question_id": question.id,
+            "selected_word_answer": "b",
+            "is_correct": i % 3 == 0,
+            "answered_at": start + timedelta(seconds=i * 7),
+        }
+        for i in range(args.answers)
+    ]
+    db.execute(models.UserAnswer.__table__.insert(), rows)
+    db.commit()
+
+    def base_query():
+        return db.query(models.UserAnswer).filter(models.UserAnswer.user_id == user_id)
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best * 1000
+
+    # Walk the whole history once with cursors, remembering the cursor at each depth
+    cursors = {0: None}
+    cursor = None
+    depth = 0
+    while True:
+        page = pagination.apply_keyset(base_query(), models.UserAnswer.answered_at, models.UserAnswer.id, cursor) \
+            .limit(args.page_size).all()
+        if len(page) < args.page_size:
+            break
+        depth += len(page)
+        cursor = pagination.encode_cursor(page[-1].answered_at, page[-1].id)
+        cursors[depth] = cursor
+        db.expunge_all()
+
+    depths = sorted(set([0] + [d for d in cursors if d >= args.page_size and _is_checkpoint(d, args.page_size)] + [max(cursors)]))
+
+    print(f"{'depth':>10} {'offset ms':>12} {'cursor ms':>12}")
+    for d in depths:
+        offset_ms = timed(lambda: base_query().order_by(models.UserAnswer.answered_at.desc(), models.UserAnswer.id.desc())
+                          .offset(d).limit(args.page_size).all())
+        cursor_ms = timed(lambda: pagination.apply_keyset(base_query(), models.UserAnswer.answered_at,
+                                                          models.UserAnswer.id, cursors[d]).limit(args.page_size).all())
+        db.expunge_all()
+        print(f"{d:>10} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+
+    db.close()
+    engine.dispose()
+
+
+def _is_checkpoint(depth: int, page_size: int) -> bool:
+    pages = depth // page_size
+    return pages & (pages - 1) == 0
+
+
+if __name__ == "__main__":
+    main()
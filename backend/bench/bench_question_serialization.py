@@ -0,0 +1,97 @@
+# backend/bench/bench_question_serialization.py
+"""
+CPU cost of serving a practice question, per request, excluding Redis and the network.
+
+Compares what /practice/set/new used to do with what it does now:
+
+    hit,  before: json.loads the cached string, validate it against response_model
+                  (QuestionRead + nested SentenceRead), jsonable_encoder, JSONResponse
+    hit,  after:  RawJSONResponse over the cached string as is
+    miss, before: QuestionRead.model_validate(ORM object) -> model_dump -> FastAPI response path
+    miss, after:  QuestionRead.model_validate(ORM object) -> model_dump -> orjson -> RawJSONResponse
+
+    cd backend && python bench/bench_question_serialization.py --iterations 20000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _question():
+    from app import models
+
+    sentence = models.Sentence(
+        id=42, text="Although the festival had been debated for years, the committee finally reached an agreement last week.",
+        translation="尽管这个节日已经争论了多年，委员会终于在上个星期达成了一致。", grammar_point="concessive clauses",
+    )
+    return models.Question(
+        id=7, sentence_id=42, sentence=sentence, type=models.QuestionType.WORD_CHOICE,
+        question_text="____ the festival had been debated for years, the committee finally reached an agreement last week.",
+        options=["Although", "Because", "Unless", "Whereas"], correct_answer="Although",
+        explanation="Although 引导让步状语从句，表示“尽管”。句子前后语义相反，因此选择 Although。",
+        translation_text=sentence.text,
+        translation_options=["尽管这个节日已经争论了多年，委员会终于在上个星期达成了一致。",
+                             "因为这个节日争论了多年，委员会上个星期才开始讨论。",
+                             "除非这个节日再争论多年，委员会不会在上个星期达成一致。"],
+        correct_translation="尽管这个节日已经争论了多年，委员会终于在上个星期达成了一致。",
+        knowledge_point="concessive clauses", difficulty="medium", order=1,
+    )
+
+
+def _measure(fn, iterations: int) -> float:
+    """CPU microseconds per call."""
+    for _ in range(min(1000, iterations)):
+        fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+
+    from app import schemas
+    from app.core import serialization
+
+    question = _question()
+    response_model = TypeAdapter(schemas.QuestionRead)
+    legacy_cached = json.dumps(schemas.QuestionRead.model_validate(question).model_dump(mode='json'), ensure_ascii=False)
+    cached = serialization.dumps(schemas.QuestionRead.model_validate(question).model_dump(mode='json')).decode("utf-8")
+    assert json.loads(legacy_cached) == json.loads(cached)
+
+    def hit_before():
+        payload = json.loads(legacy_cached)
+        return JSONResponse(jsonable_encoder(response_model.validate_python(payload))).body
+
+    def hit_after():
+        return serialization.RawJSONResponse(cached).body
+
+    def miss_before():
+        payload = schemas.QuestionRead.model_validate(question).model_dump(mode='json')
+        return JSONResponse(jsonable_encoder(response_model.validate_python(payload))).body
+
+    def miss_after():
+        payload = serialization.dumps(schemas.QuestionRead.model_validate(question).model_dump(mode='json'))
+        return serialization.RawJSONResponse(payload).body
+
+    print(f"payload: {len(cached.encode('utf-8'))} bytes, {args.iterations} iterations\n")
+    print(f"{'path':<12} {'before us':>10} {'after us':>10} {'speedup':>8}")
+    for label, before, after in (("cache hit", hit_before, hit_after), ("cache miss", miss_before, miss_after)):
+        before_us = _measure(before, args.iterations)
+        after_us = _measure(after, args.iterations)
+        print(f"{label:<12} {before_us:>10.1f} {after_us:>10.1f} {before_us / after_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
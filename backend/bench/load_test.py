@@ -0,0 +1,205 @@
+# backend/bench/load_test.py
+"""
+Offline load test: the FastAPI app on a throwaway SQLite database, fakeredis (or a
+local Redis with --redis-url) and the stub LLM server, driven by concurrent simulated
+users over real HTTP.
+
+Each user registers, logs in, initializes its practice cache, then repeats
+/practice/set/new -> /practice/set/submit, looking up a word every few questions and
+listing its mistakes. Reports throughput and p50/p95/p99 latency per endpoint.
+
+    cd backend && python bench/load_test.py --users 20 --iterations 30 --llm-latency-ms 800
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import stub_llm_server
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)  # endpoint -> [(seconds, ok)]
+
+    def timed(self, client, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            response, ok = None, False
+        with self.lock:
+            self.samples[label].append((time.perf_counter() - started, ok))
+        return response if ok else None
+
+
+def _percentile(sorted_values, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def report(recorder: Recorder, elapsed: float) -> dict:
+    rows = {}
+    for label, samples in sorted(recorder.samples.items()):
+        latencies = sorted(s for s, _ in samples)
+        rows[label] = {
+            "count": len(samples),
+            "errors": sum(1 for _, ok in samples if not ok),
+            "rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+            "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+        }
+    total = sum(row["count"] for row in rows.values())
+    return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 2), "endpoints": rows}
+
+
+def print_report(result: dict):
+    print(f"\n{'endpoint':<32} {'count':>6} {'err':>5} {'rps':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for label, row in result["endpoints"].items():
+        print(f"{label:<32} {row['count']:>6} {row['errors']:>5} {row['rps']:>8} {row['mean_ms']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8}")
+    print(f"\n{result['requests']} requests in {result['elapsed_s']}s -> {result['rps']} req/s (latencies in ms)")
+
+
+def user_journey(base_url: str, recorder: Recorder, args, index: int):
+    import httpx
+
+    rng = random.Random(args.seed + index)
+    topics = ["general", "culture", "technology", "life", "history"]
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        email = f"load-{index}-{uuid.uuid4().hex[:8]}@example.com"
+        recorder.timed(client, "POST /auth/register", "POST", "/auth/register",
+                       json={"email": email, "password": "password123"})
+        token = recorder.timed(client, "POST /auth/login/token", "POST", "/auth/login/token",
+                               data={"username": email, "password": "password123"})
+        if token is None:
+            return
+        client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+        recorder.timed(client, "POST /practice/cache/initialize", "POST", "/practice/cache/initialize")
+
+        for i in range(args.iterations):
+            topic = rng.choice(topics)
+            question = recorder.timed(client, "GET /practice/set/new", "GET", "/practice/set/new",
+                                      params={"topic": topic, "difficulty": "medium"})
+            if question is not None:
+                q = question.json()
+                recorder.timed(client, "POST /practice/set/submit", "POST", "/practice/set/submit", json=[{
+                    "question_id": q["id"],
+                    "selected_word_answer": rng.choice(q.get("options") or ["x"]),
+                    "selected_translation_answer": rng.choice(q.get("translation_options") or ["x"]),
+                }])
+                if i % 3 == 0:
+                    words = [w.strip(".,") for w in (q.get("translation_text") or "word").split() if len(w) > 3]
+                    recorder.timed(client, "POST /vocab/word/explanation", "POST", "/vocab/word/explanation",
+                                   json={"word": rng.choice(words or ["word"]), "sentence": q.get("translation_text")})
+            if i % 5 == 4:
+                recorder.timed(client, "GET /mistakes/", "GET", "/mistakes/", params={"limit": 20})
+            if args.think_time_ms:
+                time.sleep(rng.uniform(0, 2 * args.think_time_ms) / 1000)
+        recorder.timed(client, "GET /practice/stats", "GET", "/practice/stats")
+
+
+def start_app(port: int):
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=20, help="questions answered per user")
+    parser.add_argument("--think-time-ms", type=float, default=0, help="mean pause between questions")
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="fraction of LLM replies that fail to parse")
+    parser.add_argument("--redis-url", help="use this Redis instead of fakeredis, e.g. redis://localhost:6379/15")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_load_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/load.db"
+    os.environ["DB_AUTO_MIGRATE"] = "1"  # fresh database: let app startup create the schema
+
+    stub = stub_llm_server.StubLLM(args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate, args.seed,
+                                   malformed_rate=args.llm_malformed_rate)
+    stub_server = stub_llm_server.start_in_thread(stub)
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{stub_server.server_address[1]}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_API_KEY_WORD"] = "stub"
+
+    if args.redis_url:
+        from urllib.parse import urlparse
+        url = urlparse(args.redis_url)
+        os.environ["REDIS_HOST"] = url.hostname or "localhost"
+        os.environ["REDIS_PORT"] = str(url.port or 6379)
+        os.environ["REDIS_DB"] = (url.path or "/0").lstrip("/") or "0"
+        os.environ["REDIS_URL"] = args.redis_url
+    else:
+        import fakeredis
+        import redis
+        import redis.asyncio
+        fake_server = fakeredis.FakeServer()
+        redis.Redis = lambda *a, **kw: fakeredis.FakeRedis(server=fake_server, decode_responses=kw.get("decode_responses", False))
+        redis.asyncio.Redis = lambda *a, **kw: fakeredis.FakeAsyncRedis(server=fake_server,
+                                                                        decode_responses=kw.get("decode_responses", False))
+
+    port = _free_port()
+    server, thread = start_app(port)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"App on {base_url}, stub LLM on {os.environ['OPENAI_API_BASE']}, database {tmp_dir}/load.db")
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [pool.submit(user_journey, base_url, recorder, args, i) for i in range(args.users)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    result = report(recorder, elapsed)
+    result["config"] = vars(args)
+    result["llm_requests"] = stub.requests
+    print_report(result)
+    print(f"Stub LLM served {stub.requests} completions")
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+    server.should_exit = True
+    thread.join(timeout=10)
+    stub_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
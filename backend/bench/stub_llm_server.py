@@ -0,0 +1,304 @@
+# backend/bench/stub_llm_server.py
+"""
+Deterministic stub OpenAI-compatible chat-completions server for offline runs.
+
+POST /v1/chat/completions answers with content that is valid for the schema the
+caller expects: a word explanation when the request carries the word_explanation
+JSON schema (vocab_service), otherwise a GeneratedQuestion (practice_service).
+Both services read OPENAI_API_BASE, so pointing it here replaces the provider:
+
+    cd backend && python bench/stub_llm_server.py --port 8099 --latency-ms 800 --error-rate 0.05
+    OPENAI_API_BASE=http://127.0.0.1:8099/v1 OPENAI_API_KEY=stub OPENAI_API_KEY_WORD=stub uvicorn app.main:app
+
+Determinism: the content is a function of --seed, the request (model + messages) and
+how many times that same request has been seen, so a replayed request sequence gets
+the same responses. Latency, injected errors and malformed output are drawn from a
+separate seeded stream.
+
+Also supports ``"stream": true`` (SSE chunks, with a usage chunk when
+``stream_options.include_usage`` is set), GET /v1/models and GET /stub/stats.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOPIC_WORDS = {
+    "culture": ("festival", "tradition", "heritage", "ceremony", "custom"),
+    "technology": ("algorithm", "device", "network", "platform", "sensor"),
+    "life": ("routine", "neighbour", "weekend", "habit", "errand"),
+    "history": ("empire", "treaty", "revolution", "dynasty", "archive"),
+    "general": ("decision", "journey", "opportunity", "proposal", "challenge"),
+}
+TOPIC_WORDS_ZH = {
+    "festival": "节日", "tradition": "传统", "heritage": "遗产", "ceremony": "仪式", "custom": "习俗",
+    "algorithm": "算法", "device": "设备", "network": "网络", "platform": "平台", "sensor": "传感器",
+    "routine": "日常安排", "neighbour": "邻居", "weekend": "周末", "habit": "习惯", "errand": "差事",
+    "empire": "帝国", "treaty": "条约", "revolution": "革命", "dynasty": "王朝", "archive": "档案",
+    "decision": "决定", "journey": "旅程", "opportunity": "机会", "proposal": "提议", "challenge": "挑战",
+}
+# (connector, alternatives, explanation, knowledge point, English template, Chinese templates: correct first)
+PATTERNS = (
+    ("Although", ("Because", "Unless", "Whereas"), "Although 引导让步状语从句，表示“尽管”。", "concessive clauses",
+     "{C} the {w} had been debated for years, the committee finally reached an agreement last {d}.",
+     ("尽管这个{z}已经争论了多年，委员会终于在上个{dz}达成了一致。",
+      "因为这个{z}争论了多年，委员会上个{dz}才开始讨论。",
+      "除非这个{z}再争论多年，委员会不会在上个{dz}达成一致。")),
+    ("which", ("who", "whose", "where"), "which 引导非限制性定语从句，修饰前面的物。", "relative clauses",
+     "The {w}, {C} attracted visitors from many countries, was described in detail last {d}.",
+     ("这个吸引了许多国家游客的{z}在上个{dz}被详细描述。",
+      "许多国家的游客在上个{dz}描述了这个{z}。",
+      "这个{z}在上个{dz}吸引了许多国家的游客来描述它。")),
+    ("had", ("has", "have", "having"), "由 by the time 引导的从句提示过去完成时 had done。", "past perfect tense",
+     "By the time the report on the {w} was published last {d}, most readers {C} already formed an opinion.",
+     ("到上个{dz}关于这个{z}的报告发表时，大多数读者已经形成了看法。",
+      "上个{dz}关于这个{z}的报告发表后，大多数读者才形成看法。",
+      "大多数读者在上个{dz}发表了关于这个{z}的报告并形成了看法。")),
+)
+DAYS = (("week", "星期"), ("month", "月"), ("year", "年"))
+
+
+class StubLLM:
+    def __init__(self, latency_ms: float = 500, jitter_ms: float = 100, error_rate: float = 0.0, seed: int = 0,
+                 error_status: int = 500, malformed_rate: float = 0.0, ttft_ms: float = 50,
+                 tokens_per_second: float = 200):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.malformed_rate = malformed_rate
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self._faults = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen = Counter()
+        self.stats = Counter()
+
+    @property
+    def requests(self) -> int:
+        return self.stats["requests"]
+
+    # -- content ---------------------------------------------------------------
+
+    def _content_rng(self, body: dict) -> random.Random:
+        key = json.dumps([body.get("model"), body.get("messages")], sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            occurrence = self._seen[key]
+            self._seen[key] += 1
+        digest = hashlib.sha256(f"{self.seed}:{occurrence}:{key}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    @staticmethod
+    def question(prompt: str, rng: random.Random) -> dict:
+        topic = next((t for t in TOPIC_WORDS if f"'{t}'" in prompt), "general")
+        difficulty = next((d for d in ("advanced", "hard", "medium") if f"{d} difficulty" in prompt), "medium")
+        word = rng.choice(TOPIC_WORDS[topic])
+        day, day_zh = rng.choice(DAYS)
+        connector, alternatives, explanation, knowledge_point, template, translations = rng.choice(PATTERNS)
+        sentence = template.format(C=connector, w=word, d=day)
+        options = [connector, *alternatives]
+        rng.shuffle(options)
+        translation_options = [t.format(z=TOPIC_WORDS_ZH[word], dz=day_zh) for t in translations]
+        correct_translation = translation_options[0]
+        rng.shuffle(translation_options)
+        return {
+            "sentence_with_blank": template.format(C="____", w=word, d=day),
+            "options": options,
+            "answer": connector,
+            "explanation": explanation,
+            "original_English_sentence": sentence,
+            "translation_options": translation_options,
+            "correct_translation_option": correct_translation,
+            "difficulty": difficulty,
+            "knowledge_point": knowledge_point,
+        }
+
+    @staticmethod
+    def word_explanation(prompt: str, rng: random.Random) -> dict:
+        word = prompt.split('中"', 1)[1].split('"', 1)[0] if '中"' in prompt else "word"
+        lemma = word.lower().strip()
+        for suffix in ("ing", "ed", "es", "s"):
+            if lemma.endswith(suffix) and len(lemma) - len(suffix) >= 3:
+                lemma = lemma[: -len(suffix)]
+                break
+        parts = rng.sample(["n.", "v.", "adj.", "adv."], k=rng.randint(1, 2))
+        return {
+            "word": lemma,
+            "phonetic": f"/{lemma}/",
+            "definitions": [
+                {"part_of_speech": part, "meanings": [f"{lemma} 的释义 {i + 1}" for i in range(rng.randint(1, 3))]}
+                for part in parts
+            ],
+        }
+
+    # -- request handling ------------------------------------------------------
+
+    def draw_faults(self):
+        """(delay seconds, fail, malformed) for the next request."""
+        with self._lock:
+            delay = max(0.0, self._faults.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            failed = self._faults.random() < self.error_rate
+            malformed = self._faults.random() < self.malformed_rate
+        return delay, failed, malformed
+
+    def build(self, body: dict, malformed: bool = False):
+        """(content text, prompt_tokens, completion_tokens) for a chat-completions request body."""
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        schema_name = ((body.get("response_format") or {}).get("json_schema") or {}).get("name")
+        rng = self._content_rng(body)
+        if malformed:
+            text = "Sure! Here is your question: {\"sentence_with_blank\": "
+        elif schema_name == "word_explanation":
+            text = json.dumps(self.word_explanation(prompt, rng), ensure_ascii=False)
+        else:
+            text = json.dumps(self.question(prompt, rng), ensure_ascii=False)
+        return text, max(1, len(prompt) // 4), max(1, len(text) // 4)
+
+    def error_payload(self):
+        self.stats["errors"] += 1
+        message = "Rate limit reached (stub)" if self.error_status == 429 else "stub injected failure"
+        return self.error_status, {"error": {"message": message, "type": "server_error" if self.error_status >= 500 else "rate_limit_error"}}
+
+
+def _completion(body: dict, text: str, prompt_tokens: int, completion_tokens: int, request_id: str) -> dict:
+    return {
+        "id": request_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def _chunk(body: dict, request_id: str, delta: dict, finish_reason=None, usage=None) -> dict:
+    chunk = {
+        "id": request_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    if usage:
+        chunk["usage"] = usage
+    return chunk
+
+
+def make_handler(stub: StubLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path.endswith("/models"):
+                return self._send(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+            if path == "/stub/stats":
+                return self._send(200, dict(stub.stats))
+            self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            stub.stats["requests"] += 1
+
+            delay, failed, malformed = stub.draw_faults()
+            if failed:
+                time.sleep(delay / 2)
+                return self._send(*stub.error_payload())
+            if malformed:
+                stub.stats["malformed"] += 1
+            text, prompt_tokens, completion_tokens = stub.build(body, malformed)
+            request_id = f"chatcmpl-stub-{stub.stats['requests']}"
+            if body.get("stream"):
+                stub.stats["streamed"] += 1
+                return self._stream(body, request_id, text, prompt_tokens, completion_tokens)
+            time.sleep(delay)
+            self._send(200, _completion(body, text, prompt_tokens, completion_tokens, request_id))
+
+        def _stream(self, body, request_id, text, prompt_tokens, completion_tokens):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(stub.ttft_ms / 1000)
+            self._event(_chunk(body, request_id, {"role": "assistant", "content": ""}))
+            piece = 16  # characters per chunk, roughly four tokens
+            for start in range(0, len(text), piece):
+                self._event(_chunk(body, request_id, {"content": text[start:start + piece]}))
+                if stub.tokens_per_second:
+                    time.sleep(4 / stub.tokens_per_second)
+            self._event(_chunk(body, request_id, {}, finish_reason="stop"))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._event(_chunk(body, request_id, {}, usage={
+                    "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens}))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _event(self, payload: dict):
+            self._write_chunk(b"data: " + json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n\n")
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _send(self, status: int, payload: dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_in_thread(stub: StubLLM, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve `stub` from a daemon thread; the bound port is server.server_address[1]."""
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=500, help="mean latency of a non-streamed response")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=500, choices=(429, 500, 502, 503))
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of responses that are not valid JSON")
+    parser.add_argument("--ttft-ms", type=float, default=50, help="time to first chunk when streaming")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="streaming speed (0 = no delay)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = StubLLM(args.latency_ms, args.jitter_ms, args.error_rate, args.seed, error_status=args.error_status,
+                   malformed_rate=args.malformed_rate, ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(stub))
+    server.daemon_threads = True
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1 (seed {args.seed})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,10 @@ done
 echo "Redis is ready!"
 
 
+# Apply schema changes before the app starts (the app itself no longer runs DDL)
+echo "Migrating database schema..."
+python -m app.cli migrate
+
 # Start the FastAPI application
 echo "Starting FastAPI application..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file